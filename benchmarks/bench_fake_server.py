@@ -0,0 +1,104 @@
+"""Benchmark the OpenAI HTTP path against the local fake server.
+
+Starts the fake OpenAI-compatible server, points an OpenAIModel at it through
+``api_base_url`` and sends question prompts at increasing concurrency. Reports
+throughput and p50/p99 latency per level, so pool sizing, timeouts, 429
+handling and streaming are measured over real HTTP without a provider.
+
+Usage:
+    python benchmarks/bench_fake_server.py [--requests 200] [--latency-mean 0.05]
+        [--rate-limit-rate 0.0] [--error-rate 0.0] [--stream] [--embeddings]
+"""
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from textfission.core.config import Config, CustomConfig, ExportConfig, MockModelConfig, ModelConfig, ProcessingConfig
+from textfission.models.clients import ClientRegistry
+from textfission.models.fake_server import FakeOpenAIServer
+from textfission.models.openai import OpenAIModel
+from textfission.processors.question_generator import QuestionGenerator
+
+CHUNK = (
+    "Python is a high-level programming language created by Guido van Rossum. "
+    "It emphasizes code readability and supports several programming paradigms. "
+    "The standard library covers networking, file formats and concurrency."
+)
+
+
+def make_model(base_url: str, concurrency: int) -> OpenAIModel:
+    config = Config(
+        model_settings=ModelConfig(api_key="bench-key", model="gpt-4o-mini", api_base_url=base_url),
+        processing_config=ProcessingConfig(max_workers=concurrency, retry_delay=0),
+        export_config=ExportConfig(),
+        custom_config=CustomConfig(language="en")
+    )
+    return OpenAIModel(config)
+
+
+def run_level(model: OpenAIModel, prompts, concurrency: int, mode: str):
+    """Send all prompts with concurrency workers; returns (seconds, latencies, errors)"""
+    def call(prompt):
+        start = time.perf_counter()
+        try:
+            if mode == "stream":
+                "".join(model.generate_stream(prompt))
+            elif mode == "embeddings":
+                model.get_embeddings([prompt])
+            else:
+                model.generate(prompt)
+            return time.perf_counter() - start, None
+        except Exception as e:
+            return time.perf_counter() - start, type(e).__name__
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(call, prompts))
+    elapsed = time.perf_counter() - start
+    latencies = np.array([latency for latency, error in results if error is None])
+    errors = sum(1 for _, error in results if error is not None)
+    return elapsed, latencies, errors
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--latency", default="lognormal")
+    parser.add_argument("--latency-mean", type=float, default=0.05)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--stream", action="store_true", help="stream chat completions")
+    parser.add_argument("--embeddings", action="store_true", help="request embeddings instead of completions")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 64])
+    args = parser.parse_args()
+    mode = "embeddings" if args.embeddings else "stream" if args.stream else "chat"
+
+    settings = MockModelConfig(
+        latency=args.latency,
+        latency_mean=args.latency_mean,
+        rate_limit_rate=args.rate_limit_rate,
+        retry_after=0.05,
+        error_rate=args.error_rate
+    )
+    print(f"{'workers':>8} {'requests':>9} {'errors':>7} {'req/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'peak':>5}  statuses")
+    for concurrency in args.concurrency:
+        # A fresh server and client per level, so statuses and pools are per level
+        with FakeOpenAIServer(settings) as server:
+            model = make_model(server.base_url, concurrency)
+            generator = QuestionGenerator(model.config)
+            # Distinct prompts, so the mock does not see repeated sends
+            prompts = [generator.build_prompt(f"{CHUNK} Request {i}.") for i in range(args.requests)]
+            elapsed, latencies, errors = run_level(model, prompts, concurrency, mode)
+            stats = server.stats()
+            ClientRegistry.get_instance().clear()
+        p50, p99 = (np.percentile(latencies, [50, 99]) * 1000) if len(latencies) else (float("nan"),) * 2
+        print(
+            f"{concurrency:>8} {args.requests:>9} {errors:>7} {args.requests / elapsed:>9.1f} "
+            f"{p50:>9.1f} {p99:>9.1f} {stats['max_inflight']:>5}  {stats['statuses']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Benchmark JSON extraction from large model responses.
+
+Compares the shared single-pass extractor with the regex extraction the
+generators used before (greedy ``\\{.*\\}`` with DOTALL), on complete and
+truncated responses of increasing size.
+
+Usage:
+    python benchmarks/bench_json_extraction.py [--repeat 20]
+"""
+import argparse
+import json
+import re
+import time
+
+from textfission.core.json_extractor import extract_json
+
+
+def legacy_extract(response: str) -> dict:
+    """Previous regex based extraction"""
+    json_match = re.search(r'```(?:json)?\s*(\{.*?\})\s*```', response, re.DOTALL)
+    if json_match:
+        return json.loads(json_match.group(1))
+    json_match = re.search(r'\{.*\}', response, re.DOTALL)
+    if json_match:
+        return json.loads(json_match.group(0))
+    return json.loads(response)
+
+
+def make_response(questions: int, truncate: bool = False) -> str:
+    """Build a model-like response: prose, a fenced JSON payload with many items"""
+    payload = {"questions": [
+        {
+            "text": f"What does section {i} say about {{config}} and \"quoted\" values?",
+            "type": "factual",
+            "difficulty": 0.5,
+            "keywords": ["section", str(i), "{braces}"],
+            "context_required": i % 2 == 0
+        }
+        for i in range(questions)
+    ]}
+    body = json.dumps(payload, ensure_ascii=False, indent=2)
+    if truncate:
+        # Cut in the middle of the last item, as max_tokens would
+        return "Here are the questions:\n```json\n" + body[: len(body) - 60]
+    return "Here are the questions:\n```json\n" + body + "\n```\nLet me know if you need more."
+
+
+def measure(func, response: str, repeat: int):
+    """Return (best seconds per call, result or error name)"""
+    best = float("inf")
+    outcome = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        try:
+            result = func(response)
+            outcome = f"{len(result.get('questions', []))} items"
+        except Exception as e:
+            outcome = type(e).__name__
+        best = min(best, time.perf_counter() - start)
+    return best, outcome
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'items':>7} {'size':>10} {'case':>10} {'legacy ms':>10} {'shared ms':>10}  result (legacy / shared)")
+    for questions in (10, 100, 1000, 5000):
+        for truncate in (False, True):
+            response = make_response(questions, truncate)
+            legacy_time, legacy_outcome = measure(legacy_extract, response, args.repeat)
+            shared_time, shared_outcome = measure(extract_json, response, args.repeat)
+            print(
+                f"{questions:>7} {len(response):>10} {'truncated' if truncate else 'complete':>10} "
+                f"{legacy_time * 1000:>10.2f} {shared_time * 1000:>10.2f}  {legacy_outcome} / {shared_outcome}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,12 @@
+import pytest
+from textfission.models.clients import ClientRegistry
+from textfission.models.cassette import Cassette
+from textfission.core.circuit_breaker import CircuitBreakerRegistry
+
+@pytest.fixture(autouse=True)
+def fresh_clients():
+    """Tests patch methods on model clients, trip breakers and open cassettes, so do not let shared state leak between tests"""
+    yield
+    ClientRegistry.get_instance().clear()
+    CircuitBreakerRegistry.get_instance().clear()
+    Cassette.close_all()
@@ -0,0 +1,12 @@
+from textfission.core.config import Config, CustomConfig, ExportConfig, ModelConfig, ProcessingConfig
+
+def make_config(processing=None, custom=None, export=None, **model_settings) -> Config:
+    """Test config: keyword arguments are ModelConfig fields (api_key defaults to "test-key"),
+    processing, custom and export are field overrides for the other sections"""
+    model_settings.setdefault("api_key", "test-key")
+    return Config(
+        model_settings=ModelConfig(**model_settings),
+        processing_config=ProcessingConfig(**(processing or {})),
+        export_config=ExportConfig(**(export or {})),
+        custom_config=CustomConfig(**(custom or {}))
+    )
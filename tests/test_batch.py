@@ -0,0 +1,250 @@
+import pytest
+import json
+import threading
+import time
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from textfission import create_dataset_from_files
+from textfission.processors.batch import BatchRunner
+from helpers import make_config
+
+QUESTION = {
+    "text": "What is Python?",
+    "type": "factual",
+    "difficulty": 0.5,
+    "keywords": ["python"],
+    "context_required": True
+}
+
+ANSWER = {
+    "answer": "Python is a programming language.",
+    "metadata": {
+        "quality": "good",
+        "confidence": 0.9,
+        "relevance_score": 0.9,
+        "completeness_score": 0.9,
+        "coherence_score": 0.9,
+        "supporting_evidence": ["Python is a programming language"],
+        "citations": []
+    }
+}
+
+def respond(body):
+    """Scripted model: questions for question prompts, answers for answer prompts"""
+    prompt = body["messages"][-1]["content"]
+    if "\n\nQuestion:\n" in prompt:
+        return json.dumps(ANSWER)
+    return json.dumps({"questions": [QUESTION]})
+
+def completion(body):
+    return {
+        "id": "chatcmpl-test",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body["model"],
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": respond(body)}, "finish_reason": "stop"}],
+        "usage": {"prompt_tokens": 10, "completion_tokens": 10, "total_tokens": 20}
+    }
+
+class StandInBatchServer:
+    """Local stand-in for the OpenAI files, batches and chat completion endpoints"""
+
+    def __init__(self, fail_ids=(), end_status="completed", batch_status=200):
+        self.files = {}
+        self.batches = {}
+        self.fail_ids = set(fail_ids)
+        self.end_status = end_status
+        self.batch_status = batch_status
+        self.chat_requests = 0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _send(self, payload, status=200, raw=False):
+                data = payload if raw else json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/octet-stream" if raw else "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _body(self):
+                return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+            def do_POST(self):
+                if self.path == "/v1/files":
+                    self._send(server.upload(self.headers["Content-Type"], self._body()))
+                elif self.path == "/v1/batches" and server.batch_status != 200:
+                    self._body()
+                    self._send({"error": {"message": "batches unavailable"}}, server.batch_status)
+                elif self.path == "/v1/batches":
+                    self._send(server.create_batch(json.loads(self._body())))
+                elif self.path.endswith("/cancel"):
+                    batch = server.batches[self.path.split("/")[-2]]
+                    batch["status"] = "cancelled"
+                    self._send(batch)
+                elif self.path == "/v1/chat/completions":
+                    server.chat_requests += 1
+                    self._send(completion(json.loads(self._body())))
+                else:
+                    self._send({"error": "not found"}, 404)
+
+            def do_GET(self):
+                parts = self.path.strip("/").split("/")
+                if parts[:2] == ["v1", "batches"]:
+                    self._send(server.poll(parts[2]))
+                elif parts[:2] == ["v1", "files"] and parts[-1] == "content":
+                    self._send(server.files[parts[2]], raw=True)
+                else:
+                    self._send({"error": "not found"}, 404)
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.base_url = f"http://127.0.0.1:{self.httpd.server_address[1]}/v1"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def upload(self, content_type, body):
+        message = BytesParser(policy=HTTP).parsebytes(
+            f"Content-Type: {content_type}\r\n\r\n".encode("utf-8") + body
+        )
+        content = next(
+            part.get_payload(decode=True) for part in message.iter_parts()
+            if part.get_param("name", header="content-disposition") == "file"
+        )
+        file_id = f"file-{len(self.files)}"
+        self.files[file_id] = content
+        return {"id": file_id, "object": "file", "bytes": len(content), "created_at": 0, "filename": "input.jsonl", "purpose": "batch"}
+
+    def create_batch(self, request):
+        batch_id = f"batch-{len(self.batches)}"
+        self.batches[batch_id] = {
+            "id": batch_id, "object": "batch", "endpoint": request["endpoint"], "input_file_id": request["input_file_id"],
+            "completion_window": request["completion_window"], "created_at": 0, "status": "validating", "polls": 0
+        }
+        return self.batches[batch_id]
+
+    def poll(self, batch_id):
+        batch = self.batches[batch_id]
+        batch["polls"] += 1
+        if batch["status"] == "validating":
+            batch["status"] = "in_progress"
+        elif batch["status"] == "in_progress" and self.end_status != "completed":
+            batch["status"] = self.end_status
+        elif batch["status"] == "in_progress":
+            lines = []
+            for line in self.files[batch["input_file_id"]].decode("utf-8").splitlines():
+                request = json.loads(line)
+                if request["custom_id"] in self.fail_ids:
+                    continue
+                lines.append(json.dumps({
+                    "id": f"req-{request['custom_id']}",
+                    "custom_id": request["custom_id"],
+                    "response": {"status_code": 200, "request_id": "r", "body": completion(request["body"])},
+                    "error": None
+                }))
+            output_id = f"file-{len(self.files)}"
+            self.files[output_id] = "\n".join(lines).encode("utf-8")
+            batch.update(status="completed", output_file_id=output_id)
+        return batch
+
+    def close(self):
+        self.httpd.shutdown()
+
+@pytest.fixture
+def server():
+    stand_in = StandInBatchServer(fail_ids={"answer-1-0"})
+    yield stand_in
+    stand_in.close()
+
+def batch_config(base_url, tmp_path, api_keys=(), **processing):
+    processing.setdefault("batch_dir", str(tmp_path / "batches"))
+    return make_config(
+        api_key="test-batch-key",
+        api_keys=list(api_keys),
+        model="gpt-4o-mini",
+        api_base_url=base_url,
+        processing=dict(batch_mode=True, batch_poll_interval=0.01, min_chars=10, **processing),
+        export=dict(output_dir=str(tmp_path)),
+        custom=dict(
+            language="en",
+            min_questions_per_chunk=1,
+            max_questions_per_chunk=3,
+            question_types=["factual"],
+            min_quality="good"
+        )
+    )
+
+class TestBatchRunner:
+    """测试批处理API模式"""
+
+    def test_questions_and_answers_through_batches(self, server, tmp_path):
+        """测试两个阶段通过批处理完成，失败项回退到交互式请求"""
+        runner = BatchRunner(batch_config(server.base_url, tmp_path))
+        chunks = ["Python is a programming language.", "Python was created by Guido van Rossum."]
+        questions, answers = runner.run(chunks)
+
+        assert [[q["text"] for q in chunk_questions] for chunk_questions in questions] == [["What is Python?"]] * 2
+        assert all(answer["answer"] == ANSWER["answer"] for chunk_answers in answers for answer in chunk_answers)
+        assert len(server.batches) == 2
+        # The answer the batch dropped was generated interactively
+        assert server.chat_requests == 1
+        assert runner.get_stats() == {"batches": 2, "requests": 4, "failed_requests": 1, "fallbacks": 1}
+        assert (tmp_path / "batches" / "questions.jsonl").exists()
+        assert (tmp_path / "batches" / "answers.output.jsonl").exists()
+
+    def test_create_dataset_from_files_in_batch_mode(self, server, tmp_path):
+        """测试create_dataset_from_files使用批处理模式并正常导出"""
+        paths = []
+        for index, text in enumerate(["Python is a programming language.", "Python was created by Guido van Rossum."]):
+            path = tmp_path / f"doc{index}.txt"
+            path.write_text(text, encoding="utf-8")
+            paths.append(str(path))
+
+        output = create_dataset_from_files(paths, batch_config(server.base_url, tmp_path), str(tmp_path / "dataset.json"), show_progress=False)
+        with open(output, encoding="utf-8") as f:
+            dataset = json.load(f)
+        assert len(dataset) == 2
+        assert {item["question"] for item in dataset} == {"What is Python?"}
+        assert len(server.batches) == 2
+
+    def test_failed_batch_falls_back_to_interactive(self, tmp_path):
+        """测试批处理失败时全部条目回退到交互式请求"""
+        stand_in = StandInBatchServer(end_status="failed")
+        try:
+            runner = BatchRunner(batch_config(stand_in.base_url, tmp_path))
+            questions, answers = runner.run(["Python is a programming language.", "Python was created by Guido van Rossum."])
+        finally:
+            stand_in.close()
+
+        assert [len(chunk_answers) for chunk_answers in answers] == [1, 1]
+        assert stand_in.chat_requests == 4
+        assert runner.get_stats()["fallbacks"] == 4
+
+    @pytest.mark.parametrize("batch_status", [404, 500])
+    def test_unavailable_batch_endpoint_falls_back_to_interactive(self, tmp_path, batch_status):
+        """测试批处理端点不可用时不中断运行，全部条目回退到交互式请求"""
+        stand_in = StandInBatchServer(batch_status=batch_status)
+        try:
+            runner = BatchRunner(batch_config(stand_in.base_url, tmp_path))
+            questions, answers = runner.run(["Python is a programming language.", "Python was created by Guido van Rossum."])
+        finally:
+            stand_in.close()
+
+        assert [len(chunk_answers) for chunk_answers in answers] == [1, 1]
+        assert not stand_in.batches
+        assert stand_in.chat_requests == 4
+        assert runner.get_stats()["batches"] == 0
+        assert runner.get_stats()["fallbacks"] == 4
+
+    def test_answers_split_over_pool_and_temporary_files_removed(self, server, tmp_path, monkeypatch):
+        """测试答案请求按密钥分批提交，未配置batch_dir时临时文件被清理"""
+        monkeypatch.setattr("tempfile.tempdir", str(tmp_path))
+        runner = BatchRunner(batch_config(server.base_url, tmp_path, api_keys=["key-a", "key-b"], batch_dir=None))
+        runner.run(["Python is a programming language.", "Python was created by Guido van Rossum."])
+
+        assert len(server.batches) == 3
+        assert runner.get_stats()["requests"] == 4
+        assert not list(tmp_path.glob("textfission-batch-*"))
@@ -4,6 +4,12 @@ import json
 import time
 import tempfile
 from pathlib import Path
+from datetime import timedelta
+from textfission.core.cache import Cache
+from textfission.core.metrics import LatencyHistogram
+from textfission.core.json_extractor import extract_json, repair_truncated_json, IncrementalArrayParser
+from textfission.core.concurrency import AdaptiveConcurrencyLimiter, is_overload_error, parallel_map
+from textfission.core.rate_limiter import TokenBucket, RateLimiter, RateLimiterRegistry, estimate_tokens
 from textfission.core.config import Config, ModelConfig, ProcessingConfig, ExportConfig, CustomConfig, ConfigManager
 from textfission.core.exceptions import (
     TextFissionError,
@@ -18,8 +24,18 @@ from textfission.core.exceptions import (
     ResourceError,
     TimeoutError,
     RetryError,
+    RateLimitError,
     ErrorHandler,
-    ErrorCodes
+    ErrorCodes,
+    RetryPolicy,
+    RetryBudget,
+    RetryExhausted,
+    get_retry_after,
+    is_retryable_error,
+    Deadline,
+    DeadlineExceeded,
+    deadline_scope,
+    get_request_timeout
 )
 
 class TestConfig:
@@ -81,6 +97,25 @@ class TestConfig:
         assert config.model_settings.api_key == "test-key"
         assert config.processing_config.max_workers == 4
 
+    def test_stage_model_settings(self):
+        """测试分阶段模型配置覆盖"""
+        config = Config.from_dict({
+            "model_settings": {"api_key": "test-key", "model": "gpt-4o", "max_tokens": 2000},
+            "processing_config": {},
+            "export_config": {},
+            "custom_config": {},
+            "question_model_settings": {"model": "gpt-4o-mini", "max_tokens": 600}
+        })
+        
+        question_config = config.for_stage("question")
+        assert question_config.model_settings.model == "gpt-4o-mini"
+        assert question_config.model_settings.max_tokens == 600
+        assert question_config.model_settings.api_key == "test-key"
+        assert question_config.processing_config is config.processing_config
+        # Stages without overrides and the original config are unchanged
+        assert config.for_stage("answer") is config
+        assert config.model_settings.model == "gpt-4o"
+
     def test_config_to_dict(self):
         """测试配置转字典"""
         config = Config(
@@ -228,4 +263,512 @@ class TestErrorCodes:
         assert ErrorCodes.EXPORT_ERROR == "EXPORT_ERROR"
         assert ErrorCodes.RESOURCE_ERROR == "RESOURCE_ERROR"
         assert ErrorCodes.TIMEOUT_ERROR == "TIMEOUT_ERROR"
-        assert ErrorCodes.RETRY_ERROR == "RETRY_ERROR" 
\ No newline at end of file
+        assert ErrorCodes.RETRY_ERROR == "RETRY_ERROR" 
+class TestCacheStats:
+    """测试缓存统计"""
+    
+    def test_hit_miss_counters(self):
+        """测试命中与未命中计数"""
+        cache = Cache(max_size=10)
+        assert cache.get("missing") is None
+        cache.set("key", "value")
+        assert cache.get("key") == "value"
+        
+        stats = cache.get_stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["hit_rate"] == 0.5
+        assert stats["memory_size"] == 1
+        assert stats["memory_bytes"] > 0
+
+    def test_eviction_and_expiration_counters(self):
+        """测试淘汰与过期计数"""
+        cache = Cache(max_size=2)
+        for i in range(3):
+            cache.set(f"key{i}", i)
+        assert cache.get("key0") is None
+        assert cache.stats["evictions"] == 1
+        
+        cache.set("short", "value", ttl=1)
+        cache.memory_cache[cache._get_key("short")].created_at -= timedelta(seconds=5)
+        # expired_count counts expired entries still held, expirations those removed
+        assert cache.get_stats()["expired_count"] == 1
+        assert cache.get("short") is None
+        assert cache.stats["expirations"] == 1
+        assert cache.get_stats()["expired_count"] == 0
+        assert cache.get_stats()["expirations"] == 1
+
+    def test_disk_counters_and_snapshot(self):
+        """测试磁盘读写计数与快照"""
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cache = Cache(max_size=10, cache_dir=cache_dir)
+            cache.set("key", {"a": 1}, persist=True)
+            assert cache.get_stats()["file_count"] == 1
+            assert cache.stats["disk_writes"] == 1
+            
+            # 新实例从磁盘读取
+            fresh = Cache(max_size=10, cache_dir=cache_dir)
+            assert fresh.get_stats()["file_count"] == 1
+            assert fresh.get("key") == {"a": 1}
+            snapshot = fresh.snapshot()
+            assert snapshot["disk_reads"] == 1
+            assert snapshot["disk_hits"] == 1
+            assert snapshot["get_latency"]["disk"]["count"] == 1
+            
+            fresh.delete("key")
+            assert fresh.get_stats()["file_count"] == 0
+            assert fresh.get_stats()["disk_bytes"] == 0
+            
+            # 文件已被其他进程删除时不报错
+            fresh.set("gone", 1, persist=True)
+            path = fresh._get_file_path(fresh._get_key("gone"))
+            path.unlink()
+            fresh._unlink_file(path)
+
+class TestLatencyHistogram:
+    """测试延迟直方图"""
+    
+    def test_percentiles(self):
+        """测试分位数估计"""
+        histogram = LatencyHistogram()
+        for ms in range(1, 101):
+            histogram.observe(ms / 1000.0)
+        snapshot = histogram.snapshot()
+        assert snapshot["count"] == 100
+        assert snapshot["min_ms"] == pytest.approx(1.0)
+        assert snapshot["max_ms"] == pytest.approx(100.0)
+        assert snapshot["p50_ms"] <= 100
+        assert histogram.percentile(99) == pytest.approx(100.0)
+
+class TestCacheCompression:
+    """测试缓存压缩"""
+    
+    def test_large_values_are_compressed(self):
+        """测试大值压缩且可正确读取"""
+        cache = Cache(compression="zlib", compress_threshold=256)
+        value = {"questions": [{"text": "What is Python?" * 10}] * 50}
+        cache.set("big", value)
+        cache.set("small", "tiny")
+        
+        assert cache.get("big") == value
+        assert cache.get("small") == "tiny"
+        assert cache.stats["compressed_sets"] == 1
+        assert cache.stats["compression_saved_bytes"] > 0
+        assert cache.memory_cache[cache._get_key("big")].codec == "zlib"
+        assert cache.memory_cache[cache._get_key("small")].codec == "none"
+
+    def test_compressed_disk_roundtrip(self):
+        """测试压缩值持久化"""
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cache = Cache(cache_dir=cache_dir, compression="zlib", compress_threshold=0)
+            cache.set("key", ["value"] * 200, persist=True)
+            assert Cache(cache_dir=cache_dir).get("key") == ["value"] * 200
+
+    def test_memory_bounded_by_bytes(self):
+        """测试内存层按字节数限制"""
+        cache = Cache(max_size=1000, max_bytes=2000)
+        for i in range(10):
+            cache.set(f"key{i}", "x" * 500)
+        
+        stats = cache.get_stats()
+        assert stats["memory_bytes"] <= 2000
+        assert stats["memory_size"] < 10
+        assert stats["evictions"] > 0
+        assert cache.get("key9") == "x" * 500
+        
+        # 超过max_bytes的值不进入内存层，计入oversized；持久化时仍可从磁盘读取
+        cache.set("huge", "x" * 5000)
+        assert cache.get("huge") is None
+        assert cache.stats["oversized"] == 1
+        with tempfile.TemporaryDirectory() as cache_dir:
+            disk_cache = Cache(max_bytes=2000, cache_dir=cache_dir)
+            disk_cache.set("huge", "x" * 5000, persist=True)
+            assert disk_cache.get("huge") == "x" * 5000
+
+    def test_live_values_in_memory(self):
+        """测试未压缩的值以原对象保存，不可序列化的值也能缓存"""
+        cache = Cache(compression="zlib", compress_threshold=256)
+        value = {"a": [1, 2]}
+        cache.set("small", value)
+        assert cache.get("small") is value
+        
+        unpicklable = lambda: None
+        cache.set("func", unpicklable)
+        assert cache.get("func") is unpicklable
+        
+        with tempfile.TemporaryDirectory() as cache_dir:
+            disk_cache = Cache(cache_dir=cache_dir)
+            disk_cache.set("small", value, persist=True)
+            assert Cache(cache_dir=cache_dir).get("small") == value
+
+    def test_invalid_compression(self):
+        """测试不支持的压缩算法"""
+        with pytest.raises(ValueError):
+            Cache(compression="lz4")
+
+class TestCacheSnapshot:
+    """测试缓存快照导出/导入"""
+    
+    def test_export_import_roundtrip(self):
+        """测试快照往返并保留TTL"""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            source = Cache(cache_dir=os.path.join(tmp_dir, "source"), compression="zlib", compress_threshold=0)
+            source.set("persisted", {"answer": "yes"}, ttl=120, persist=True)
+            source.set("memory_only", [1, 2, 3], ttl=60)
+            source.set("expired", "old", ttl=1)
+            source.memory_cache[source._get_key("expired")].created_at -= timedelta(seconds=10)
+            
+            snapshot_path = os.path.join(tmp_dir, "cache.tfc")
+            assert source.export_snapshot(snapshot_path) == 2
+            
+            target = Cache(cache_dir=os.path.join(tmp_dir, "target"))
+            result = target.import_snapshot(snapshot_path)
+            assert result["imported"] == 2
+            assert target.get("persisted") == {"answer": "yes"}
+            assert target.get("memory_only") == [1, 2, 3]
+            assert target.get_stats()["file_count"] == 2
+            
+            original = source.memory_cache[source._get_key("persisted")]
+            imported = target.memory_cache[target._get_key("persisted")]
+            assert imported.ttl == original.ttl
+            assert abs((imported.created_at - original.created_at).total_seconds()) < 1e-3
+
+    def test_import_skips_existing_entries(self):
+        """测试导入时跳过已存在的缓存项"""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            source = Cache()
+            source.set("key", "from_snapshot")
+            snapshot_path = os.path.join(tmp_dir, "cache.tfc")
+            source.export_snapshot(snapshot_path)
+            
+            target = Cache()
+            target.set("key", "local")
+            assert target.import_snapshot(snapshot_path)["existing"] == 1
+            assert target.get("key") == "local"
+            target.import_snapshot(snapshot_path, overwrite=True)
+            assert target.get("key") == "from_snapshot"
+
+    def test_import_invalid_file(self):
+        """测试导入无效文件"""
+        with tempfile.NamedTemporaryFile(suffix=".tfc", delete=False) as f:
+            f.write(b"not a snapshot")
+        try:
+            with pytest.raises(CacheError):
+                Cache().import_snapshot(f.name)
+        finally:
+            os.unlink(f.name)
+
+class TestRateLimiter:
+    """测试客户端限流"""
+    
+    def test_token_bucket_wait(self):
+        """测试令牌桶等待时间"""
+        bucket = TokenBucket(capacity=1, refill_per_second=20)
+        assert bucket.reserve(1) == 0.0
+        assert bucket.reserve(1) == pytest.approx(0.05, abs=0.01)
+
+    def test_acquire_and_reconcile(self):
+        """测试预估与实际token校正"""
+        limiter = RateLimiter(requests_per_minute=600, tokens_per_minute=1000)
+        reservation = limiter.acquire(estimated_tokens=400)
+        assert limiter.token_bucket.available() == pytest.approx(600, abs=5)
+        
+        limiter.reconcile(reservation, actual_tokens=100)
+        assert limiter.token_bucket.available() == pytest.approx(900, abs=5)
+        snapshot = limiter.snapshot()
+        assert snapshot["requests"] == 1
+        assert snapshot["actual_tokens"] == 100
+
+    def test_requests_are_throttled(self):
+        """测试超过RPM时阻塞"""
+        limiter = RateLimiter(requests_per_minute=1200)
+        limiter.request_bucket.tokens = 0
+        start = time.monotonic()
+        limiter.acquire()
+        assert time.monotonic() - start >= 0.04
+        assert limiter.snapshot()["throttled"] == 1
+
+    def test_registry_shares_limiters(self):
+        """测试相同提供方、密钥与模型共享限流器"""
+        registry = RateLimiterRegistry.get_instance()
+        first = registry.get_limiter("openai", "key-a", "gpt-4o", requests_per_minute=60)
+        assert registry.get_limiter("openai", "key-a", "gpt-4o", requests_per_minute=60) is first
+        assert registry.get_limiter("openai", "key-b", "gpt-4o", requests_per_minute=60) is not first
+        assert registry.get_limiter("openai", "key-a", "gpt-4o") is None
+        assert "key-a" not in " ".join(registry.snapshot().keys())
+
+    def test_registry_keeps_first_limits(self, caplog):
+        """测试同一限流器以不同限额再次获取时保留原限额并告警"""
+        registry = RateLimiterRegistry.get_instance()
+        first = registry.get_limiter("openai", "key-c", "gpt-4o", requests_per_minute=60)
+        with caplog.at_level("WARNING"):
+            assert registry.get_limiter("openai", "key-c", "gpt-4o", requests_per_minute=120) is first
+        assert first.requests_per_minute == 60
+        assert "other limits" in caplog.text
+
+    def test_refund_on_failure(self):
+        """测试调用失败时退还预留的token"""
+        limiter = RateLimiter(tokens_per_minute=1000)
+        reservation = limiter.acquire(estimated_tokens=400)
+        limiter.refund(reservation)
+        assert limiter.token_bucket.available() == pytest.approx(1000, abs=5)
+        assert limiter.snapshot()["refunded_tokens"] == 400
+
+    def test_estimate_tokens(self):
+        """测试token估算"""
+        assert estimate_tokens("") == 0
+        assert estimate_tokens("这是一个测试") >= 6
+        assert estimate_tokens("hello world " * 10) > 0
+
+class TestAdaptiveConcurrency:
+    """测试自适应并发控制"""
+    
+    def test_limit_grows_with_stable_latency(self):
+        """测试延迟稳定时增加并发上限"""
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=1, max_limit=4)
+        for _ in range(10):
+            limiter.acquire()
+            limiter.release(0.01)
+        assert limiter.limit > 1
+        assert limiter.snapshot()["increases"] >= 1
+
+    def test_limit_cut_on_rate_limit(self):
+        """测试遇到429时削减并发上限"""
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=8, min_limit=1)
+        
+        def rate_limited():
+            raise APIError("Error code: 429 - Too Many Requests", error_code=ErrorCodes.RATE_LIMIT)
+        
+        with pytest.raises(APIError):
+            limiter.call(rate_limited)
+        snapshot = limiter.snapshot()
+        assert snapshot["limit"] == 4
+        assert snapshot["overloads"] == 1
+        assert snapshot["recent_decisions"][-1]["reason"] == "overload"
+        assert snapshot["inflight"] == 0
+
+    def test_other_errors_do_not_cut_limit(self):
+        """测试普通错误不影响并发上限"""
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=4)
+        with pytest.raises(ValueError):
+            limiter.call(lambda: (_ for _ in ()).throw(ValueError("bad json")))
+        assert limiter.limit == 4
+        assert limiter.snapshot()["errors"] == 1
+
+    def test_limit_bounds_inflight_requests(self):
+        """测试并发数不超过上限"""
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=2, max_limit=2)
+        
+        def work(_):
+            return limiter.call(time.sleep, 0.02)
+        
+        parallel_map(work, list(range(8)), max_workers=8)
+        assert limiter.snapshot()["max_inflight"] <= 2
+
+    def test_overload_classification(self):
+        """测试过载错误识别"""
+        assert is_overload_error(TimeoutError("Request timed out", error_code=ErrorCodes.TIMEOUT_ERROR))
+        assert is_overload_error(Exception("Error code: 429"))
+        assert not is_overload_error(ValueError("Invalid JSON"))
+
+class TestRetryPolicy:
+    """测试统一重试策略"""
+    
+    def test_retries_until_success(self):
+        """测试可重试错误最终成功"""
+        calls = []
+        
+        def flaky():
+            calls.append(1)
+            if len(calls) < 3:
+                raise APIError("Error code: 503", error_code=ErrorCodes.API_ERROR)
+            return "ok"
+        
+        policy = RetryPolicy(max_attempts=3, base_delay=0.001)
+        assert policy.execute(flaky) == "ok"
+        assert len(calls) == 3
+
+    def test_non_retryable_error_not_retried(self):
+        """测试不可重试错误立即抛出"""
+        calls = []
+        
+        def invalid():
+            calls.append(1)
+            raise APIError("Error code: 401", error_code=ErrorCodes.API_ERROR, details={"status_code": 401})
+        
+        with pytest.raises(APIError):
+            RetryPolicy(max_attempts=5, base_delay=0.001).execute(invalid)
+        assert len(calls) == 1
+
+    def test_exhausted(self):
+        """测试重试次数用尽"""
+        policy = RetryPolicy(max_attempts=2, base_delay=0.001)
+        with pytest.raises(RetryExhausted) as exc_info:
+            policy.execute(lambda: (_ for _ in ()).throw(APIError("boom")))
+        assert exc_info.value.attempts == 2
+        assert isinstance(exc_info.value.last_error, APIError)
+
+    def test_nested_policies_do_not_multiply(self):
+        """测试嵌套策略只有最外层重试"""
+        calls = []
+        inner = RetryPolicy(max_attempts=3, base_delay=0.001)
+        outer = RetryPolicy(max_attempts=3, base_delay=0.001)
+        
+        def provider_call():
+            calls.append(1)
+            raise APIError("Error code: 500")
+        
+        with pytest.raises(RetryExhausted):
+            outer.execute(lambda: inner.execute(provider_call))
+        assert len(calls) == 3
+
+    def test_retry_after_honored(self):
+        """测试遵守Retry-After"""
+        error = RateLimitError("Too Many Requests", details={"retry_after": 2.5})
+        assert get_retry_after(error) == 2.5
+        policy = RetryPolicy(base_delay=0.001, max_delay=0.001)
+        assert policy.compute_delay(1, error) == 2.5
+
+    def test_jittered_backoff_bounds(self):
+        """测试抖动退避范围"""
+        policy = RetryPolicy(base_delay=1.0, max_delay=3.0, multiplier=2.0)
+        for attempt in range(1, 6):
+            delay = policy.compute_delay(attempt)
+            assert 0 <= delay <= min(3.0, 2 ** (attempt - 1))
+
+    def test_budget_limits_retries(self):
+        """测试重试预算耗尽后停止重试"""
+        budget = RetryBudget(ratio=0.0, min_retries=1, window=60.0)
+        policy = RetryPolicy(max_attempts=5, base_delay=0.001, budget=budget)
+        calls = []
+        
+        def failing():
+            calls.append(1)
+            raise APIError("Error code: 503")
+        
+        with pytest.raises(APIError):
+            policy.execute(failing)
+        # One retry allowed by the budget, then the error propagates
+        assert len(calls) == 2
+
+    def test_classification(self):
+        """测试错误分类"""
+        assert is_retryable_error(RateLimitError("slow down"))
+        assert is_retryable_error(json.JSONDecodeError("bad", "{", 0))
+        assert not is_retryable_error(ValidationError("bad input"))
+        assert not is_retryable_error(ConfigurationError("missing key"))
+        assert not is_retryable_error(APIError("denied", details={"status_code": 403}))
+
+class TestDeadline:
+    """测试任务截止时间与超时传递"""
+    
+    def test_request_timeout_capped_by_deadline(self):
+        """测试单次请求超时不超过剩余截止时间"""
+        assert get_request_timeout(30) == 30
+        with deadline_scope(Deadline(5)):
+            assert get_request_timeout(30) <= 5
+            assert get_request_timeout(1) == 1
+        assert Deadline.current() is None
+    
+    def test_expired_deadline_not_retried(self):
+        """测试截止时间已过时不再调用"""
+        calls = []
+        with deadline_scope(Deadline(0)):
+            with pytest.raises(DeadlineExceeded):
+                RetryPolicy(max_attempts=3, base_delay=0.001).execute(lambda: calls.append(1))
+        assert calls == []
+        assert not is_retryable_error(DeadlineExceeded("expired", details={"retryable": False}))
+    
+    def test_retry_stops_when_deadline_too_short(self):
+        """测试剩余时间不足以再次尝试时停止重试"""
+        calls = []
+        
+        def slow_failure():
+            calls.append(1)
+            time.sleep(0.05)
+            raise APIError("Error code: 503", error_code=ErrorCodes.API_ERROR)
+        
+        policy = RetryPolicy(max_attempts=5, base_delay=0.001, jitter=False)
+        with deadline_scope(Deadline(0.08)):
+            with pytest.raises(APIError):
+                policy.execute(slow_failure)
+        assert len(calls) == 1
+    
+    def test_deadline_reaches_worker_threads(self):
+        """测试截止时间传递到工作线程"""
+        with deadline_scope(Deadline(10)) as deadline:
+            seen = parallel_map(lambda _: Deadline.current(), list(range(4)), max_workers=4)
+        assert all(item is deadline for item in seen)
+
+class TestJSONExtractor:
+    """测试JSON提取与截断修复"""
+    
+    def test_extract_from_prose_and_fence(self):
+        """测试从说明文字和代码块中提取"""
+        response = 'Note {this}.\n```json\n{"a": [1, {"b": "} ] {"}]}\n```\nDone {x}'
+        assert extract_json(response) == {"a": [1, {"b": "} ] {"}]}
+    
+    def test_plain_json(self):
+        """测试纯JSON"""
+        assert extract_json('{"questions": []}') == {"questions": []}
+    
+    def test_truncated_array_keeps_complete_items(self):
+        """测试截断的数组保留完整条目"""
+        response = '{"questions": [{"text": "q1", "keywords": ["a"]}, {"text": "q2", "keywords": ["b", "c'
+        assert extract_json(response) == {"questions": [{"text": "q1", "keywords": ["a"]}]}
+    
+    def test_truncated_nested_array(self):
+        """测试截断的嵌套数组"""
+        response = '{"answer": "x", "metadata": {"citations": [{"text": "a"}, {"te'
+        assert extract_json(response) == {"answer": "x", "metadata": {"citations": [{"text": "a"}]}}
+    
+    def test_truncated_array_of_arrays(self):
+        """测试截断的数组元素本身为数组时丢弃不完整元素"""
+        assert extract_json('{"a": [[1,2],[3,4],[5') == {"a": [[1, 2], [3, 4]]}
+        assert extract_json('{"a": [[1,2],[3,4],[') == {"a": [[1, 2], [3, 4]]}
+    
+    def test_repair_disabled(self):
+        """测试关闭修复时截断输出解析失败"""
+        with pytest.raises(json.JSONDecodeError):
+            extract_json('{"questions": [{"text": "q1"}, {"te', repair=False)
+    
+    def test_unrepairable(self):
+        """测试无法修复的输出"""
+        assert repair_truncated_json('{"answer": "cut off') is None
+        assert repair_truncated_json('{"complete": true}') is None
+        with pytest.raises(json.JSONDecodeError):
+            extract_json('{"answer": "cut off')
+    
+    def test_empty_response(self):
+        """测试空响应"""
+        with pytest.raises(GenerationError):
+            extract_json("   ")
+    
+    def test_large_response(self):
+        """测试大响应的截断修复"""
+        items = [{"text": f"question {i} {{braces}} \"quoted\"", "n": i} for i in range(2000)]
+        body = json.dumps({"questions": items})
+        result = extract_json("Here you go:\n" + body[:-40])
+        assert len(result["questions"]) == 1999
+        assert result["questions"][-1]["n"] == 1998
+
+class TestIncrementalArrayParser:
+    """测试流式数组解析"""
+    
+    def test_items_emitted_as_they_complete(self):
+        """测试逐字符输入时条目完成即返回"""
+        text = '```json\n{"questions": [{"text": "a \\" ] }", "k": [1]}, {"text": "b"}], "x": 1}'
+        parser = IncrementalArrayParser("questions")
+        emitted = []
+        for index, char in enumerate(text):
+            for item in parser.feed(char):
+                emitted.append((index, item))
+        assert [item for _, item in emitted] == [{"text": 'a " ] }', "k": [1]}, {"text": "b"}]
+        # The first item is available long before the response ends
+        assert emitted[0][0] < text.index('{"text": "b"}')
+        assert parser.finished
+    
+    def test_malformed_element_skipped(self):
+        """测试跳过格式错误的条目"""
+        parser = IncrementalArrayParser("questions")
+        assert parser.feed('{"questions": [{"text": bad}, {"text": "ok"}]}') == [{"text": "ok"}]
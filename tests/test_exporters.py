@@ -11,6 +11,7 @@ from textfission.exporters.base import (
     CSVExporter,
     TXTExporter
 )
+from textfission.core.exceptions import ExportError
 
 class TestJSONExporter:
     """测试JSON导出器"""
@@ -284,6 +285,28 @@ class TestDatasetExporter:
         finally:
             os.unlink(output_path)
 
+    def test_open_writer_matches_export(self):
+        """测试增量写入与一次性导出的文件内容一致"""
+        data = self.test_data + [{"text": "第二段", "question": "问题？", "answer": "答案", "confidence": 0.5}]
+        with tempfile.TemporaryDirectory() as temp_dir:
+            for format in ("json", "csv", "txt"):
+                exported = self.exporter.export(data, os.path.join(temp_dir, f"full.{format}"))
+                with self.exporter.open_writer(os.path.join(temp_dir, f"stream.{format}")) as writer:
+                    for record in data:
+                        writer.write(record)
+                assert writer.count == 2
+                with open(exported, encoding="utf-8") as a, open(writer.output_path, encoding="utf-8") as b:
+                    assert a.read() == b.read()
+            
+            # 未写入任何记录时仍是合法的JSON
+            with self.exporter.open_writer(os.path.join(temp_dir, "empty.json")) as writer:
+                pass
+            with open(writer.output_path, encoding="utf-8") as f:
+                assert json.load(f) == []
+            
+            with pytest.raises(ExportError):
+                self.exporter.open_writer(os.path.join(temp_dir, "data.xml"))
+
     def test_export_multiple_formats(self):
         """测试多格式导出"""
         with tempfile.TemporaryDirectory() as temp_dir:
@@ -0,0 +1,88 @@
+import pytest
+import json
+import time
+import openai
+
+from textfission.core.config import MockModelConfig
+from textfission.core.exceptions import ConfigurationError, TextFissionError, get_status_code
+from textfission.models.fake_server import FakeOpenAIServer
+from textfission.models.openai import OpenAIModel
+from textfission.processors.question_generator import QuestionGenerator
+from helpers import make_config
+
+CHUNK = (
+    "Python is a programming language created by Guido van Rossum. "
+    "It emphasizes code readability. Python supports multiple paradigms."
+)
+
+def make_model(base_url, retry_attempts=2):
+    return OpenAIModel(make_config(
+        api_key="test-fake-key",
+        model="gpt-4o-mini",
+        api_base_url=base_url,
+        processing=dict(retry_attempts=retry_attempts, retry_delay=0, retry_max_delay=0.01),
+        custom=dict(question_types=["factual"], min_questions_per_chunk=1, max_questions_per_chunk=2)
+    ))
+
+class TestFakeOpenAIServer:
+    """测试本地OpenAI兼容模拟服务"""
+
+    def test_chat_completion_over_http(self):
+        """测试通过真实HTTP客户端生成合法的问题JSON"""
+        with FakeOpenAIServer(MockModelConfig(latency="none")) as server:
+            model = make_model(server.base_url)
+            questions = QuestionGenerator(model.config).generate(CHUNK)
+            assert 1 <= len(questions) <= 2
+            assert server.stats()["statuses"] == {200: 1}
+
+    def test_streaming(self):
+        """测试SSE流式响应被客户端逐段解析"""
+        with FakeOpenAIServer(MockModelConfig(latency="none", stream_chunk_chars=8)) as server:
+            model = make_model(server.base_url)
+            prompt = QuestionGenerator(model.config).build_prompt(CHUNK)
+            deltas = list(model.generate_stream(prompt))
+            assert len(deltas) > 1
+            assert json.loads("".join(deltas))["questions"]
+            assert server.stats()["streams"] == 1
+
+    def test_embeddings(self):
+        """测试嵌入接口返回确定性的向量"""
+        with FakeOpenAIServer(MockModelConfig(latency="none"), embedding_dimension=64) as server:
+            model = make_model(server.base_url)
+            vectors = model.get_embeddings(["python language", "python language", "guido"])
+            assert [len(vector) for vector in vectors] == [64] * 3
+            assert vectors[0] == vectors[1] and vectors[0] != vectors[2]
+
+    def test_rate_limit_status_reaches_client(self):
+        """测试429带Retry-After，并经重试后以状态码报错"""
+        with FakeOpenAIServer(MockModelConfig(latency="none", rate_limit_rate=1.0, retry_after=0.01)) as server:
+            model = make_model(server.base_url, retry_attempts=1)
+            with pytest.raises(TextFissionError) as exc_info:
+                model.generate("Hello")
+            assert get_status_code(exc_info.value) == 429
+            assert set(server.stats()["statuses"]) == {429}
+
+    def test_scripted_profile_and_server_limits(self):
+        """测试按阶段切换的故障脚本与服务端限速"""
+        with FakeOpenAIServer(MockModelConfig(latency="none"), profile=[{"duration": 0.3, "error_rate": 1.0}]) as server:
+            # Without client retries, which would outlast the phase
+            client = openai.OpenAI(api_key="test-fake-key", base_url=server.base_url, max_retries=0)
+            messages = [{"role": "user", "content": "Hello"}]
+            assert server.phase() == 0
+            with pytest.raises(openai.InternalServerError) as exc_info:
+                client.chat.completions.create(model="gpt-4o-mini", messages=messages)
+            assert exc_info.value.status_code == 503
+            time.sleep(0.35)
+            assert server.phase() == -1
+            assert client.chat.completions.create(model="gpt-4o-mini", messages=messages).choices[0].message.content
+
+        with FakeOpenAIServer(MockModelConfig(latency="none"), requests_per_second=1) as server:
+            model = make_model(server.base_url, retry_attempts=1)
+            model.generate("Hello")
+            # The client waits out the Retry-After of the throttled request
+            assert model.generate("Hello again")
+            stats = server.stats()
+            assert stats["throttled"] >= 1 and stats["statuses"][429] == stats["throttled"]
+
+        with pytest.raises(ConfigurationError):
+            FakeOpenAIServer(profile=[{"duration": 1, "latency_men": 0.1}])
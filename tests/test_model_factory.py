@@ -1,10 +1,14 @@
 import pytest
 from unittest.mock import Mock, patch
-from textfission.core.config import Config, ModelConfig, ProcessingConfig, ExportConfig, CustomConfig
+from textfission.core.config import Config, ModelConfig, StageModelConfig, ProcessingConfig, ExportConfig, CustomConfig
 from textfission.models.factory import ModelFactory
 from textfission.models.openai import OpenAIModel
 from textfission.models.qianwen import QianwenModel
 from textfission.models.ernie import ErnieModel
+from textfission.models.failover import FailoverModel
+from textfission.processors.answer_generator import AnswerGenerator
+from helpers import make_config
+from textfission.core.exceptions import ModelError
 
 class TestModelFactory:
     """测试模型工厂"""
@@ -47,6 +51,29 @@ class TestModelFactory:
         assert model.model == "deepseek-chat"
         assert model.api_base_url == "https://api.deepseek.com/v1"
 
+    def test_create_stage_model(self):
+        """测试按处理阶段创建模型"""
+        config = self.config.model_copy(update={
+            "answer_model_settings": StageModelConfig(model="qwen-max", api_key="test-qwen-key")
+        })
+        
+        answer_model = ModelFactory.create_model(config, stage="answer")
+        assert isinstance(answer_model, QianwenModel)
+        assert answer_model.model == "qwen-max"
+        assert isinstance(ModelFactory.create_model(config, stage="question"), OpenAIModel)
+
+    def test_stage_model_overrides_pool_lists(self):
+        """测试阶段级model与api_key覆盖全局models与api_keys"""
+        config = self.config.model_copy(update={
+            "model_settings": self.config.model_settings.model_copy(update={
+                "models": ["gpt-4o", "gpt-4o-mini"], "api_keys": ["key-a", "key-b"]
+            }),
+            "answer_model_settings": StageModelConfig(model="qwen-max", api_key="test-qwen-key")
+        })
+
+        generator = AnswerGenerator(config)
+        assert [(m.model, m.api_key) for m in generator.models] == [("qwen-max", "test-qwen-key")]
+
     def test_create_qianwen_model(self):
         """测试创建通义千问模型"""
         config = Config(
@@ -128,4 +155,38 @@ class TestModelFactory:
     def test_unsupported_model_type(self):
         """测试不支持的模型类型"""
         with pytest.raises(Exception):
-            ModelFactory.create_model(self.config, "unsupported_type") 
\ No newline at end of file
+            ModelFactory.create_model(self.config, "unsupported_type") 
+
+
+class TestFailoverChain:
+    """测试故障切换链"""
+    
+    def test_failover_to_next_backend(self):
+        """测试主模型熔断后请求直接转到下一个后端"""
+        config = make_config(
+            api_key="test-deepseek-key",
+            model="deepseek-chat",
+            api_base_url="https://api.deepseek.com/v1",
+            circuit_failure_threshold=1,
+            failover=[StageModelConfig(model="gpt-4o-mini", api_key="test-openai-key")],
+            processing=dict(retry_attempts=1)
+        )
+        model = ModelFactory.create_model(config)
+        assert isinstance(model, FailoverModel)
+        primary, backup = model.models
+        assert backup.model == "gpt-4o-mini"
+        assert backup.api_base_url is None
+        assert backup.circuit_breaker is not None
+        
+        primary.client.chat.completions.create = Mock(side_effect=Exception("Error code: 503 - service unavailable"))
+        response = Mock()
+        response.choices = [Mock(message=Mock(content="from backup"))]
+        backup.client.chat.completions.create = Mock(return_value=response)
+        
+        with pytest.raises(ModelError):
+            model.generate("Test prompt")
+        assert model.generate("Test prompt") == "from backup"
+        assert primary.client.chat.completions.create.call_count == 1
+        snapshot = model.snapshot()
+        assert snapshot["failovers"] == 1
+        assert [b["state"] for b in snapshot["backends"]] == ["open", "closed"]
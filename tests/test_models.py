@@ -1,10 +1,32 @@
 import pytest
+import os
+import json
+import random
 import tempfile
+import threading
+import time
+import numpy as np
 from unittest.mock import Mock, patch
-from textfission.core.config import Config, ModelConfig, ProcessingConfig, ExportConfig, CustomConfig
+from concurrent.futures import ThreadPoolExecutor
+from textfission import create_dataset
+from textfission.core.config import Config, ModelConfig, ProcessingConfig, ExportConfig, CustomConfig, MockModelConfig
+from helpers import make_config
 from textfission.models.openai import OpenAIModel
 from textfission.models.ernie import ErnieModel
 from textfission.models.qianwen import QianwenModel
+from textfission.models.pool import ModelPool
+from textfission.models.embeddings import EmbeddingService
+from textfission.models.local import LocalEmbeddingModel
+from textfission.models.mock import MockModel
+from textfission.models.cassette import Cassette, RecordingModel, ReplayModel
+from textfission.models.factory import ModelFactory
+from textfission.models.clients import ClientRegistry
+from textfission.core.exceptions import Deadline, deadline_scope, cancellation_scope, CallCancelled, CircuitOpenError
+from textfission.core.circuit_breaker import CircuitBreaker
+from textfission.processors.answer_generator import AnswerGenerator
+from textfission.processors.question_generator import QuestionGenerator
+from textfission.core.json_extractor import extract_json
+from textfission.core.exceptions import GenerationError, ModelError, TextFissionError, get_status_code
 
 class TestOpenAIModel:
     """测试OpenAI模型"""
@@ -240,4 +262,757 @@ class TestModelIntegration:
             assert hasattr(model, 'generate')
             assert hasattr(model, 'get_embedding')
             assert hasattr(model, 'count_tokens')
-            assert hasattr(model, 'get_model_info') 
\ No newline at end of file
+            assert hasattr(model, 'get_model_info') 
+class TestModelRateLimiting:
+    """测试模型限流"""
+    
+    def test_models_share_rate_limiter(self):
+        """测试相同密钥与模型的实例共享限流器并按实际用量校正"""
+        config = make_config(
+            api_key="test-rate-limit-key",
+            model="gpt-4o-mini",
+            max_tokens=100,
+            requests_per_minute=600,
+            tokens_per_minute=10000
+        )
+        first = OpenAIModel(config)
+        second = OpenAIModel(config)
+        assert first.rate_limiter is not None
+        assert first.rate_limiter is second.rate_limiter
+        
+        mock_response = Mock()
+        mock_response.choices = [Mock(message=Mock(content="ok"))]
+        mock_response.usage = Mock(total_tokens=42)
+        first.client.chat.completions.create = Mock(return_value=mock_response)
+        
+        assert first.generate("Test prompt") == "ok"
+        snapshot = first.rate_limiter.snapshot()
+        assert snapshot["requests"] == 1
+        assert snapshot["actual_tokens"] == 42
+
+    def test_no_limits_configured(self):
+        """测试未配置限流时不创建限流器"""
+        config = make_config(api_key="test-key")
+        assert OpenAIModel(config).rate_limiter is None
+
+    def test_adaptive_concurrency_limiter_attached(self):
+        """测试启用自适应并发时挂载共享限流器"""
+        config = make_config(
+            api_key="test-adaptive-key",
+            model="gpt-4o-mini",
+            processing=dict(adaptive_concurrency=True, max_workers=3, max_concurrency=10)
+        )
+        first = OpenAIModel(config)
+        assert first.concurrency_limiter is not None
+        assert first.concurrency_limiter is OpenAIModel(config).concurrency_limiter
+        assert first.concurrency_limiter.limit == 3
+        assert first.concurrency_limiter.max_limit == 10
+
+class TestStructuredOutput:
+    """测试结构化输出"""
+    
+    def setup_method(self):
+        self.config = make_config(api_key="test-json-key", model="gpt-4o-mini", processing=dict(retry_delay=0))
+        self.model = OpenAIModel(self.config)
+    
+    def test_json_schema_response_format(self):
+        """测试传递JSON schema响应格式"""
+        self.model.client.chat.completions.create = Mock(
+            return_value=Mock(choices=[Mock(message=Mock(content='{"answer": "ok"}'))])
+        )
+        schema = {"type": "object", "properties": {"answer": {"type": "string"}}}
+        
+        assert self.model.generate_json("Test prompt", schema=schema, schema_name="answer") == '{"answer": "ok"}'
+        response_format = self.model.client.chat.completions.create.call_args.kwargs["response_format"]
+        assert response_format["type"] == "json_schema"
+        assert response_format["json_schema"]["name"] == "answer"
+        assert response_format["json_schema"]["schema"] == schema
+    
+    def test_json_object_mode(self):
+        """测试JSON对象模式"""
+        self.model.client.chat.completions.create = Mock(
+            return_value=Mock(choices=[Mock(message=Mock(content="{}"))])
+        )
+        self.model.generate_json("Return JSON", mode="json_object")
+        response_format = self.model.client.chat.completions.create.call_args.kwargs["response_format"]
+        assert response_format == {"type": "json_object"}
+    
+    def test_fallback_when_rejected(self):
+        """测试端点不支持时回退到普通生成"""
+        rejected = Exception("response_format is not supported")
+        rejected.status_code = 400
+        self.model.client.chat.completions.create = Mock(side_effect=[
+            rejected,
+            Mock(choices=[Mock(message=Mock(content="plain"))])
+        ])
+        
+        assert self.model.generate_json("Test prompt", schema={}) == "plain"
+        assert self.model.structured_output is False
+        assert "response_format" not in self.model.client.chat.completions.create.call_args.kwargs
+
+class TestStreaming:
+    """测试流式生成"""
+    
+    def test_openai_stream_yields_deltas(self):
+        """测试OpenAI流式输出增量文本"""
+        config = make_config(api_key="test-stream-key", model="gpt-4o-mini")
+        model = OpenAIModel(config)
+        events = [Mock(choices=[Mock(delta=Mock(content=part))]) for part in ("Hel", "lo", None)]
+        events.append(Mock(choices=[]))
+        model.client.chat.completions.create = Mock(return_value=events)
+        
+        assert list(model.generate_stream("Test prompt")) == ["Hel", "lo"]
+        assert model.client.chat.completions.create.call_args.kwargs["stream"] is True
+    
+    def test_openai_stream_retry_reserves_per_attempt(self):
+        """测试流式请求每次重试单独占用并退还限流容量"""
+        config = make_config(
+            api_key="test-stream-retry-key",
+            model="gpt-4o-mini",
+            max_tokens=100,
+            requests_per_minute=600,
+            tokens_per_minute=10000,
+            processing=dict(retry_attempts=2, retry_delay=0)
+        )
+        model = OpenAIModel(config)
+        model.client.chat.completions.create = Mock(side_effect=[
+            Exception("API Error"),
+            [Mock(choices=[Mock(delta=Mock(content="ok"))])]
+        ])
+        
+        assert list(model.generate_stream("Test prompt")) == ["ok"]
+        snapshot = model.rate_limiter.snapshot()
+        assert snapshot["requests"] == 2
+        assert snapshot["refunded_tokens"] == snapshot["estimated_tokens"] / 2
+
+class TestModelPool:
+    """测试模型池负载均衡"""
+    
+    def _models(self, n):
+        return [Mock(model=f"m{i}", provider="mock", rate_limiter=None) for i in range(n)]
+    
+    def test_round_robin(self):
+        """测试轮询分配"""
+        pool = ModelPool(self._models(3), strategy="round_robin")
+        used = [pool.call(lambda model: model.model) for _ in range(6)]
+        assert used == ["m0", "m1", "m2", "m0", "m1", "m2"]
+    
+    def test_least_outstanding(self):
+        """测试选择未完成请求最少的成员"""
+        pool = ModelPool(self._models(2))
+        busy = pool.acquire()
+        assert pool.acquire() is not busy
+    
+    def test_unhealthy_member_ejected(self):
+        """测试连续失败的成员被摘除并在冷却后恢复"""
+        pool = ModelPool(self._models(2), strategy="round_robin", failure_threshold=2, ejection_seconds=0.05)
+        
+        def call(model):
+            if model.model == "m0":
+                raise ModelError("down")
+            return model.model
+        
+        results = []
+        for _ in range(6):
+            try:
+                results.append(pool.call(call))
+            except ModelError:
+                results.append("error")
+        assert results.count("error") == 2
+        assert results[-2:] == ["m1", "m1"]
+        assert pool.snapshot()["mock:m0#0"]["ejections"] == 1
+        
+        time.sleep(0.06)
+        assert pool.snapshot()["mock:m0#0"]["healthy"]
+    
+    def _calibrated_pool(self, n=2, **kwargs):
+        pool = ModelPool(self._models(n), strategy="round_robin", hedge_percentile=90, hedge_min_samples=5, **kwargs)
+        for _ in range(10):
+            pool.call(lambda model: time.sleep(0.005))
+        return pool
+    
+    def test_slow_call_hedged(self):
+        """测试慢请求被对冲到其他成员，先返回的结果胜出"""
+        pool = self._calibrated_pool(hedge_budget_ratio=1.0)
+        assert pool.hedge_delay() is not None
+        
+        def call(model):
+            time.sleep(1.0 if model.model == "m0" else 0.005)
+            return model.model
+        
+        start = time.perf_counter()
+        result = pool.call(call)
+        assert time.perf_counter() - start < 0.5
+        assert result == "m1"
+        stats = pool.stats()
+        assert stats["hedges"] == 1
+        assert stats["hedge_wins"] == 1
+        assert pool.snapshot()["mock:m0#0"]["abandoned"] == 1
+    
+    def test_abandoned_attempts_bound_hedging(self):
+        """测试被放弃的慢请求达到上限时不再对冲"""
+        pool = self._calibrated_pool(hedge_budget_ratio=1.0, max_abandoned=1)
+        release = threading.Event()
+        
+        def call(model):
+            if model.model == "m0":
+                release.wait(timeout=5)
+            else:
+                time.sleep(0.005)
+            return model.model
+        
+        assert pool.call(call) == "m1"
+        assert pool.stats()["abandoned_running"] == 1
+        # The next call starts on m0 again and may not hedge while the first loser still runs
+        pool.call(lambda model: time.sleep(0.1) or model.model)
+        assert pool.stats()["hedges_denied"] == 1
+        release.set()
+        time.sleep(0.05)
+        assert pool.stats()["abandoned_running"] == 0
+    
+    def test_invalid_replies_do_not_eject(self):
+        """测试回复校验失败不计入成员摘除"""
+        pool = ModelPool(self._models(1), failure_threshold=2)
+        for _ in range(3):
+            with pytest.raises(GenerationError):
+                pool.call(Mock(side_effect=GenerationError("invalid answer")))
+        snapshot = pool.snapshot()["mock:m0#0"]
+        assert snapshot["ejections"] == 0
+        assert snapshot["failures"] == 3
+    
+    def test_failed_hedge_falls_back_to_primary(self):
+        """测试对冲请求失败时等待原请求"""
+        pool = self._calibrated_pool(hedge_budget_ratio=1.0)
+        
+        def call(model):
+            if model.model == "m1":
+                raise ModelError("invalid")
+            time.sleep(0.1)
+            return model.model
+        
+        assert pool.call(call) == "m0"
+        assert pool.stats()["hedge_wins"] == 0
+    
+    def test_hedge_budget(self):
+        """测试对冲次数受预算限制"""
+        pool = self._calibrated_pool(hedge_budget_ratio=0.0)
+        assert pool.call(lambda model: time.sleep(0.05) or model.model) == "m0"
+        stats = pool.stats()
+        assert stats["hedges"] == 0
+        assert stats["hedges_denied"] == 1
+    
+    def test_hedging_disabled_by_default(self):
+        """测试默认不对冲"""
+        pool = ModelPool(self._models(2))
+        for _ in range(30):
+            pool.call(lambda model: None)
+        assert pool.hedge_delay() is None
+    
+    def test_answer_generator_builds_member_per_key_and_model(self):
+        """测试答案生成器为每个密钥和模型创建独立客户端"""
+        config = make_config(
+            api_key="test-pool-key",
+            api_keys=["test-pool-key-1", "test-pool-key-2"],
+            models=["gpt-4o-mini", "gpt-4o"],
+            processing=dict(max_workers=2)
+        )
+        generator = AnswerGenerator(config)
+        pairs = {(model.api_key, model.model) for model in generator.models}
+        assert pairs == {
+            ("test-pool-key-1", "gpt-4o-mini"), ("test-pool-key-1", "gpt-4o"),
+            ("test-pool-key-2", "gpt-4o-mini"), ("test-pool-key-2", "gpt-4o")
+        }
+        assert len(generator.pool) == 4
+        assert generator.worker_count == 8
+
+class TestPerInstanceCredentials:
+    """测试实例级凭证，多密钥并发调用互不干扰"""
+    
+    def _config(self, api_key, model):
+        return make_config(api_key=api_key, model=model)
+    
+    def _run_concurrently(self, models, rounds=20):
+        barrier = threading.Barrier(len(models))
+        
+        def worker(model):
+            barrier.wait()
+            return [model.generate(f"prompt for {model.api_key}") for _ in range(rounds)]
+        
+        with ThreadPoolExecutor(max_workers=len(models)) as executor:
+            return list(executor.map(worker, models))
+    
+    def test_qianwen_keys_isolated(self):
+        """测试通义千问多实例并发时使用各自的密钥"""
+        def fake_call(model, api_key=None, messages=None, **kwargs):
+            time.sleep(0.001)
+            response = Mock(status_code=200)
+            response.output.choices = [Mock(message=Mock(content=api_key))]
+            return response
+        
+        with patch('dashscope.Generation.call', side_effect=fake_call):
+            models = [QianwenModel(self._config(f"qwen-key-{i}", "qwen-turbo")) for i in range(4)]
+            results = self._run_concurrently(models)
+        
+        for model, outputs in zip(models, results):
+            assert set(outputs) == {model.api_key}
+        assert "DASHSCOPE_API_KEY" not in os.environ or os.environ["DASHSCOPE_API_KEY"] not in {m.api_key for m in models}
+    
+    def test_ernie_keys_isolated(self):
+        """测试文心一言多实例并发时使用各自的凭证"""
+        def fake_create(model, messages, _config_=None, **kwargs):
+            time.sleep(0.001)
+            response = Mock()
+            response.get_result.return_value = _config_["access_token"]
+            return response
+        
+        with patch('erniebot.ChatCompletion.create', side_effect=fake_create):
+            models = [ErnieModel(self._config(f"ernie-key-{i}", "ernie-bot")) for i in range(4)]
+            results = self._run_concurrently(models)
+        
+        for model, outputs in zip(models, results):
+            assert set(outputs) == {model.api_key}
+
+class TestClientRegistry:
+    """测试共享客户端与连接池"""
+    
+    def _config(self, api_key="test-key", base_url=None, **settings):
+        return make_config(
+            api_key=api_key,
+            model="gpt-4o-mini",
+            api_base_url=base_url,
+            processing=dict(max_workers=4),
+            **settings
+        )
+    
+    def test_clients_shared_per_key_and_base_url(self):
+        """测试相同密钥与地址复用客户端，不同则隔离"""
+        first = OpenAIModel(self._config())
+        assert OpenAIModel(self._config()).client is first.client
+        assert OpenAIModel(self._config(api_key="other-key")).client is not first.client
+        assert OpenAIModel(self._config(base_url="http://localhost:8000/v1")).client is not first.client
+        
+        snapshot = ClientRegistry.get_instance().snapshot()
+        assert snapshot["reused"] >= 1
+        assert len(snapshot["clients"]) == 3
+        assert "test-key" not in " ".join(snapshot["clients"])
+    
+    def test_pool_sized_from_settings(self):
+        """测试连接池大小与保活时间可配置"""
+        OpenAIModel(self._config(http_max_keepalive_connections=64, http_keepalive_expiry=5.0))
+        settings = next(iter(ClientRegistry.get_instance().snapshot()["clients"].values()))
+        assert settings == {"max_connections": 100, "max_keepalive_connections": 64, "keepalive_expiry": 5.0}
+    
+    def test_clear_creates_new_client(self):
+        """测试清空注册表后重新创建客户端"""
+        first = OpenAIModel(self._config())
+        ClientRegistry.get_instance().clear()
+        assert OpenAIModel(self._config()).client is not first.client
+
+class TestRequestTimeouts:
+    """测试请求超时传递到客户端"""
+    
+    def test_openai_timeout_from_config_and_deadline(self):
+        """测试OpenAI请求使用配置超时并受截止时间限制"""
+        config = make_config(api_key="test-key", processing=dict(request_timeout=20))
+        model = OpenAIModel(config)
+        mock_response = Mock()
+        mock_response.choices = [Mock(message=Mock(content="ok"))]
+        model.client.chat.completions.create = Mock(return_value=mock_response)
+        
+        model.generate("Test prompt")
+        assert model.client.chat.completions.create.call_args.kwargs["timeout"] == 20
+        
+        with deadline_scope(Deadline(2)):
+            model.generate("Test prompt")
+        assert model.client.chat.completions.create.call_args.kwargs["timeout"] <= 2
+        
+        model.generate_with_custom_params("Test prompt", timeout=90)
+        assert model.client.chat.completions.create.call_args.kwargs["timeout"] == 90
+    
+    def test_request_timeout_is_opt_in(self):
+        """测试未配置request_timeout时不向客户端传递超时"""
+        model = OpenAIModel(make_config(api_key="test-key"))
+        mock_response = Mock()
+        mock_response.choices = [Mock(message=Mock(content="ok"))]
+        model.client.chat.completions.create = Mock(return_value=mock_response)
+        
+        model.generate("Test prompt")
+        assert model.client.chat.completions.create.call_args.kwargs["timeout"] is None
+
+class TestCircuitBreaker:
+    """测试熔断器"""
+    
+    def test_opens_and_recovers(self):
+        """测试连续失败后熔断，冷却后探测成功恢复"""
+        breaker = CircuitBreaker("mock:m", failure_threshold=2, recovery_seconds=0.05)
+        
+        def fail():
+            raise ModelError("Error code: 503")
+        
+        for _ in range(2):
+            with pytest.raises(ModelError):
+                breaker.call(fail)
+        assert breaker.state == CircuitBreaker.OPEN
+        with pytest.raises(CircuitOpenError):
+            breaker.call(lambda: "ok")
+        
+        time.sleep(0.06)
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+        assert breaker.call(lambda: "ok") == "ok"
+        assert breaker.state == CircuitBreaker.CLOSED
+        snapshot = breaker.snapshot()
+        assert snapshot["opened"] == 1 and snapshot["rejected"] == 1
+        assert [t["to"] for t in snapshot["recent_transitions"]] == ["open", "half_open", "closed"]
+    
+    def test_client_errors_do_not_trip(self):
+        """测试请求本身无效的错误不计入熔断"""
+        breaker = CircuitBreaker("mock:m", failure_threshold=1)
+        
+        def bad_request():
+            raise ModelError("Error code: 400", details={"status_code": 400})
+        
+        with pytest.raises(ModelError):
+            breaker.call(bad_request)
+        assert breaker.state == CircuitBreaker.CLOSED
+    
+    def test_open_circuit_skips_retries(self):
+        """测试熔断后模型调用立即失败而不再重试"""
+        config = make_config(
+            api_key="test-key",
+            circuit_breaker=True,
+            circuit_failure_threshold=2,
+            processing=dict(retry_attempts=5, retry_delay=0)
+        )
+        model = OpenAIModel(config)
+        model.client.chat.completions.create = Mock(side_effect=Exception("Error code: 503 - service unavailable"))
+        
+        with pytest.raises(CircuitOpenError):
+            model.generate("Test prompt")
+        # The breaker opened after the second attempt; the third was rejected without a request
+        assert model.client.chat.completions.create.call_count == 2
+
+class TestEmbeddingService:
+    """测试批量缓存的嵌入服务"""
+    
+    def _model(self, batch_size=2):
+        config = make_config(api_key="test-key", embedding_batch_size=batch_size, processing=dict(max_workers=2))
+        model = OpenAIModel(config)
+        
+        def create(model, input, timeout=None):
+            return Mock(data=[Mock(embedding=[float(len(text)), float(ord(text[0])), 1.0]) for text in input], usage=None)
+        
+        model.client.embeddings.create = Mock(side_effect=create)
+        return config, model
+    
+    def test_dedup_batches_and_matrix(self):
+        """测试输入去重、按批次请求并返回float32矩阵"""
+        config, model = self._model(batch_size=2)
+        service = EmbeddingService(config, model=model)
+        texts = ["alpha", "beta", "alpha", "gamma", "delta", "beta"]
+        
+        matrix = service.embed(texts)
+        assert matrix.dtype == np.float32 and matrix.shape == (6, 3)
+        assert matrix.flags["C_CONTIGUOUS"]
+        assert matrix[0].tolist() == [5.0, float(ord("a")), 1.0]
+        assert np.array_equal(matrix[0], matrix[2]) and np.array_equal(matrix[1], matrix[5])
+        # Four unique texts in batches of two
+        assert model.client.embeddings.create.call_count == 2
+        assert all(len(call.kwargs["input"]) <= 2 for call in model.client.embeddings.create.call_args_list)
+        
+        service.embed(["gamma", "alpha"])
+        assert model.client.embeddings.create.call_count == 2
+        stats = service.get_stats()
+        assert stats["unique"] == 6 and stats["cache_hits"] == 2 and stats["embedded"] == 4
+    
+    def test_disk_cache_shared_across_services(self, tmp_path):
+        """测试向量写入磁盘缓存，新的服务实例无需再次请求"""
+        config, model = self._model()
+        config.processing_config.embedding_cache_dir = str(tmp_path)
+        EmbeddingService(config, model=model).embed(["alpha", "beta"])
+        
+        _, fresh_model = self._model()
+        matrix = EmbeddingService(config, model=fresh_model).embed(["beta", "alpha"])
+        assert fresh_model.client.embeddings.create.call_count == 0
+        assert matrix[:, 0].tolist() == [4.0, 5.0]
+    
+    def test_batch_size_capped_by_provider(self):
+        """测试批大小不超过服务商上限"""
+        config = make_config(api_key="test-key", model="qwen-turbo", embedding_batch_size=1000)
+        assert QianwenModel(config).embedding_batch_size == QianwenModel.max_embedding_batch
+    
+    @patch('dashscope.TextEmbedding.call')
+    def test_qianwen_batch_in_input_order(self, mock_call):
+        """测试通义千问批量向量按输入顺序返回"""
+        config = make_config(api_key="test-key", model="qwen-turbo")
+        mock_call.return_value = Mock(
+            status_code=200,
+            output=Mock(embeddings=[Mock(text_index=1, embedding=[2.0]), Mock(text_index=0, embedding=[1.0])]),
+            usage=None
+        )
+        assert QianwenModel(config).get_embeddings(["a", "b"]) == [[1.0], [2.0]]
+        assert mock_call.call_args.kwargs["input"] == ["a", "b"]
+
+class TestLocalEmbeddingModel:
+    """测试本地词法向量后端"""
+    
+    def setup_method(self):
+        self.config = make_config(api_key="", model="lexical-hash", embedding_provider="local", embedding_dimension=128)
+        self.model = ModelFactory.create_model(self.config)
+    
+    def test_registered_with_factory(self):
+        """测试本地后端已注册并可按类型创建"""
+        assert isinstance(self.model, LocalEmbeddingModel)
+        assert isinstance(ModelFactory.create_model(self.config, model_type="local"), LocalEmbeddingModel)
+        with pytest.raises(ModelError):
+            self.model.generate("Test prompt")
+    
+    def test_near_duplicates_latin_and_cjk(self):
+        """测试拉丁文与中日韩文本的近重复文本相似度更高"""
+        matrix = self.model.embed([
+            "The quick brown fox jumps over the lazy dog",
+            "The quick brown foxes jumped over the lazy dogs",
+            "Interest rates were raised by the central bank",
+            "机器学习是人工智能的一个分支",
+            "机器学习是人工智能的重要分支",
+            "今天的天气非常好"
+        ])
+        assert matrix.shape == (6, 128) and matrix.dtype == np.float32
+        assert np.allclose(np.linalg.norm(matrix, axis=1), 1.0, atol=1e-5)
+        similarity = matrix @ matrix.T
+        assert similarity[0, 1] > similarity[0, 2] + 0.3
+        assert similarity[3, 4] > similarity[3, 5] + 0.3
+        # Deterministic across instances
+        assert np.array_equal(matrix[0], LocalEmbeddingModel(self.config).embed(["The quick brown fox jumps over the lazy dog"])[0])
+    
+    def test_sparse_features_and_idf(self):
+        """测试稀疏CSR输出以及IDF拟合"""
+        texts = ["common words here", "common words there", ""]
+        data, indices, indptr = self.model.sparse_features(texts)
+        assert len(indptr) == 4 and indptr[-1] == len(indices) == len(data)
+        assert indptr[3] == indptr[2]
+        assert np.all(indices < self.model.n_features)
+        
+        name = self.model.embedding_model
+        before = self.model.sparse_features(texts[:1])[0]
+        self.model.fit(texts)
+        assert self.model.embedding_model != name
+        assert not np.allclose(before, self.model.sparse_features(texts[:1])[0])
+    
+    def test_embedding_service_uses_local_backend(self):
+        """测试嵌入服务按embedding_provider使用本地后端"""
+        service = EmbeddingService(self.config)
+        matrix = service.embed(["alpha beta", "gamma delta", "alpha beta"])
+        assert isinstance(service.model, LocalEmbeddingModel)
+        assert matrix.shape == (3, 128) and np.array_equal(matrix[0], matrix[2])
+
+class TestMockModel:
+    """测试离线压测用的模拟模型"""
+    
+    CHUNK = (
+        "Python is a programming language created by Guido van Rossum. "
+        "It emphasizes code readability. Python supports multiple paradigms."
+    )
+    
+    def _config(self, **mock):
+        return make_config(
+            api_key="test-key",
+            model="mock",
+            mock=MockModelConfig(**mock),
+            processing=dict(retry_attempts=2, retry_delay=0, retry_max_delay=0.01),
+            custom=dict(question_types=["factual", "conceptual"], min_questions_per_chunk=2, max_questions_per_chunk=3)
+        )
+    
+    def test_valid_questions_and_answers(self):
+        """测试生成的问题和答案能通过生成器校验"""
+        config = self._config(latency="none")
+        assert isinstance(ModelFactory.create_model(config), MockModel)
+        questions = QuestionGenerator(config).generate(self.CHUNK)
+        assert 2 <= len(questions) <= 3
+        assert {q["type"] for q in questions} <= {"factual", "conceptual"}
+        
+        answer = AnswerGenerator(config).generate(self.CHUNK, "Who created the Python programming language?")
+        assert answer["answer"] == "Python is a programming language created by Guido van Rossum."
+        assert answer["metadata"]["citations"]
+    
+    def test_deterministic_per_seed(self):
+        """测试相同种子的响应与延迟可复现"""
+        prompt = QuestionGenerator(self._config()).build_prompt(self.CHUNK)
+        first, second, other = (MockModel(self._config(latency="none", seed=seed)) for seed in (1, 1, 2))
+        assert [first.generate(prompt) for _ in range(3)] == [second.generate(prompt) for _ in range(3)]
+        
+        latencies = [MockModel(self._config(seed=seed)).sample_latency(random.Random(seed)) for seed in (1, 1, 2)]
+        assert latencies[0] == latencies[1] != latencies[2]
+    
+    def test_latency_distribution(self):
+        """测试延迟分布的均值与配置一致"""
+        model = MockModel(self._config(latency="lognormal", latency_mean=0.2, latency_sigma=0.5))
+        rng = random.Random(0)
+        samples = [model.sample_latency(rng) for _ in range(4000)]
+        assert abs(sum(samples) / len(samples) - 0.2) < 0.02
+        
+        start = time.perf_counter()
+        MockModel(self._config(latency="fixed", latency_mean=0.05)).generate("Hello")
+        assert time.perf_counter() - start >= 0.05
+    
+    def test_rate_limits_are_retried(self):
+        """测试注入的429错误走重试策略并带有状态码"""
+        model = MockModel(self._config(latency="none", rate_limit_rate=1.0, retry_after=0.01))
+        with pytest.raises(TextFissionError) as exc_info:
+            model.generate("Hello")
+        assert get_status_code(exc_info.value) == 429
+        assert model.snapshot()["rate_limited"] == 2
+    
+    def test_stream_and_embeddings_are_retried(self):
+        """测试流式与嵌入请求同样经过重试与限流"""
+        model = MockModel(self._config(latency="none", rate_limit_rate=1.0, retry_after=0.01))
+        with pytest.raises(TextFissionError):
+            list(model.generate_stream("Hello"))
+        with pytest.raises(TextFissionError) as exc_info:
+            model.get_embeddings(["Hello"])
+        assert get_status_code(exc_info.value) == 429
+        assert model.snapshot()["rate_limited"] == 4
+        
+        config = self._config(latency="none")
+        config.model_settings.requests_per_minute = 600
+        model = MockModel(config)
+        assert "".join(model.generate_stream("Hello"))
+        assert model.get_embeddings(["Hello"]).shape[0] == 1
+        assert model.rate_limiter.snapshot()["requests"] == 2
+    
+    def test_cancelled_request_aborts_in_flight(self):
+        """测试取消后进行中的请求立即中止"""
+        model = MockModel(self._config(latency="fixed", latency_mean=5.0))
+        cancelled = threading.Event()
+        threading.Timer(0.05, cancelled.set).start()
+        start = time.perf_counter()
+        with cancellation_scope(cancelled), pytest.raises(CallCancelled):
+            model.generate("Hello")
+        assert time.perf_counter() - start < 1.0
+        assert model.snapshot()["requests"] == 1
+    
+    def test_send_counts_are_bounded(self, monkeypatch):
+        """测试按提示词记录的发送次数有上限"""
+        monkeypatch.setattr("textfission.models.mock._MAX_TRACKED_PROMPTS", 3)
+        model = MockModel(self._config(latency="none"))
+        for i in range(5):
+            model.generate(f"Hello {i}")
+        assert len(model._sends) == 3
+    
+    def test_truncated_and_malformed_outputs(self):
+        """测试截断与格式错误的输出"""
+        prompt = QuestionGenerator(self._config()).build_prompt(self.CHUNK)
+        clean = MockModel(self._config(latency="none")).generate(prompt)
+        truncated = MockModel(self._config(latency="none", truncation_rate=1.0)).generate(prompt)
+        assert clean.startswith(truncated) and len(truncated) < len(clean)
+        
+        malformed = MockModel(self._config(latency="none", malformed_rate=1.0)).generate(prompt)
+        with pytest.raises(json.JSONDecodeError):
+            extract_json(malformed)
+    
+    def test_create_dataset_with_injected_faults(self, tmp_path):
+        """测试在注入故障的情况下完整生成数据集"""
+        config = self._config(latency="exponential", latency_mean=0.005, error_rate=0.1, rate_limit_rate=0.1, malformed_rate=0.1, retry_after=0.01)
+        config.processing_config.retry_attempts = 6
+        config.processing_config.min_chars = 10
+        config.custom_config.min_questions_per_chunk = 1
+        output = create_dataset(self.CHUNK * 3, config, str(tmp_path / "dataset.json"), show_progress=False)
+        with open(output, encoding="utf-8") as f:
+            assert len(json.load(f)) >= 1
+
+class TestCassette:
+    """测试录制与回放模型调用"""
+    
+    def _config(self, path, mode="record", **mock):
+        return make_config(
+            api_key="test-key",
+            model="mock",
+            cassette=str(path),
+            cassette_mode=mode,
+            mock=MockModelConfig(latency="none", **mock),
+            processing=dict(retry_attempts=1, retry_delay=0),
+            custom=dict(question_types=["factual"])
+        )
+    
+    def test_record_and_replay(self, tmp_path):
+        """测试录制的响应、流和向量按顺序回放"""
+        path = tmp_path / "run.cassette"
+        recorder = ModelFactory.create_model(self._config(path))
+        assert isinstance(recorder, RecordingModel)
+        first, second = recorder.generate("Hello"), recorder.generate("Hello")
+        structured = recorder.generate_json("Hi", schema={"type": "object"})
+        streamed = "".join(recorder.generate_stream("Stream me"))
+        vectors = recorder.get_embeddings(["alpha", "beta"])
+        assert len(recorder.cassette) == 5
+        Cassette.close_all()
+        
+        replay = ModelFactory.create_model(self._config(path, mode="replay"))
+        assert isinstance(replay, ReplayModel)
+        assert [replay.generate("Hello"), replay.generate("Hello"), replay.generate("Hello")] == [first, second, second]
+        assert replay.generate_json("Hi", schema={"type": "object"}) == structured
+        assert "".join(replay.generate_stream("Stream me")) == streamed
+        assert np.allclose(replay.get_embeddings(["alpha", "beta"]), vectors)
+        with pytest.raises(ModelError) as exc_info:
+            replay.generate("Never recorded")
+        assert exc_info.value.error_code == "CASSETTE_MISS"
+        assert replay.snapshot() == {"hits": 6, "misses": 1, "errors": 0}
+    
+    def test_errors_replayed_with_status(self, tmp_path):
+        """测试录制的错误以相同状态码回放"""
+        path = tmp_path / "errors.cassette"
+        recorder = ModelFactory.create_model(self._config(path, rate_limit_rate=1.0, retry_after=0.5))
+        with pytest.raises(TextFissionError):
+            recorder.generate("Hello")
+        
+        replay = ReplayModel(self._config(path), cassette=Cassette(str(path)))
+        with pytest.raises(TextFissionError) as exc_info:
+            replay.generate("Hello")
+        assert get_status_code(exc_info.value) == 429
+        assert exc_info.value.details["retry_after"] == 0.5
+    
+    def test_latency_emulation(self, tmp_path):
+        """测试回放按录制耗时等待"""
+        path = tmp_path / "slow.cassette"
+        config = self._config(path)
+        config.model_settings.mock.latency = "fixed"
+        config.model_settings.mock.latency_mean = 0.05
+        ModelFactory.create_model(config).generate("Hello")
+        
+        fast = ReplayModel(config, cassette=Cassette(str(path)))
+        start = time.perf_counter()
+        fast.generate("Hello")
+        assert time.perf_counter() - start < 0.05
+        
+        slow = ReplayModel(config, cassette=Cassette(str(path)), emulate_latency=True)
+        start = time.perf_counter()
+        slow.generate("Hello")
+        assert time.perf_counter() - start >= 0.05
+    
+    def test_incomplete_record_dropped(self, tmp_path):
+        """测试崩溃留下的不完整记录在重新打开时被丢弃"""
+        path = tmp_path / "crash.cassette"
+        recorder = ModelFactory.create_model(self._config(path))
+        recorder.generate("One")
+        recorder.generate("Two")
+        Cassette.close_all()
+        with open(path, "r+b") as f:
+            f.truncate(os.path.getsize(path) - 3)
+        
+        cassette = Cassette(str(path))
+        assert len(cassette) == 1
+        assert cassette.next("generate", "One", {}) is not None
+        assert cassette.next("generate", "Two", {}) is None
+    
+    def test_dataset_replayed_identically(self, tmp_path):
+        """测试回放运行得到与录制运行相同的数据集"""
+        path = tmp_path / "dataset.cassette"
+        text = "Python is a programming language created by Guido van Rossum. It emphasizes code readability. " * 3
+        config = self._config(path)
+        config.processing_config.min_chars = 10
+        config.custom_config.min_questions_per_chunk = 1
+        recorded = create_dataset(text, config, str(tmp_path / "recorded.json"), show_progress=False)
+        Cassette.close_all()
+        
+        config.model_settings.cassette_mode = "replay"
+        replayed = create_dataset(text, config, str(tmp_path / "replayed.json"), show_progress=False)
+        with open(recorded, encoding="utf-8") as a, open(replayed, encoding="utf-8") as b:
+            assert json.load(a) == json.load(b)
@@ -2,16 +2,19 @@ import pytest
 from unittest.mock import patch, MagicMock
 import tempfile
 import os
+import json
 from typing import List, Dict, Any
 
 from textfission.core.config import (
-    ModelConfig, ProcessingConfig, ExportConfig, CustomConfig
+    ModelConfig, ProcessingConfig, ExportConfig, CustomConfig, MockModelConfig
 )
 from textfission.processors.text_splitter import (
     SmartTextSplitter, RecursiveTextSplitter, MarkdownSplitter, TextProcessor
 )
 from textfission.processors.question_generator import QuestionProcessor
 from textfission.processors.answer_generator import AnswerProcessor
+from textfission.core.base import BaseAnswerGenerator
+from helpers import make_config
 
 # 测试专用配置容器
 def create_test_config(model_settings, processing_config, custom_config):
@@ -298,6 +301,20 @@ class TestQuestionProcessor:
         assert len(questions) > 0
         assert all(isinstance(q, dict) for q in questions)
 
+    @patch('textfission.models.openai.OpenAIModel.generate')
+    def test_wrong_field_type_is_retried(self, mock_generate):
+        """测试字段类型错误的回复被重试而非永久失败"""
+        question = {"type": "factual", "difficulty": 0.5, "keywords": ["Python"], "context_required": False}
+        mock_generate.side_effect = [
+            json.dumps({"questions": [dict(question, text=["What is Python?"])]}),
+            json.dumps({"questions": [dict(question, text="What is Python?")]})
+        ]
+
+        questions = self.processor.generator.generate("Python is a programming language.", retry_delay=0)
+
+        assert [q["text"] for q in questions] == ["What is Python?"]
+        assert mock_generate.call_count == 2
+
     @patch('textfission.models.openai.OpenAIModel.generate')
     def test_process_chunks(self, mock_generate):
         """测试处理多个文本块"""
@@ -336,6 +353,83 @@ class TestQuestionProcessor:
         assert len(questions) == len(chunks)
         assert all(isinstance(q, list) for q in questions)
 
+    @patch('textfission.models.openai.OpenAIModel.generate')
+    def test_partial_response_topped_up(self, mock_generate):
+        """测试部分有效的响应只补充缺少的问题"""
+        first = {"questions": [
+            {"text": "What is Python?", "type": "factual", "difficulty": 0.5,
+             "keywords": ["Python"], "context_required": False},
+            {"text": "Bad", "type": "factual", "difficulty": 0.5,
+             "keywords": [], "context_required": False}
+        ]}
+        top_up = {"questions": [
+            {"text": "what is python", "type": "factual", "difficulty": 0.5,
+             "keywords": ["Python"], "context_required": False},
+            {"text": "Who created Python?", "type": "factual", "difficulty": 0.4,
+             "keywords": ["Guido"], "context_required": False}
+        ]}
+        mock_generate.side_effect = [json.dumps(first), json.dumps(top_up)]
+        generator = self.processor.generator
+        generator.min_questions_per_chunk = 2
+        
+        questions = generator.generate("Python was created by Guido van Rossum.")
+        
+        assert [q["text"] for q in questions] == ["What is Python?", "Who created Python?"]
+        assert mock_generate.call_count == 2
+        top_up_prompt = mock_generate.call_args_list[1][0][0]
+        assert "already accepted" in top_up_prompt
+        assert "- What is Python?" in top_up_prompt
+
+    @patch('textfission.models.openai.OpenAIModel.generate_json')
+    def test_structured_output_used(self, mock_generate_json):
+        """测试配置结构化输出时使用JSON schema并统计解析失败"""
+        mock_generate_json.side_effect = ["not json", json.dumps({"questions": [
+            {"text": "What is Python?", "type": "factual", "difficulty": 0.5,
+             "keywords": ["Python"], "context_required": False}
+        ]})]
+        generator = self.processor.generator
+        generator.response_format = "json_schema"
+        generator.retry_policy = generator.retry_policy.with_overrides(base_delay=0.001)
+        
+        questions = generator.generate("Python is a programming language.")
+        
+        assert len(questions) == 1
+        kwargs = mock_generate_json.call_args.kwargs
+        assert kwargs["mode"] == "json_schema"
+        assert kwargs["schema"]["required"] == ["questions"]
+        stats = generator.get_stats()
+        assert stats["parse_failures"] == 1
+        assert stats["retries"] == 1
+        assert stats["structured_requests"] == 2
+
+    def test_stream_stops_at_max_questions(self):
+        """测试流式生成达到上限后关闭流"""
+        questions = [
+            {"text": f"What is feature number {i}?", "type": "factual", "difficulty": 0.5,
+             "keywords": ["feature"], "context_required": False}
+            for i in range(6)
+        ]
+        text = json.dumps({"questions": questions})
+        state = {"sent": 0, "closed": False}
+        
+        def fake_stream(prompt):
+            try:
+                for start in range(0, len(text), 16):
+                    state["sent"] = start + 16
+                    yield text[start:start + 16]
+            finally:
+                state["closed"] = True
+        
+        generator = self.processor.generator
+        generator.model.generate_stream = fake_stream
+        
+        streamed = list(self.processor.process_chunk_stream("Some text about features."))
+        
+        assert [q["text"] for q in streamed] == [q["text"] for q in questions[:3]]
+        assert state["closed"]
+        assert state["sent"] < len(text)
+        assert generator.get_stats()["early_stops"] == 1
+
 class TestAnswerProcessor:
     """测试答案生成器"""
     
@@ -461,6 +555,24 @@ class TestAnswerProcessor:
         assert all(isinstance(a, list) for a in answers)
         assert all(len(a) == len(q) for a, q in zip(answers, questions))
 
+    def test_process_qa_pairs_uses_overridden_batch(self):
+        """测试生成器覆盖generate_batch时按块依次调用"""
+        calls = []
+
+        class ChunkBatchGenerator(BaseAnswerGenerator):
+            def generate(self, chunk, question):
+                raise AssertionError("generate_batch should be used")
+
+            def generate_batch(self, chunk, questions, show_progress=True):
+                calls.append(chunk)
+                return [{"answer": question} for question in questions]
+
+        processor = AnswerProcessor(self.config, generator=ChunkBatchGenerator(self.config))
+        answers = processor.process_qa_pairs(["a", "b"], [["q1"], ["q2", "q3"]], show_progress=False)
+
+        assert calls == ["a", "b"]
+        assert answers == [[{"answer": "q1"}], [{"answer": "q2"}, {"answer": "q3"}]]
+
 class TestProcessorIntegration:
     @patch('textfission.models.openai.OpenAIModel.generate')
     def test_processor_workflow(self, mock_generate):
@@ -559,4 +671,225 @@ class TestProcessorIntegration:
                 qa_pairs.append([])
 
         answers = answer_processor.process_qa_pairs(chunks, qa_pairs, show_progress=False)
-        assert len(answers) == len(chunks) 
\ No newline at end of file
+        assert len(answers) == len(chunks) 
+
+class TestStreamingPipeline:
+    """测试问题流与答案阶段的流水线"""
+    
+    def test_answers_start_before_questions_finish(self):
+        """测试问题生成未结束时已开始生成答案"""
+        import threading
+        config = create_test_config(
+            model_settings=ModelConfig(api_key="test_key"),
+            processing_config=ProcessingConfig(max_workers=2),
+            custom_config=CustomConfig(language="en")
+        )
+        first_answered = threading.Event()
+        generator = MagicMock()
+        generator.generate.side_effect = lambda chunk, question: (
+            first_answered.set() or {"answer": f"answer to {question['text']}"}
+        )
+        processor = AnswerProcessor(config, generator=generator)
+        
+        def questions():
+            yield {"text": "q1"}
+            # The second question only arrives after the first one was answered
+            assert first_answered.wait(timeout=5)
+            yield {"text": "q2"}
+        
+        received, answers = processor.process_question_stream("chunk", questions())
+        assert [q["text"] for q in received] == ["q1", "q2"]
+        assert [a["answer"] for a in answers] == ["answer to q1", "answer to q2"]
+    
+    def test_streams_share_executor(self):
+        """测试并发的问题流共用同一个答案线程池"""
+        import threading
+        from concurrent.futures import ThreadPoolExecutor
+        config = create_test_config(
+            model_settings=ModelConfig(api_key="test_key"),
+            processing_config=ProcessingConfig(max_workers=4),
+            custom_config=CustomConfig(language="en")
+        )
+        threads = set()
+        generator = MagicMock()
+        generator.generate.side_effect = lambda chunk, question: threads.add(threading.current_thread().name) or {"answer": question}
+        processor = AnswerProcessor(config, generator=generator)
+        
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix="answers") as executor:
+            with ThreadPoolExecutor(max_workers=3) as chunk_pool:
+                results = list(chunk_pool.map(
+                    lambda chunk: processor.process_question_stream(chunk, iter(["q1", "q2"]), executor),
+                    ["a", "b", "c"]
+                ))
+        assert [answers for _, answers in results] == [[{"answer": "q1"}, {"answer": "q2"}]] * 3
+        assert threads == {"answers_0"}
+
+class TestStreamingDatasetPipeline:
+    """测试有界队列的分阶段数据集流水线"""
+    
+    TEXT = "Python is a programming language created by Guido van Rossum. It emphasizes code readability."
+    
+    def _config(self, **processing):
+        return make_config(
+            model="mock",
+            mock=MockModelConfig(latency="none"),
+            processing=dict(max_workers=2, retry_attempts=1, **processing),
+            custom=dict(language="en", question_types=["factual"], min_questions_per_chunk=1, max_questions_per_chunk=1)
+        )
+    
+    def test_bounded_lead_and_incremental_writes(self, tmp_path):
+        """测试上游最多领先固定数量的条目，且记录在运行中即写入磁盘"""
+        from textfission.processors.pipeline import StreamingPipeline
+        pipeline = StreamingPipeline(self._config(), queue_size=2)
+        output = tmp_path / "dataset.json"
+        leads = []
+        
+        def chunks():
+            for index in range(40):
+                leads.append(index - pipeline.counters["written"].value)
+                if index == 30:
+                    # Earlier records are already on disk while the input is still being read
+                    assert output.read_text(encoding="utf-8").count('"question"') > 0
+                yield f"{self.TEXT} Section {index}."
+        
+        pipeline.run(chunks(), str(output))
+        with open(output, encoding="utf-8") as f:
+            dataset = json.load(f)
+        assert len(dataset) == 40
+        assert {item["text"] for item in dataset} == {f"{self.TEXT} Section {index}." for index in range(40)}
+        
+        stats = pipeline.get_stats()
+        assert stats["counters"]["written"] == 40
+        assert all(stats["peak_depths"][name] <= size for name, size in stats["queue_sizes"].items())
+        # Three queues of 2, four workers, the feeder and the writer hold at most 12 items
+        assert max(leads) <= 12
+    
+    def test_failure_stops_pipeline_and_keeps_valid_file(self, tmp_path):
+        """测试某一阶段失败时流水线停止，已写入的记录仍是合法JSON"""
+        from textfission.processors.pipeline import StreamingPipeline
+        pipeline = StreamingPipeline(self._config(), queue_size=2)
+        
+        def chunks():
+            for index in range(5):
+                yield f"{self.TEXT} Section {index}."
+            raise ValueError("broken input")
+        
+        output = tmp_path / "dataset.json"
+        with pytest.raises(ValueError, match="broken input"):
+            pipeline.run(chunks(), str(output))
+        with open(output, encoding="utf-8") as f:
+            assert len(json.load(f)) <= 5
+    
+    def test_create_dataset_from_files_streaming(self, tmp_path):
+        """测试create_dataset_from_files在流水线模式下逐文件处理并导出"""
+        from textfission import create_dataset_from_files
+        paths = []
+        for index in range(3):
+            path = tmp_path / f"doc{index}.txt"
+            path.write_text(f"{self.TEXT} Document {index}.", encoding="utf-8")
+            paths.append(str(path))
+        
+        output = create_dataset_from_files(
+            paths, self._config(streaming_pipeline=True), str(tmp_path / "dataset.csv"), output_format="csv", show_progress=False
+        )
+        import pandas as pd
+        df = pd.read_csv(output)
+        assert len(df) == 3
+        assert list(df.columns) == ["text", "question", "answer", "confidence"]
+
+class TestParallelQuorum:
+    """测试多模型并行答案的法定数提前返回"""
+    
+    def _answer(self, text):
+        return json.dumps({
+            "answer": text,
+            "metadata": {
+                "quality": "good", "confidence": 0.9, "relevance_score": 0.9,
+                "completeness_score": 0.9, "coherence_score": 0.9,
+                "supporting_evidence": [], "citations": [{"text": "t", "position": "p"}]
+            }
+        })
+    
+    def _generator(self, quorum_size, processing_config=None, **model_settings):
+        from textfission.processors.answer_generator import AnswerGenerator
+        model_settings.setdefault("api_key", "test_key")
+        config = create_test_config(
+            model_settings=ModelConfig(
+                models=["fast-a", "fast-b", "slow"],
+                use_parallel=True, quorum_size=quorum_size, **model_settings
+            ),
+            processing_config=processing_config or ProcessingConfig(),
+            custom_config=CustomConfig(language="en", min_quality="good")
+        )
+        return AnswerGenerator(config)
+    
+    def _fake_generate(self, model, prompt, **kwargs):
+        import time
+        if model.model == "slow":
+            time.sleep(1.0)
+        return self._answer("Python is a high-level programming language.")
+    
+    def test_returns_at_quorum(self):
+        """测试达到法定数后立即返回并放弃其余请求"""
+        import time
+        from textfission.models.openai import OpenAIModel
+        generator = self._generator(quorum_size=2)
+        with patch.object(OpenAIModel, "generate", autospec=True, side_effect=self._fake_generate):
+            start = time.perf_counter()
+            answers = generator.generate_parallel("chunk", "What is Python?")
+            elapsed = time.perf_counter() - start
+        
+        assert elapsed < 0.5
+        assert set(answers) == {"fast-a", "fast-b"}
+        stats = generator.get_model_stats()
+        assert stats["fast-a"]["wins"] == 1 and stats["fast-b"]["wins"] == 1
+        assert stats["slow"]["abandoned"] == 1
+        assert stats["fast-a"]["latency"]["count"] == 1
+    
+    def test_disagreeing_answers_do_not_form_quorum(self):
+        """测试不一致的答案不构成法定数"""
+        from textfission.models.openai import OpenAIModel
+        generator = self._generator(quorum_size=2)
+        texts = {"fast-a": "Python is a programming language.", "fast-b": "完全不同的回答内容", "slow": "Python is a programming language!"}
+        
+        def fake_generate(model, prompt, **kwargs):
+            return self._answer(texts[model.model])
+        
+        with patch.object(OpenAIModel, "generate", autospec=True, side_effect=fake_generate):
+            answers = generator.generate_parallel("chunk", "What is Python?")
+        assert set(answers) == {"fast-a", "slow"}
+    
+    def test_losing_call_stops_after_quorum(self):
+        """测试达到法定数后落后的请求不再重试，也不再占用限流容量"""
+        import threading
+        import time
+        generator = self._generator(
+            quorum_size=2,
+            processing_config=ProcessingConfig(retry_attempts=3, retry_delay=0),
+            api_key="test-quorum-cancel-key",
+            requests_per_minute=600
+        )
+        calls = {"fast-a": 0, "fast-b": 0, "slow": 0}
+        lock = threading.Lock()
+        
+        def fake_create(**kwargs):
+            with lock:
+                calls[kwargs["model"]] += 1
+            if kwargs["model"] == "slow":
+                time.sleep(0.3)
+                error = Exception("Service unavailable")
+                error.status_code = 503
+                raise error
+            content = self._answer("Python is a high-level programming language.")
+            return MagicMock(choices=[MagicMock(message=MagicMock(content=content))], usage=None)
+        
+        for model in generator.models:
+            model.client.chat.completions.create = fake_create
+        answers = generator.generate_parallel("chunk", "What is Python?")
+        # Without cancellation the slow call would retry twice within this window
+        time.sleep(0.6)
+        
+        assert set(answers) == {"fast-a", "fast-b"}
+        assert calls["slow"] == 1
+        slow = next(model for model in generator.models if model.model == "slow")
+        assert slow.rate_limiter.snapshot()["requests"] == 1
@@ -1,4 +1,5 @@
-from .core.config import Config, ModelConfig, ProcessingConfig, OutputConfig, ExportConfig, CustomConfig
+from concurrent.futures import ThreadPoolExecutor
+from .core.config import Config, ModelConfig, StageModelConfig, MockModelConfig, ProcessingConfig, OutputConfig, ExportConfig, CustomConfig
 from .core.exceptions import (
     TextFissionError,
     ConfigurationError,
@@ -6,14 +7,23 @@ from .core.exceptions import (
     GenerationError,
     ModelError,
     ValidationError,
-    ExportError
+    ExportError,
+    DeadlineExceeded,
+    CallCancelled,
+    Deadline,
+    deadline_scope,
+    cancellation_scope
 )
 from .processors.text_splitter import TextProcessor, RecursiveTextSplitter, MarkdownSplitter
 from .processors.question_generator import QuestionProcessor, QuestionGenerator
 from .processors.answer_generator import AnswerProcessor, AnswerGenerator
+from .processors.batch import BatchRunner
+from .processors.pipeline import StreamingPipeline
 from .models.openai import OpenAIModel
 from .models.factory import ModelFactory
+from .models.embeddings import EmbeddingService
 from .exporters.base import DatasetExporter, JSONExporter, CSVExporter, TXTExporter
+from .core.concurrency import get_worker_count, parallel_map
 
 __version__ = "0.1.0"
 
@@ -21,6 +31,8 @@ __all__ = [
     # Core
     "Config",
     "ModelConfig",
+    "StageModelConfig",
+    "MockModelConfig",
     "ProcessingConfig",
     "OutputConfig",
     "ExportConfig",
@@ -34,6 +46,11 @@ __all__ = [
     "ModelError",
     "ValidationError",
     "ExportError",
+    "DeadlineExceeded",
+    "CallCancelled",
+    "Deadline",
+    "deadline_scope",
+    "cancellation_scope",
     
     # Processors
     "TextProcessor",
@@ -43,10 +60,13 @@ __all__ = [
     "QuestionGenerator",
     "AnswerProcessor",
     "AnswerGenerator",
+    "BatchRunner",
+    "StreamingPipeline",
     
     # Models
     "OpenAIModel",
     "ModelFactory",
+    "EmbeddingService",
     
     # Exporters
     "DatasetExporter",
@@ -58,6 +78,53 @@ __all__ = [
     "create_dataset_from_files"
 ]
 
+def _generate_qa_pairs(
+    chunks: list,
+    config: Config,
+    question_processor: QuestionProcessor,
+    answer_processor: AnswerProcessor,
+    show_progress: bool = True
+) -> tuple:
+    """Generate questions and answers for every chunk.
+    
+    With processing_config.stream_questions, questions are streamed and each one
+    is answered as soon as it is parsed instead of after the whole question stage;
+    the chunk workers share one answer pool.
+    Everything runs under the job deadline (processing_config.job_timeout) if set.
+    """
+    with deadline_scope(Deadline.from_config(config)):
+        if not getattr(config.processing_config, "stream_questions", False):
+            questions = question_processor.process_chunks(chunks, show_progress)
+            answers = answer_processor.process_qa_pairs(chunks, questions, show_progress)
+            return questions, answers
+        
+        with ThreadPoolExecutor(max_workers=answer_processor._worker_count()) as executor:
+            results = parallel_map(
+                lambda chunk: answer_processor.process_question_stream(
+                    chunk, question_processor.process_chunk_stream(chunk), executor
+                ),
+                chunks,
+                get_worker_count(config),
+                show_progress=show_progress,
+                desc="Generating QA pairs"
+            )
+        return [questions for questions, _ in results], [answers for _, answers in results]
+
+def _export_streaming(
+    chunks,
+    config: Config,
+    question_processor: QuestionProcessor,
+    answer_processor: AnswerProcessor,
+    exporter: DatasetExporter,
+    output_path: str,
+    output_format: str,
+    show_progress: bool = True
+) -> str:
+    """Generate and export through the bounded streaming pipeline (processing_config.streaming_pipeline)"""
+    pipeline = StreamingPipeline(config, question_processor, answer_processor, exporter)
+    with deadline_scope(Deadline.from_config(config)):
+        return pipeline.run(chunks, output_path, output_format, show_progress)
+
 def create_dataset(
     text: str,
     config: Config,
@@ -73,14 +140,17 @@ def create_dataset(
         answer_processor = AnswerProcessor(config)
         exporter = DatasetExporter(config)
         
+        if getattr(config.processing_config, "streaming_pipeline", False):
+            return _export_streaming(
+                text_processor.iter_chunks([text]), config, question_processor, answer_processor,
+                exporter, output_path, output_format, show_progress
+            )
+        
         # Process text
         chunks = text_processor.process_text(text)
         
-        # Generate questions
-        questions = question_processor.process_chunks(chunks, show_progress)
-        
-        # Generate answers
-        answers = answer_processor.process_qa_pairs(chunks, questions, show_progress)
+        # Generate questions and answers
+        questions, answers = _generate_qa_pairs(chunks, config, question_processor, answer_processor, show_progress)
         
         # Prepare dataset
         dataset = []
@@ -113,14 +183,17 @@ def create_dataset_from_file(
         answer_processor = AnswerProcessor(config)
         exporter = DatasetExporter(config)
         
+        if getattr(config.processing_config, "streaming_pipeline", False):
+            return _export_streaming(
+                text_processor.iter_file_chunks([file_path]), config, question_processor, answer_processor,
+                exporter, output_path, output_format, show_progress
+            )
+        
         # Process file
         chunks = text_processor.process_file(file_path)
         
-        # Generate questions
-        questions = question_processor.process_chunks(chunks, show_progress)
-        
-        # Generate answers
-        answers = answer_processor.process_qa_pairs(chunks, questions, show_progress)
+        # Generate questions and answers
+        questions, answers = _generate_qa_pairs(chunks, config, question_processor, answer_processor, show_progress)
         
         # Prepare dataset
         dataset = []
@@ -145,7 +218,13 @@ def create_dataset_from_files(
     output_format: str = "json",
     show_progress: bool = True
 ) -> str:
-    """Create a dataset from multiple files"""
+    """Create a dataset from multiple files
+    
+    With processing_config.batch_mode, questions and answers are generated through
+    the provider's OpenAI-compatible batch API instead of interactive requests.
+    Otherwise, with processing_config.streaming_pipeline, files are split one at a
+    time and records are exported as they are answered.
+    """
     try:
         # Initialize processors
         text_processor = TextProcessor(config)
@@ -153,17 +232,25 @@ def create_dataset_from_files(
         answer_processor = AnswerProcessor(config)
         exporter = DatasetExporter(config)
         
+        if getattr(config.processing_config, "streaming_pipeline", False) and not getattr(config.processing_config, "batch_mode", False):
+            return _export_streaming(
+                text_processor.iter_file_chunks(file_paths), config, question_processor, answer_processor,
+                exporter, output_path, output_format, show_progress
+            )
+        
         # Process files
         all_chunks = []
         for file_path in file_paths:
             chunks = text_processor.process_file(file_path)
             all_chunks.extend(chunks)
         
-        # Generate questions
-        questions = question_processor.process_chunks(all_chunks, show_progress)
-        
-        # Generate answers
-        answers = answer_processor.process_qa_pairs(all_chunks, questions, show_progress)
+        # Generate questions and answers
+        if getattr(config.processing_config, "batch_mode", False):
+            runner = BatchRunner(config, question_processor.generator, answer_processor.generator)
+            with deadline_scope(Deadline.from_config(config)):
+                questions, answers = runner.run(all_chunks)
+        else:
+            questions, answers = _generate_qa_pairs(all_chunks, config, question_processor, answer_processor, show_progress)
         
         # Prepare dataset
         dataset = []
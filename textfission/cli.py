@@ -8,6 +8,7 @@ import sys
 import os
 from pathlib import Path
 from .core.config import Config, ModelConfig, ProcessingConfig, ExportConfig, CustomConfig
+from .core.cache import Cache
 from . import create_dataset, create_dataset_from_file, create_dataset_from_files
 
 def main():
@@ -174,5 +175,57 @@ def create_config(args) -> Config:
     
     return config
 
+def cache_main(argv=None):
+    """缓存管理命令行入口"""
+    parser = argparse.ArgumentParser(
+        prog="textfission-cache",
+        description="TextFission - 缓存快照导出/导入工具",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+示例用法:
+  textfission-cache export --cache-dir .cache --output cache.tfc
+  textfission-cache import --cache-dir .cache --input cache.tfc
+  textfission-cache stats --cache-dir .cache
+        """
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    
+    export_parser = subparsers.add_parser("export", help="导出缓存快照")
+    export_parser.add_argument("--cache-dir", required=True, help="缓存目录")
+    export_parser.add_argument("--output", "-o", required=True, help="快照文件路径")
+    
+    import_parser = subparsers.add_parser("import", help="导入缓存快照")
+    import_parser.add_argument("--cache-dir", required=True, help="缓存目录")
+    import_parser.add_argument("--input", "-i", required=True, help="快照文件路径")
+    import_parser.add_argument(
+        "--overwrite",
+        action="store_true",
+        help="覆盖已存在的缓存项"
+    )
+    
+    stats_parser = subparsers.add_parser("stats", help="查看缓存统计")
+    stats_parser.add_argument("--cache-dir", required=True, help="缓存目录")
+    
+    args = parser.parse_args(argv)
+    
+    try:
+        cache = Cache(cache_dir=args.cache_dir)
+        if args.command == "export":
+            count = cache.export_snapshot(args.output)
+            print(f"✅ 已导出 {count} 个缓存项: {args.output}")
+        elif args.command == "import":
+            result = cache.import_snapshot(args.input, overwrite=args.overwrite)
+            print(
+                f"✅ 已导入 {result['imported']} 个缓存项 "
+                f"(过期 {result['expired']}, 重复 {result['duplicates']}, 已存在 {result['existing']})"
+            )
+        elif args.command == "stats":
+            stats = cache.get_stats()
+            print(f"缓存文件数: {stats['file_count']}")
+            print(f"磁盘占用: {stats['disk_bytes']} 字节")
+    except Exception as e:
+        print(f"❌ 错误: {e}", file=sys.stderr)
+        sys.exit(1)
+
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -1,7 +1,15 @@
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any, Optional
+from contextlib import contextmanager
+import functools
+from typing import List, Dict, Any, Optional, Callable, Iterator
 from .config import Config
-from .exceptions import TextFissionError
+from .exceptions import TextFissionError, ErrorHandler, RetryPolicy, RetryExhausted, check_cancelled, get_status_code, get_request_timeout
+from .logger import Logger
+from .rate_limiter import RateLimiterRegistry, RateLimitReservation, estimate_tokens
+from .concurrency import ConcurrencyLimiterRegistry
+from .circuit_breaker import CircuitBreakerRegistry
+
+logger = Logger.get_instance()
 
 class BaseProcessor(ABC):
     """Base class for all processors"""
@@ -45,14 +53,179 @@ class BaseAnswerGenerator(ABC):
 
 class BaseModel(ABC):
     """Base class for language models"""
+    provider = "base"
+    # Provider embedding defaults: model name, most inputs per request and, when the provider
+    # limits it, estimated tokens per request
+    default_embedding_model: Optional[str] = None
+    max_embedding_batch = 1
+    max_embedding_batch_tokens: Optional[int] = None
+
     def __init__(self, config: Config):
         self.config = config
+        self.rate_limiter = None
+        self.concurrency_limiter = None
+        self.circuit_breaker = None
+        self.retry_policy = RetryPolicy.from_config(config)
+        self.structured_output = True
+        processing = getattr(config, "processing_config", None)
+        self.request_timeout = getattr(processing, "request_timeout", None)
+        settings = getattr(config, "model_settings", None)
+        embedding_model = getattr(settings, "embedding_model", None)
+        self.embedding_model = embedding_model if isinstance(embedding_model, str) else self.default_embedding_model
+        batch_size = getattr(settings, "embedding_batch_size", None)
+        self.embedding_batch_size = (
+            max(1, min(batch_size, self.max_embedding_batch)) if isinstance(batch_size, int) else self.max_embedding_batch
+        )
 
     @abstractmethod
     def generate(self, prompt: str) -> str:
         """Generate text from prompt"""
         pass
 
+    def generate_json(
+        self,
+        prompt: str,
+        schema: Optional[Dict[str, Any]] = None,
+        schema_name: str = "response",
+        mode: str = "json_schema"
+    ) -> str:
+        """Generate a JSON response using the provider's JSON mode or JSON schema format.
+        
+        Falls back to plain generation when the backend has no structured output or
+        the endpoint rejects the response format, so callers still parse defensively.
+        """
+        if not self.structured_output:
+            return self.generate(prompt)
+        try:
+            return self._generate_json(prompt, schema, schema_name, mode)
+        except NotImplementedError:
+            self.structured_output = False
+        except TextFissionError as e:
+            if get_status_code(e) not in (400, 422):
+                raise
+            logger.warning(f"{self.provider} rejected structured output, using plain text", error=str(e))
+            self.structured_output = False
+        return self.generate(prompt)
+
+    def _generate_json(self, prompt: str, schema: Optional[Dict[str, Any]], schema_name: str, mode: str) -> str:
+        """Provider specific structured output call"""
+        raise NotImplementedError
+
+    def generate_stream(self, prompt: str) -> Iterator[str]:
+        """Stream generated text as it arrives.
+        
+        Closing the iterator early aborts the request. Backends without streaming
+        yield the complete response once.
+        """
+        yield self.generate(prompt)
+
+    def get_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """Get embeddings for several texts (at most embedding_batch_size).
+        
+        Backends without a batch endpoint make one request per text.
+        """
+        return [self.get_embedding(text) for text in texts]
+
+    def _init_limiters(self) -> None:
+        """Attach the shared rate and concurrency limiters and circuit breaker, if configured"""
+        settings = self.config.model_settings
+        self.rate_limiter = RateLimiterRegistry.get_instance().get_limiter(
+            self.provider,
+            self.api_key,
+            self.model,
+            requests_per_minute=getattr(settings, "requests_per_minute", None),
+            tokens_per_minute=getattr(settings, "tokens_per_minute", None)
+        )
+        
+        processing = getattr(self.config, "processing_config", None)
+        if getattr(processing, "adaptive_concurrency", False):
+            self.concurrency_limiter = ConcurrencyLimiterRegistry.get_instance().get_limiter(
+                self.provider,
+                self.api_key,
+                self.model,
+                initial_limit=processing.max_workers,
+                min_limit=processing.min_concurrency,
+                max_limit=processing.max_concurrency
+            )
+        
+        if getattr(settings, "circuit_breaker", False) or getattr(settings, "failover", None):
+            self.circuit_breaker = CircuitBreakerRegistry.get_instance().get_breaker(
+                self.provider,
+                self.model,
+                failure_threshold=getattr(settings, "circuit_failure_threshold", 5),
+                recovery_seconds=getattr(settings, "circuit_recovery_seconds", 30.0)
+            )
+
+    def _call_with_retry(
+        self,
+        func: Callable[..., Any],
+        *args,
+        message: str = "Model call failed",
+        retry_policy: Optional[RetryPolicy] = None,
+        **kwargs
+    ) -> Any:
+        """Run a provider call under the shared retry policy and convert failures to ModelError.
+        
+        With a circuit breaker attached every attempt goes through it, so an open
+        circuit fails fast instead of retrying.
+        """
+        policy = retry_policy or self.retry_policy
+        if self.circuit_breaker is not None:
+            func = functools.partial(self.circuit_breaker.call, func)
+        try:
+            return policy.execute(func, *args, **kwargs)
+        except RetryExhausted as e:
+            raise ErrorHandler.wrap_provider_error(
+                e.last_error,
+                f"{message} after {e.attempts} attempts: {str(e.last_error)}"
+            )
+        except Exception as e:
+            raise ErrorHandler.wrap_provider_error(e, f"{message}: {str(e)}")
+
+    def _request_timeout(self, timeout: Optional[float] = None) -> Optional[float]:
+        """Timeout for the next provider request: the given or configured one capped by the job deadline"""
+        return get_request_timeout(self.request_timeout if timeout is None else timeout)
+
+    def _reserve_capacity(self, prompt: str, max_output_tokens: int = 0) -> Optional[RateLimitReservation]:
+        """Wait for rate limiter capacity using an estimate of the request's token cost"""
+        if self.rate_limiter is None:
+            return None
+        return self.rate_limiter.acquire(estimate_tokens(prompt) + (max_output_tokens or 0))
+
+    @contextmanager
+    def _capacity(self, prompt: str, max_output_tokens: int = 0) -> Iterator[Optional[RateLimitReservation]]:
+        """Reserve rate limiter capacity for one request, refunding its tokens if the request fails"""
+        # A cancelled call sends nothing, so it takes no capacity either
+        check_cancelled()
+        reservation = self._reserve_capacity(prompt, max_output_tokens)
+        try:
+            yield reservation
+        except BaseException:
+            if self.rate_limiter is not None:
+                self.rate_limiter.refund(reservation)
+            raise
+
+    def _settle_capacity(self, reservation: Optional[RateLimitReservation], usage: Any) -> None:
+        """Correct the reserved token estimate with the usage reported by the provider"""
+        if self.rate_limiter is None or reservation is None:
+            return
+        used_tokens = self._usage_tokens(usage)
+        if used_tokens is not None:
+            self.rate_limiter.reconcile(reservation, used_tokens)
+
+    @staticmethod
+    def _usage_tokens(usage: Any) -> Optional[int]:
+        """Read the total token count from a provider usage object or dict"""
+        if usage is None:
+            return None
+        get = usage.get if isinstance(usage, dict) else lambda name: getattr(usage, name, None)
+        total = get("total_tokens")
+        if isinstance(total, int):
+            return total
+        parts = [get(name) for name in ("prompt_tokens", "completion_tokens", "input_tokens", "output_tokens")]
+        parts = [part for part in parts if isinstance(part, int)]
+        return sum(parts) if parts else None
+
 class BaseExporter(ABC):
     """Base class for data exporters"""
     def __init__(self, config: Config):
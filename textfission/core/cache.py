@@ -1,26 +1,168 @@
-from typing import Any, Optional, Dict, Callable
+from typing import Any, Optional, Dict, Callable, Tuple, Iterator, BinaryIO
 from datetime import datetime, timedelta
+from collections import OrderedDict
 import hashlib
 import json
 import pickle
 from pathlib import Path
 import os
+import struct
+import sys
+import time
+import zlib
 from threading import Lock
 from ..core.logger import Logger
+from ..core.exceptions import CacheError
+from ..core.metrics import Counter, LatencyHistogram
+
+try:
+    import zstandard
+except ImportError:  # zstd compression is optional
+    zstandard = None
 
 logger = Logger.get_instance()
 
+CODEC_NONE = "none"
+CODEC_ZLIB = "zlib"
+CODEC_ZSTD = "zstd"
+
+def _compress(data: bytes, codec: str, level: int) -> bytes:
+    """Compress serialized bytes with the given codec"""
+    if codec == CODEC_ZLIB:
+        return zlib.compress(data, level)
+    if codec == CODEC_ZSTD:
+        return zstandard.ZstdCompressor(level=level).compress(data)
+    return data
+
+def _decompress(data: bytes, codec: str) -> bytes:
+    """Decompress bytes produced by _compress"""
+    if codec == CODEC_ZLIB:
+        return zlib.decompress(data)
+    if codec == CODEC_ZSTD:
+        if zstandard is None:
+            raise RuntimeError("zstandard is required to read zstd-compressed cache entries")
+        return zstandard.ZstdDecompressor().decompress(data)
+    return data
+
+_UNSET = object()
+
 class CacheEntry:
-    """Cache entry with expiration"""
+    """Cache entry with expiration.
     
-    def __init__(self, value: Any, ttl: int):
-        self.value = value
-        self.created_at = datetime.now()
+    Holds either the live value or its compressed payload (payload is None for
+    live entries). Live values are only pickled when written to disk or to a snapshot.
+    """
+    
+    def __init__(
+        self,
+        payload: Optional[bytes],
+        ttl: int,
+        codec: str = CODEC_NONE,
+        created_at: Optional[datetime] = None,
+        value: Any = _UNSET,
+        size: int = 0
+    ):
+        self.payload = payload
+        self.codec = codec
+        self.created_at = created_at or datetime.now()
         self.ttl = ttl
+        self._value = value
+        self._size = size
+    
+    @classmethod
+    def live(cls, value: Any, ttl: int, size: int, created_at: Optional[datetime] = None) -> "CacheEntry":
+        """Entry holding the value object itself; size is its (estimated) size in bytes"""
+        return cls(None, ttl, created_at=created_at, value=value, size=size)
+    
+    @property
+    def value(self) -> Any:
+        """The value, deserialized if the entry only holds a payload"""
+        if self._value is not _UNSET:
+            return self._value
+        return pickle.loads(_decompress(self.payload, self.codec))
+    
+    @property
+    def size(self) -> int:
+        """Stored size in bytes"""
+        return len(self.payload) if self.payload is not None else self._size
+    
+    def serialized(self) -> Tuple[bytes, str]:
+        """Payload and codec, pickling a live value"""
+        if self.payload is not None:
+            return self.payload, self.codec
+        return pickle.dumps(self._value, protocol=pickle.HIGHEST_PROTOCOL), CODEC_NONE
+    
+    def materialize(self) -> "CacheEntry":
+        """Live copy of an uncompressed entry, e.g. one read back from disk"""
+        if self.payload is None or self.codec != CODEC_NONE:
+            return self
+        return CacheEntry.live(pickle.loads(self.payload), self.ttl, len(self.payload), self.created_at)
     
     def is_expired(self) -> bool:
         """Check if entry is expired"""
         return datetime.now() > self.created_at + timedelta(seconds=self.ttl)
+    
+    def __getstate__(self) -> Dict[str, Any]:
+        payload, codec = self.serialized()
+        return {"payload": payload, "codec": codec, "created_at": self.created_at, "ttl": self.ttl}
+    
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        # Cache files written before values were serialized hold the raw object
+        if "payload" not in state:
+            state["_value"] = state.pop("value", None)
+            state["payload"] = None
+            state["codec"] = CODEC_NONE
+        state.setdefault("_value", _UNSET)
+        state.setdefault("_size", 0)
+        self.__dict__.update(state)
+
+class CacheStats:
+    """Live cache counters, updated in O(1) on every operation"""
+    
+    COUNTERS = (
+        "hits", "memory_hits", "disk_hits", "misses", "sets",
+        "evictions", "expirations", "disk_reads", "disk_writes",
+        "disk_errors", "memory_bytes", "disk_bytes",
+        "compressed_sets", "compression_saved_bytes", "oversized"
+    )
+    TIERS = ("memory", "disk")
+    
+    def __init__(self):
+        self.counters = {name: Counter() for name in self.COUNTERS}
+        self.get_latency = {tier: LatencyHistogram() for tier in self.TIERS}
+        self.set_latency = {tier: LatencyHistogram() for tier in self.TIERS}
+    
+    def inc(self, name: str, amount: int = 1) -> None:
+        """Increase a named counter"""
+        self.counters[name].inc(amount)
+    
+    def dec(self, name: str, amount: int = 1) -> None:
+        """Decrease a named counter"""
+        self.counters[name].dec(amount)
+    
+    def __getitem__(self, name: str) -> int:
+        return self.counters[name].value
+    
+    def hit_rate(self) -> float:
+        """Fraction of lookups served from any tier"""
+        lookups = self["hits"] + self["misses"]
+        return self["hits"] / lookups if lookups else 0.0
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """Get a copy of all counters and latency summaries"""
+        data: Dict[str, Any] = {name: counter.value for name, counter in self.counters.items()}
+        data["hit_rate"] = self.hit_rate()
+        data["get_latency"] = {tier: h.snapshot() for tier, h in self.get_latency.items()}
+        data["set_latency"] = {tier: h.snapshot() for tier, h in self.set_latency.items()}
+        return data
+    
+    def reset(self) -> None:
+        """Reset event counters and histograms (size gauges are kept)"""
+        for name, counter in self.counters.items():
+            if name not in ("memory_bytes", "disk_bytes"):
+                counter.set(0)
+        for histogram in list(self.get_latency.values()) + list(self.set_latency.values()):
+            histogram.reset()
 
 class Cache:
     """Cache management class"""
@@ -29,16 +171,51 @@ class Cache:
         self,
         max_size: int = 1000,
         default_ttl: int = 3600,
-        cache_dir: Optional[str] = None
+        cache_dir: Optional[str] = None,
+        max_bytes: Optional[int] = None,
+        compression: Optional[str] = None,
+        compress_threshold: int = 1024,
+        compression_level: int = 6
     ):
+        """
+        Args:
+            max_size: Maximum number of memory entries, used when max_bytes is not set
+            default_ttl: Default time to live in seconds
+            cache_dir: Directory for persisted entries
+            max_bytes: Bound the memory tier by total stored bytes instead of entry count
+            compression: None, "zlib" or "zstd" (requires the zstandard package)
+            compress_threshold: Only values whose serialized size reaches this many bytes are compressed
+            compression_level: Codec compression level
+        """
+        if compression not in (None, CODEC_NONE, CODEC_ZLIB, CODEC_ZSTD):
+            raise ValueError(f"Unsupported cache compression: {compression}")
+        if compression == CODEC_ZSTD and zstandard is None:
+            logger.warning("zstandard is not installed, falling back to zlib cache compression")
+            compression = CODEC_ZLIB
+        
         self.max_size = max_size
+        self.max_bytes = max_bytes
         self.default_ttl = default_ttl
         self.cache_dir = cache_dir
-        self.memory_cache: Dict[str, CacheEntry] = {}
+        self.compression = compression if compression != CODEC_NONE else None
+        self.compress_threshold = compress_threshold
+        self.compression_level = compression_level
+        # Insertion ordered so the oldest entry can be evicted in O(1)
+        self.memory_cache: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._entry_sizes: Dict[str, int] = {}
         self.lock = Lock()
+        self.stats = CacheStats()
+        self._file_count = 0
         
         if cache_dir:
             os.makedirs(cache_dir, exist_ok=True)
+            # Scan the directory once; afterwards the count is maintained incrementally
+            for file_path in Path(cache_dir).glob("*.cache"):
+                self._file_count += 1
+                try:
+                    self.stats.inc("disk_bytes", file_path.stat().st_size)
+                except OSError:
+                    pass
     
     def _get_key(self, key: Any) -> str:
         """Generate cache key from input"""
@@ -63,28 +240,47 @@ class Cache:
         cache_key = self._get_key(key)
         
         # Try memory cache first
+        start = time.perf_counter()
         with self.lock:
             entry = self.memory_cache.get(cache_key)
-            if entry and not entry.is_expired():
-                return entry.value
+            if entry is not None and entry.is_expired():
+                self._remove_memory_entry(cache_key)
+                self.stats.inc("expirations")
+                entry = None
+        self.stats.get_latency["memory"].observe(time.perf_counter() - start)
+        if entry is not None:
+            self.stats.inc("hits")
+            self.stats.inc("memory_hits")
+            return entry.value
         
         # Try file cache
         file_path = self._get_file_path(cache_key)
         if file_path and file_path.exists():
+            start = time.perf_counter()
             try:
                 with open(file_path, "rb") as f:
                     entry = pickle.load(f)
+                self.stats.inc("disk_reads")
                 if not entry.is_expired():
                     # Update memory cache
+                    entry = entry.materialize()
+                    value = entry.value
                     with self.lock:
-                        self.memory_cache[cache_key] = entry
-                    return entry.value
+                        self._store_memory_entry(cache_key, entry)
+                    self.stats.inc("hits")
+                    self.stats.inc("disk_hits")
+                    return value
                 else:
                     # Remove expired file
-                    file_path.unlink()
+                    self._unlink_file(file_path)
+                    self.stats.inc("expirations")
             except Exception as e:
+                self.stats.inc("disk_errors")
                 logger.warning(f"Error reading cache file: {str(e)}")
+            finally:
+                self.stats.get_latency["disk"].observe(time.perf_counter() - start)
         
+        self.stats.inc("misses")
         return default
     
     def set(
@@ -96,29 +292,110 @@ class Cache:
     ) -> None:
         """Set value in cache"""
         cache_key = self._get_key(key)
-        entry = CacheEntry(value, ttl or self.default_ttl)
+        entry = self._make_entry(value, ttl or self.default_ttl)
+        self.stats.inc("sets")
         
         # Update memory cache
+        start = time.perf_counter()
         with self.lock:
-            # Check cache size
-            if len(self.memory_cache) >= self.max_size:
-                # Remove oldest entry
-                oldest_key = min(
-                    self.memory_cache.keys(),
-                    key=lambda k: self.memory_cache[k].created_at
-                )
-                del self.memory_cache[oldest_key]
-            
-            self.memory_cache[cache_key] = entry
+            stored = self._store_memory_entry(cache_key, entry)
+        self.stats.set_latency["memory"].observe(time.perf_counter() - start)
         
         # Update file cache if requested
         if persist and self.cache_dir:
-            file_path = self._get_file_path(cache_key)
-            try:
-                with open(file_path, "wb") as f:
-                    pickle.dump(entry, f)
-            except Exception as e:
-                logger.warning(f"Error writing cache file: {str(e)}")
+            self._write_file(cache_key, entry)
+        elif not stored:
+            logger.warning("Cache value larger than max_bytes was not cached", size=entry.size, max_bytes=self.max_bytes)
+    
+    def _write_file(self, cache_key: str, entry: CacheEntry) -> None:
+        """Persist an entry to the disk tier"""
+        file_path = self._get_file_path(cache_key)
+        start = time.perf_counter()
+        try:
+            # Serialize first so a value that cannot be pickled leaves no partial file
+            data = pickle.dumps(entry)
+            previous_size = file_path.stat().st_size if file_path.exists() else None
+            with open(file_path, "wb") as f:
+                f.write(data)
+                written = f.tell()
+            self.stats.inc("disk_writes")
+            with self.lock:
+                self.stats.inc("disk_bytes", written - (previous_size or 0))
+                if previous_size is None:
+                    self._file_count += 1
+        except Exception as e:
+            self.stats.inc("disk_errors")
+            logger.warning(f"Error writing cache file: {str(e)}")
+        finally:
+            self.stats.set_latency["disk"].observe(time.perf_counter() - start)
+    
+    def _make_entry(self, value: Any, ttl: int) -> CacheEntry:
+        """Build an entry, compressing the value when it is large enough to benefit.
+        
+        Values stay live objects unless compressed. They are only pickled here when
+        compression or the byte bound needs their serialized size; values that cannot
+        be pickled are kept live with an estimated size.
+        """
+        if not self.compression and self.max_bytes is None:
+            return CacheEntry.live(value, ttl, sys.getsizeof(value))
+        try:
+            data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception:
+            return CacheEntry.live(value, ttl, sys.getsizeof(value))
+        if not self.compression or len(data) < self.compress_threshold:
+            return CacheEntry.live(value, ttl, len(data))
+        
+        compressed = _compress(data, self.compression, self.compression_level)
+        if len(compressed) >= len(data):
+            return CacheEntry.live(value, ttl, len(data))
+        self.stats.inc("compressed_sets")
+        self.stats.inc("compression_saved_bytes", len(data) - len(compressed))
+        return CacheEntry(compressed, ttl, self.compression)
+    
+    def _over_budget(self, incoming: int) -> bool:
+        """Check whether adding an entry of the given size exceeds the memory bound"""
+        if self.max_bytes is not None:
+            return self.stats["memory_bytes"] + incoming > self.max_bytes
+        return len(self.memory_cache) >= self.max_size
+    
+    def _store_memory_entry(self, cache_key: str, entry: CacheEntry) -> bool:
+        """Insert an entry into the memory tier, evicting the oldest ones if full. Caller holds the lock.
+        
+        Returns False for an entry larger than max_bytes, which would evict everything
+        and still not fit; it is counted under the "oversized" stat and not kept in memory.
+        """
+        size = entry.size
+        self._remove_memory_entry(cache_key)
+        if self.max_bytes is not None and size > self.max_bytes:
+            self.stats.inc("oversized")
+            return False
+        
+        while self.memory_cache and self._over_budget(size):
+            # Remove oldest entry
+            oldest_key = next(iter(self.memory_cache))
+            self._remove_memory_entry(oldest_key)
+            self.stats.inc("evictions")
+        
+        self.memory_cache[cache_key] = entry
+        self._entry_sizes[cache_key] = size
+        self.stats.inc("memory_bytes", size)
+        return True
+    
+    def _remove_memory_entry(self, cache_key: str) -> None:
+        """Remove an entry from the memory tier. Caller holds the lock."""
+        if self.memory_cache.pop(cache_key, None) is not None:
+            self.stats.dec("memory_bytes", self._entry_sizes.pop(cache_key, 0))
+    
+    def _unlink_file(self, file_path: Path) -> None:
+        """Remove a cache file and update the disk counters; a file that is already gone is ignored"""
+        try:
+            size = file_path.stat().st_size
+            file_path.unlink()
+        except FileNotFoundError:
+            return
+        with self.lock:
+            self._file_count = max(0, self._file_count - 1)
+            self.stats.dec("disk_bytes", size)
     
     def delete(self, key: Any) -> None:
         """Delete value from cache"""
@@ -126,13 +403,13 @@ class Cache:
         
         # Remove from memory cache
         with self.lock:
-            self.memory_cache.pop(cache_key, None)
+            self._remove_memory_entry(cache_key)
         
         # Remove from file cache
         file_path = self._get_file_path(cache_key)
         if file_path and file_path.exists():
             try:
-                file_path.unlink()
+                self._unlink_file(file_path)
             except Exception as e:
                 logger.warning(f"Error deleting cache file: {str(e)}")
     
@@ -141,12 +418,14 @@ class Cache:
         # Clear memory cache
         with self.lock:
             self.memory_cache.clear()
+            self._entry_sizes.clear()
+            self.stats.counters["memory_bytes"].set(0)
         
         # Clear file cache
         if self.cache_dir:
             try:
                 for file_path in Path(self.cache_dir).glob("*.cache"):
-                    file_path.unlink()
+                    self._unlink_file(file_path)
             except Exception as e:
                 logger.warning(f"Error clearing cache directory: {str(e)}")
     
@@ -173,21 +452,203 @@ class Cache:
         with self.lock:
             memory_size = len(self.memory_cache)
             expired_count = sum(1 for entry in self.memory_cache.values() if entry.is_expired())
-        
-        file_count = 0
-        if self.cache_dir:
-            try:
-                file_count = len(list(Path(self.cache_dir).glob("*.cache")))
-            except Exception as e:
-                logger.warning(f"Error getting cache file count: {str(e)}")
-        
         return {
             "memory_size": memory_size,
+            # Expired entries still held in memory; expirations counts those removed so far
             "expired_count": expired_count,
-            "file_count": file_count,
+            "expirations": self.stats["expirations"],
+            "file_count": self._file_count,
             "max_size": self.max_size,
-            "default_ttl": self.default_ttl
+            "max_bytes": self.max_bytes,
+            "compression": self.compression,
+            "default_ttl": self.default_ttl,
+            "hits": self.stats["hits"],
+            "misses": self.stats["misses"],
+            "hit_rate": self.stats.hit_rate(),
+            "evictions": self.stats["evictions"],
+            "memory_bytes": self.stats["memory_bytes"],
+            "disk_bytes": self.stats["disk_bytes"]
         }
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """Get all live counters and per-tier latency histograms.
+        
+        Cheap enough to be called periodically from the processing pipeline.
+        """
+        data = self.stats.snapshot()
+        data["memory_size"] = len(self.memory_cache)
+        data["file_count"] = self._file_count
+        data["timestamp"] = time.time()
+        return data
+    
+    def log_stats(self) -> Dict[str, Any]:
+        """Log a cache snapshot and return it"""
+        data = self.snapshot()
+        logger.info(
+            "Cache statistics",
+            hits=data["hits"],
+            misses=data["misses"],
+            hit_rate=round(data["hit_rate"], 4),
+            evictions=data["evictions"],
+            expirations=data["expirations"],
+            disk_reads=data["disk_reads"],
+            disk_writes=data["disk_writes"],
+            memory_bytes=data["memory_bytes"],
+            disk_bytes=data["disk_bytes"]
+        )
+        return data
+    
+    def reset_stats(self) -> None:
+        """Reset hit/miss counters and latency histograms"""
+        self.stats.reset()
+    
+    def _iter_entries(self) -> Iterator[Tuple[str, CacheEntry]]:
+        """Iterate over live entries of both tiers, each key once (memory wins)"""
+        with self.lock:
+            memory_items = list(self.memory_cache.items())
+        seen = set()
+        for cache_key, entry in memory_items:
+            if not entry.is_expired():
+                seen.add(cache_key)
+                yield cache_key, entry
+        
+        if not self.cache_dir:
+            return
+        for file_path in Path(self.cache_dir).glob("*.cache"):
+            cache_key = file_path.stem
+            if cache_key in seen:
+                continue
+            try:
+                with open(file_path, "rb") as f:
+                    entry = pickle.load(f)
+            except Exception as e:
+                logger.warning(f"Skipping unreadable cache file {file_path.name}: {str(e)}")
+                continue
+            if not entry.is_expired():
+                seen.add(cache_key)
+                yield cache_key, entry
+    
+    def export_snapshot(self, path: str) -> int:
+        """Stream all live entries into a single snapshot archive.
+        
+        Entries are deduplicated by key and keep their creation time and TTL,
+        so they expire on the importing node exactly when they would have here.
+        
+        Args:
+            path: Archive file path
+            
+        Returns:
+            int: Number of exported entries
+        """
+        tmp_path = f"{path}.tmp"
+        count = 0
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(SNAPSHOT_MAGIC)
+                for cache_key, entry in self._iter_entries():
+                    _write_snapshot_record(f, cache_key, entry)
+                    count += 1
+            os.replace(tmp_path, path)
+        except Exception as e:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise CacheError(f"Error exporting cache snapshot: {str(e)}", error_code="CACHE_ERROR")
+        
+        logger.info("Cache snapshot exported", path=str(path), entries=count)
+        return count
+    
+    def import_snapshot(self, path: str, persist: bool = True, overwrite: bool = False) -> Dict[str, int]:
+        """Load entries from a snapshot archive produced by export_snapshot.
+        
+        Args:
+            path: Archive file path
+            persist: Also write entries to the disk tier when cache_dir is set
+            overwrite: Replace entries that already exist in this cache
+            
+        Returns:
+            Dict[str, int]: Counts of imported, expired, duplicate and existing entries
+        """
+        result = {"imported": 0, "expired": 0, "duplicates": 0, "existing": 0}
+        imported_at: Dict[str, datetime] = {}
+        try:
+            with open(path, "rb") as f:
+                if f.read(len(SNAPSHOT_MAGIC)) != SNAPSHOT_MAGIC:
+                    raise ValueError("not a cache snapshot file")
+                for cache_key, entry in _read_snapshot_records(f):
+                    if entry.is_expired():
+                        result["expired"] += 1
+                        continue
+                    if cache_key in imported_at:
+                        # Keep the newest copy of duplicated keys
+                        result["duplicates"] += 1
+                        if entry.created_at <= imported_at[cache_key]:
+                            continue
+                    elif not overwrite and self._contains_key(cache_key):
+                        result["existing"] += 1
+                        continue
+                    else:
+                        result["imported"] += 1
+                    
+                    imported_at[cache_key] = entry.created_at
+                    with self.lock:
+                        self._store_memory_entry(cache_key, entry.materialize())
+                    if persist and self.cache_dir:
+                        self._write_file(cache_key, entry)
+        except CacheError:
+            raise
+        except Exception as e:
+            raise CacheError(f"Error importing cache snapshot: {str(e)}", error_code="CACHE_ERROR")
+        
+        logger.info("Cache snapshot imported", path=str(path), **result)
+        return result
+    
+    def _contains_key(self, cache_key: str) -> bool:
+        """Check whether a hashed key is present in either tier"""
+        with self.lock:
+            if cache_key in self.memory_cache:
+                return True
+        file_path = self._get_file_path(cache_key)
+        return bool(file_path and file_path.exists())
+
+SNAPSHOT_MAGIC = b"TFCACHE1"
+_RECORD_HEADER = struct.Struct(">HddIB")
+
+def _write_snapshot_record(f: BinaryIO, cache_key: str, entry: CacheEntry) -> None:
+    """Write one length-prefixed snapshot record"""
+    key_bytes = cache_key.encode("ascii")
+    payload, codec = entry.serialized()
+    codec_bytes = codec.encode("ascii")
+    f.write(_RECORD_HEADER.pack(
+        len(key_bytes),
+        entry.created_at.timestamp(),
+        float(entry.ttl),
+        len(payload),
+        len(codec_bytes)
+    ))
+    f.write(key_bytes)
+    f.write(codec_bytes)
+    f.write(payload)
+
+def _read_snapshot_records(f: BinaryIO) -> Iterator[Tuple[str, CacheEntry]]:
+    """Stream records from a snapshot archive"""
+    while True:
+        header = f.read(_RECORD_HEADER.size)
+        if not header:
+            return
+        if len(header) < _RECORD_HEADER.size:
+            raise ValueError("truncated snapshot record")
+        key_len, created_at, ttl, payload_len, codec_len = _RECORD_HEADER.unpack(header)
+        cache_key = f.read(key_len).decode("ascii")
+        codec = f.read(codec_len).decode("ascii")
+        payload = f.read(payload_len)
+        if len(payload) < payload_len:
+            raise ValueError("truncated snapshot record")
+        yield cache_key, CacheEntry(
+            payload,
+            ttl,
+            codec,
+            created_at=datetime.fromtimestamp(created_at)
+        )
 
 class CacheManager:
     """Cache manager singleton"""
@@ -210,11 +671,12 @@ class CacheManager:
         self,
         max_size: int = 1000,
         default_ttl: int = 3600,
-        cache_dir: Optional[str] = None
+        cache_dir: Optional[str] = None,
+        **kwargs
     ) -> Cache:
-        """Setup cache with specified configuration"""
+        """Setup cache with specified configuration (extra kwargs are passed to Cache)"""
         if self._cache is None:
-            self._cache = Cache(max_size, default_ttl, cache_dir)
+            self._cache = Cache(max_size, default_ttl, cache_dir, **kwargs)
         return self._cache
     
     def get_cache(self) -> Cache:
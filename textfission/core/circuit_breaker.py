@@ -0,0 +1,172 @@
+from typing import Any, Callable, Deque, Dict, List, Tuple, TypeVar
+from collections import deque
+from threading import Lock
+import time
+from ..core.exceptions import CircuitOpenError, DeadlineExceeded, ErrorCodes, is_retryable_error
+from ..core.logger import Logger
+from ..core.metrics import Counter
+
+logger = Logger.get_instance()
+
+T = TypeVar("T")
+
+class CircuitBreaker:
+    """Circuit breaker for one provider and model.
+
+    After failure_threshold consecutive transient failures (5xx, 429, timeouts,
+    connection errors) the circuit opens and calls are rejected immediately with
+    CircuitOpenError. After recovery_seconds one probe call is let through
+    (half open); its success closes the circuit, its failure opens it again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int = 5, recovery_seconds: float = 30.0):
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.recovery_seconds = recovery_seconds
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = Lock()
+        self.transitions: Deque[Dict[str, Any]] = deque(maxlen=50)
+        self.counters = {name: Counter() for name in ("calls", "successes", "failures", "rejected", "opened")}
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            self._maybe_half_open(time.monotonic())
+            return self._state
+
+    def retry_in(self) -> float:
+        """Seconds until an open circuit lets a probe through"""
+        with self._lock:
+            if self._state != self.OPEN:
+                return 0.0
+            return max(0.0, self._opened_at + self.recovery_seconds - time.monotonic())
+
+    def _maybe_half_open(self, now: float) -> None:
+        if self._state == self.OPEN and now - self._opened_at >= self.recovery_seconds:
+            self._transition(self.HALF_OPEN, "recovery timeout elapsed")
+
+    def _transition(self, state: str, reason: str) -> None:
+        """Change state and record it. Caller holds the lock."""
+        old_state, self._state = self._state, state
+        self.transitions.append({"timestamp": time.time(), "from": old_state, "to": state, "reason": reason})
+        if state == self.OPEN:
+            self._opened_at = time.monotonic()
+            self.counters["opened"].inc()
+            logger.warning(f"Circuit for {self.name} opened", previous=old_state, reason=reason)
+        else:
+            logger.info(f"Circuit for {self.name} {state.replace('_', ' ')}", previous=old_state, reason=reason)
+
+    def allow(self) -> bool:
+        """Whether a call may go out now (claims the probe slot when half open)"""
+        with self._lock:
+            self._maybe_half_open(time.monotonic())
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._probing = False
+            if self._state != self.CLOSED:
+                self._transition(self.CLOSED, "probe succeeded")
+        self.counters["successes"].inc()
+
+    def record_failure(self, error: BaseException) -> None:
+        with self._lock:
+            self._failures += 1
+            probing, self._probing = self._probing, False
+            if self._state == self.HALF_OPEN and probing:
+                self._transition(self.OPEN, f"probe failed: {error}")
+            elif self._state == self.CLOSED and self._failures >= self.failure_threshold:
+                self._transition(self.OPEN, f"{self._failures} consecutive failures, last: {error}")
+        self.counters["failures"].inc()
+
+    def call(self, func: Callable[..., T], *args, **kwargs) -> T:
+        """Run func through the breaker, rejecting it while the circuit is open"""
+        if not self.allow():
+            self.counters["rejected"].inc()
+            raise CircuitOpenError(
+                f"Circuit for {self.name} is open",
+                error_code=ErrorCodes.CIRCUIT_OPEN,
+                details={"retryable": False, "circuit": self.name, "retry_in": self.retry_in()}
+            )
+        self.counters["calls"].inc()
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            if isinstance(e, DeadlineExceeded) or not is_retryable_error(e):
+                # Our own deadline or a request the provider rejected: not a sign of an outage
+                self._release_probe()
+            else:
+                self.record_failure(e)
+            raise
+        self.record_success()
+        return result
+
+    def _release_probe(self) -> None:
+        with self._lock:
+            self._probing = False
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Get state, consecutive failures and recent transitions"""
+        with self._lock:
+            self._maybe_half_open(time.monotonic())
+            data: Dict[str, Any] = {
+                "name": self.name,
+                "state": self._state,
+                "consecutive_failures": self._failures,
+                "recent_transitions": list(self.transitions)[-10:]
+            }
+        data["retry_in"] = self.retry_in()
+        data.update({name: counter.value for name, counter in self.counters.items()})
+        return data
+
+class CircuitBreakerRegistry:
+    """Process-wide registry with one circuit breaker per provider and model"""
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance._breakers = {}
+            cls._instance._lock = Lock()
+        return cls._instance
+
+    @classmethod
+    def get_instance(cls) -> "CircuitBreakerRegistry":
+        """Get singleton instance"""
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    def get_breaker(self, provider: str, model: str, **kwargs) -> CircuitBreaker:
+        """Get or create the shared breaker (kwargs only apply on creation)"""
+        key: Tuple[str, str] = (provider, model)
+        with self._lock:
+            breaker = self._breakers.get(key)
+            if breaker is None:
+                breaker = CircuitBreaker(name=f"{provider}:{model}", **kwargs)
+                self._breakers[key] = breaker
+            return breaker
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Get state of every registered breaker"""
+        with self._lock:
+            breakers: List[CircuitBreaker] = list(self._breakers.values())
+        return {breaker.name: breaker.snapshot() for breaker in breakers}
+
+    def clear(self) -> None:
+        """Drop all breakers"""
+        with self._lock:
+            self._breakers.clear()
@@ -0,0 +1,283 @@
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Tuple, TypeVar
+from collections import deque
+from concurrent.futures import Executor, Future
+from threading import Condition, Lock
+import contextvars
+import hashlib
+import time
+from ..core.exceptions import Deadline, check_cancelled
+from ..core.logger import Logger
+from ..core.metrics import Counter, LatencyHistogram
+
+logger = Logger.get_instance()
+
+T = TypeVar("T")
+
+_OVERLOAD_MARKERS = ("429", "rate limit", "rate_limit", "ratelimit", "too many requests", "timeout", "timed out")
+
+def is_overload_error(error: BaseException) -> bool:
+    """Check whether an error signals provider overload (rate limiting or timeouts)"""
+    if isinstance(error, TimeoutError):
+        return True
+    status = getattr(error, "status_code", None) or getattr(error, "status", None)
+    if status in (408, 429, 503, 504):
+        return True
+    error_code = getattr(error, "error_code", None)
+    if error_code in ("RATE_LIMIT", "TIMEOUT_ERROR", "OPERATION_TIMEOUT", "CONNECTION_TIMEOUT"):
+        return True
+    name = type(error).__name__.lower()
+    if "ratelimit" in name or "timeout" in name:
+        return True
+    message = str(error).lower()
+    return any(marker in message for marker in _OVERLOAD_MARKERS)
+
+class AdaptiveConcurrencyLimiter:
+    """AIMD limiter for in-flight model requests.
+
+    The limit grows additively (about +1 per window of successful requests)
+    while latency stays close to its moving baseline, and is cut
+    multiplicatively when the provider answers with rate-limit or timeout errors.
+    """
+
+    def __init__(
+        self,
+        initial_limit: int = 4,
+        min_limit: int = 1,
+        max_limit: int = 64,
+        increase: float = 1.0,
+        decrease_factor: float = 0.5,
+        latency_tolerance: float = 2.0,
+        smoothing: float = 0.1,
+        name: str = "default"
+    ):
+        self.name = name
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.increase = increase
+        self.decrease_factor = decrease_factor
+        self.latency_tolerance = latency_tolerance
+        self.smoothing = smoothing
+        self._limit = float(min(max(initial_limit, self.min_limit), self.max_limit))
+        self._inflight = 0
+        self._baseline: Optional[float] = None
+        self._last_decrease = 0.0
+        self._condition = Condition(Lock())
+        self.decisions: Deque[Dict[str, Any]] = deque(maxlen=100)
+        self.counters = {
+            name: Counter() for name in ("requests", "successes", "overloads", "errors", "increases", "decreases")
+        }
+        self.latency = LatencyHistogram()
+        self.max_inflight = 0
+
+    @property
+    def limit(self) -> int:
+        """Current in-flight request limit"""
+        return int(self._limit)
+
+    @property
+    def inflight(self) -> int:
+        return self._inflight
+
+    def acquire(self) -> None:
+        """Block until a request slot is available"""
+        with self._condition:
+            while self._inflight >= int(self._limit):
+                self._condition.wait()
+            self._inflight += 1
+            self.max_inflight = max(self.max_inflight, self._inflight)
+        self.counters["requests"].inc()
+
+    def release(self, latency: float, overloaded: bool = False, failed: bool = False) -> None:
+        """Return a slot and feed the outcome of the request back into the limit"""
+        with self._condition:
+            self._inflight -= 1
+            now = time.monotonic()
+            if overloaded:
+                self.counters["overloads"].inc()
+                # Only cut once per observed round trip so a burst of 429s does not collapse the limit
+                if now - self._last_decrease >= (self._baseline or 0.0):
+                    self._set_limit(max(self.min_limit, self._limit * self.decrease_factor), "overload")
+                    self.counters["decreases"].inc()
+                    self._last_decrease = now
+            elif failed:
+                self.counters["errors"].inc()
+            else:
+                self.counters["successes"].inc()
+                self.latency.observe(latency)
+                stable = self._baseline is None or latency <= self._baseline * self.latency_tolerance
+                self._baseline = latency if self._baseline is None else (
+                    (1 - self.smoothing) * self._baseline + self.smoothing * latency
+                )
+                # Only grow when the current limit is actually being used
+                if stable and self._limit < self.max_limit and self._inflight + 1 >= int(self._limit):
+                    self._set_limit(min(self.max_limit, self._limit + self.increase / self._limit), "stable_latency")
+            self._condition.notify_all()
+
+    def _set_limit(self, new_limit: float, reason: str) -> None:
+        """Apply a new limit and record the decision. Caller holds the lock."""
+        old_limit = int(self._limit)
+        self._limit = new_limit
+        if int(new_limit) == old_limit:
+            return
+
+        if int(new_limit) > old_limit:
+            self.counters["increases"].inc()
+            logger.debug(f"Concurrency limit for {self.name} raised", old=old_limit, new=int(new_limit))
+        else:
+            logger.info(f"Concurrency limit for {self.name} cut", old=old_limit, new=int(new_limit), reason=reason)
+        self.decisions.append({
+            "timestamp": time.time(),
+            "old_limit": old_limit,
+            "new_limit": int(new_limit),
+            "reason": reason
+        })
+
+    def call(self, func: Callable[..., T], *args, **kwargs) -> T:
+        """Run func inside a slot, classifying its outcome"""
+        self.acquire()
+        start = time.perf_counter()
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            self.release(time.perf_counter() - start, overloaded=is_overload_error(e), failed=True)
+            raise
+        self.release(time.perf_counter() - start)
+        return result
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Get current limit, in-flight count and decision history"""
+        with self._condition:
+            data: Dict[str, Any] = {
+                "name": self.name,
+                "limit": int(self._limit),
+                "inflight": self._inflight,
+                "max_inflight": self.max_inflight,
+                "baseline_latency_ms": self._baseline * 1000 if self._baseline is not None else None,
+                "recent_decisions": list(self.decisions)[-10:]
+            }
+        data.update({name: counter.value for name, counter in self.counters.items()})
+        data["latency"] = self.latency.snapshot()
+        return data
+
+class ConcurrencyLimiterRegistry:
+    """Process-wide registry with one adaptive limiter per provider, key and model"""
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance._limiters = {}
+            cls._instance._lock = Lock()
+        return cls._instance
+
+    @classmethod
+    def get_instance(cls) -> "ConcurrencyLimiterRegistry":
+        """Get singleton instance"""
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    def get_limiter(self, provider: str, api_key: str, model: str, **kwargs) -> AdaptiveConcurrencyLimiter:
+        """Get or create the shared limiter (kwargs only apply on creation)"""
+        key_hash = hashlib.sha256((api_key or "").encode("utf-8")).hexdigest()[:12]
+        key: Tuple[str, str, str] = (provider, key_hash, model)
+        with self._lock:
+            limiter = self._limiters.get(key)
+            if limiter is None:
+                limiter = AdaptiveConcurrencyLimiter(name=f"{provider}:{model}:{key_hash}", **kwargs)
+                self._limiters[key] = limiter
+            return limiter
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Get metrics of every registered limiter"""
+        with self._lock:
+            limiters: List[AdaptiveConcurrencyLimiter] = list(self._limiters.values())
+        return {limiter.name: limiter.snapshot() for limiter in limiters}
+
+    def clear(self) -> None:
+        """Drop all limiters"""
+        with self._lock:
+            self._limiters.clear()
+
+def invoke_model(model: Any, prompt: str, method: str = "generate", **kwargs) -> str:
+    """Call model.<method> (generate by default), going through the model's adaptive limiter when it has one"""
+    func = getattr(model, method)
+    limiter = getattr(model, "concurrency_limiter", None)
+    if limiter is None:
+        return func(prompt, **kwargs)
+    return limiter.call(func, prompt, **kwargs)
+
+def _stream_within_deadline(model: Any, prompt: str, **kwargs) -> Iterator[str]:
+    """Iterate model.generate_stream, aborting it once the job deadline expires or the call is cancelled"""
+    deadline = Deadline.current()
+    for delta in model.generate_stream(prompt, **kwargs):
+        if deadline is not None:
+            deadline.check()
+        check_cancelled()
+        yield delta
+
+def stream_model(model: Any, prompt: str, **kwargs) -> Iterator[str]:
+    """Iterate model.generate_stream, holding an adaptive limiter slot until the stream ends"""
+    limiter = getattr(model, "concurrency_limiter", None)
+    if limiter is None:
+        yield from _stream_within_deadline(model, prompt, **kwargs)
+        return
+
+    limiter.acquire()
+    start = time.perf_counter()
+    overloaded = failed = False
+    try:
+        yield from _stream_within_deadline(model, prompt, **kwargs)
+    except Exception as e:
+        overloaded, failed = is_overload_error(e), True
+        raise
+    finally:
+        limiter.release(time.perf_counter() - start, overloaded=overloaded, failed=failed)
+
+def submit_in_context(executor: Executor, func: Callable[..., T], *args, **kwargs) -> "Future[T]":
+    """Submit func so it runs with a copy of the caller's context (job deadline, retry scope)"""
+    return executor.submit(contextvars.copy_context().run, func, *args, **kwargs)
+
+def get_worker_count(config: Any) -> int:
+    """Number of worker threads to use for model calls"""
+    processing = getattr(config, "processing_config", None)
+    if processing is None:
+        return 1
+    if getattr(processing, "adaptive_concurrency", False):
+        # The adaptive limiter decides how many of these may call the provider at once
+        return max(1, processing.max_concurrency)
+    return max(1, processing.max_workers)
+
+def parallel_map(
+    func: Callable[[Any], T],
+    items: List[Any],
+    max_workers: int,
+    show_progress: bool = False,
+    desc: Optional[str] = None
+) -> List[T]:
+    """Apply func to items on a thread pool, returning results in input order.
+
+    The first failure cancels every call that has not started yet and is re-raised.
+    """
+    from concurrent.futures import ThreadPoolExecutor, as_completed
+    from tqdm import tqdm
+
+    max_workers = min(max_workers, len(items))
+    if max_workers <= 1:
+        iterable = tqdm(items, desc=desc) if show_progress else items
+        return [func(item) for item in iterable]
+
+    results: List[Any] = [None] * len(items)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {submit_in_context(executor, func, item): index for index, item in enumerate(items)}
+        completed = as_completed(futures)
+        if show_progress:
+            completed = tqdm(completed, total=len(futures), desc=desc)
+        try:
+            for future in completed:
+                results[futures[future]] = future.result()
+        except BaseException:
+            for future in futures:
+                future.cancel()
+            raise
+    return results
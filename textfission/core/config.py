@@ -2,8 +2,28 @@ from typing import Dict, Any, Optional, List
 from pydantic import BaseModel, Field
 import yaml
 import os
+import copy
 from pathlib import Path
 
+class MockModelConfig(BaseModel):
+    """Behaviour of the "mock" model type used for offline load tests"""
+    seed: int = 0
+    # Latency per request in seconds: "none", "fixed", "uniform", "normal", "lognormal" or
+    # "exponential" with mean latency_mean; latency_sigma is the spread (log-space for lognormal)
+    latency: str = "lognormal"
+    latency_mean: float = 0.2
+    latency_sigma: float = 0.5
+    latency_min: float = 0.0
+    # Fractions of requests failing with a 5xx error or a 429 (with retry_after seconds)
+    error_rate: float = 0.0
+    rate_limit_rate: float = 0.0
+    retry_after: float = 1.0
+    # Fractions of responses cut off mid-JSON (as by max_tokens) or not valid JSON at all
+    truncation_rate: float = 0.0
+    malformed_rate: float = 0.0
+    # Characters per streamed delta
+    stream_chunk_chars: int = 16
+
 class ModelConfig(BaseModel):
     """Model configuration"""
     api_key: str
@@ -17,20 +37,123 @@ class ModelConfig(BaseModel):
     api_keys: List[str] = Field(default_factory=list)
     models: List[str] = Field(default_factory=list)
     use_parallel: bool = False
+    # Client-side rate limits, shared by every model using the same provider, key and model
+    requests_per_minute: Optional[int] = None
+    tokens_per_minute: Optional[int] = None
+    # Structured output for generators: "json_schema", "json_object" or None for plain text
+    response_format: Optional[str] = None
+    # Answer model pool over api_keys x models: "least_outstanding" or "round_robin"; members
+    # failing pool_failure_threshold times in a row are ejected for pool_ejection_seconds
+    pool_strategy: str = "least_outstanding"
+    pool_failure_threshold: int = 3
+    pool_ejection_seconds: float = 30.0
+    # Hedged requests: a call slower than this percentile of recent latencies is duplicated on
+    # another pool member (first valid answer wins), at most hedge_budget_ratio of all calls
+    hedge_percentile: Optional[float] = None
+    hedge_min_samples: int = 20
+    hedge_budget_ratio: float = 0.1
+    # Parallel answers: return once quorum_size models gave valid answers whose text similarity
+    # is at least quorum_similarity, cancelling the rest (None waits for every model)
+    quorum_size: Optional[int] = None
+    quorum_similarity: float = 0.6
+    # HTTP connection pool of the client shared per provider, key and base URL; keep-alive
+    # connections default to the worker count (at least 20) so every worker can reuse one
+    http_max_connections: int = 100
+    http_max_keepalive_connections: Optional[int] = None
+    http_keepalive_expiry: float = 30.0
+    # Circuit breaker per provider and model: opens after circuit_failure_threshold consecutive
+    # transient failures and lets a probe through after circuit_recovery_seconds
+    circuit_breaker: bool = False
+    circuit_failure_threshold: int = 5
+    circuit_recovery_seconds: float = 30.0
+    # Failover chain used in order while earlier circuits are open (enables the breakers).
+    # Entries override model_settings except the endpoint (api_base_url), which is not inherited
+    failover: List["StageModelConfig"] = Field(default_factory=list)
+    # Embedding model (provider default when None) and inputs per embedding request, capped
+    # at what the provider accepts
+    embedding_model: Optional[str] = None
+    embedding_batch_size: Optional[int] = None
+    # Model type EmbeddingService embeds with instead of the generation model, e.g. "local"
+    # for offline lexical vectors of embedding_dimension (default 256)
+    embedding_provider: Optional[str] = None
+    embedding_dimension: Optional[int] = None
+    # Settings of the "mock" model type (model: mock)
+    mock: MockModelConfig = Field(default_factory=MockModelConfig)
+    # Record/replay: with cassette set, every model call is appended to that file ("record") or
+    # served from it without contacting the provider ("replay"); cassette_latency makes replayed
+    # calls take their recorded time
+    cassette: Optional[str] = None
+    cassette_mode: str = "record"
+    cassette_latency: bool = False
+
+class StageModelConfig(BaseModel):
+    """Per-stage model overrides; unset fields inherit from model_settings"""
+    api_key: Optional[str] = None
+    model: Optional[str] = None
+    temperature: Optional[float] = None
+    max_tokens: Optional[int] = None
+    top_p: Optional[float] = None
+    frequency_penalty: Optional[float] = None
+    presence_penalty: Optional[float] = None
+    api_base_url: Optional[str] = None
+    api_keys: Optional[List[str]] = None
+    models: Optional[List[str]] = None
+    use_parallel: Optional[bool] = None
+    requests_per_minute: Optional[int] = None
+    tokens_per_minute: Optional[int] = None
+    response_format: Optional[str] = None
+    pool_strategy: Optional[str] = None
+    hedge_percentile: Optional[float] = None
+    quorum_size: Optional[int] = None
+
+ModelConfig.model_rebuild()
 
 class ProcessingConfig(BaseModel):
     """Processing configuration"""
     max_workers: int = 4
     batch_size: int = 10
     timeout: int = 30
+    # Opt-in timeout in seconds for each provider request (None keeps the client's own,
+    # long enough for long completions), and an optional deadline for a whole create_dataset* job
+    request_timeout: Optional[float] = None
+    job_timeout: Optional[float] = None
     retry_attempts: int = 3
     retry_delay: int = 1
+    # Shared retry policy: exponential backoff with jitter capped at retry_max_delay, and a
+    # global budget of retry_budget_min + retry_budget_ratio * requests per retry_budget_window seconds
+    retry_max_delay: float = 30.0
+    retry_budget_ratio: float = 0.2
+    retry_budget_min: int = 10
+    retry_budget_window: float = 60.0
     cache_size: int = 1000
     cache_ttl: int = 3600
     min_chars: int = 100
     max_chars: int = 2000
     chunk_size: int = 1500
     chunk_overlap: int = 200
+    # AIMD concurrency control: max_workers is the starting limit, max_concurrency the ceiling
+    adaptive_concurrency: bool = False
+    min_concurrency: int = 1
+    max_concurrency: int = 32
+    # Stream question generation and start answering each question as soon as it is parsed
+    stream_questions: bool = False
+    # Staged streaming pipeline for create_dataset*: chunks flow through question and answer
+    # workers to an incremental exporter over bounded queues of pipeline_queue_size items
+    # (default: twice the workers of the consuming stage), so memory stays flat
+    streaming_pipeline: bool = False
+    pipeline_queue_size: Optional[int] = None
+    # Offline batch mode for create_dataset_from_files: both stages go through the provider's
+    # OpenAI-compatible batch API; request and output JSONL files are kept in batch_dir
+    # (in a temporary directory removed after each batch when None)
+    batch_mode: bool = False
+    batch_poll_interval: float = 30.0
+    batch_completion_window: str = "24h"
+    batch_dir: Optional[str] = None
+    # Embedding cache used by EmbeddingService: vectors are kept on disk in embedding_cache_dir
+    # (memory only when None) and looked up by content hash
+    embedding_cache_dir: Optional[str] = None
+    embedding_cache_size: int = 100000
+    embedding_cache_ttl: int = 30 * 24 * 3600
 
 class ExportConfig(BaseModel):
     """Export configuration"""
@@ -70,6 +193,9 @@ class Config(BaseModel):
     processing_config: ProcessingConfig
     export_config: ExportConfig
     custom_config: CustomConfig
+    # Optional overrides for the question and answer stages, e.g. a cheaper model for questions
+    question_model_settings: Optional[StageModelConfig] = None
+    answer_model_settings: Optional[StageModelConfig] = None
 
     class Config:
         validate_by_name = True
@@ -97,6 +223,10 @@ class Config(BaseModel):
         with open(yaml_path, "w", encoding="utf-8") as f:
             yaml.dump(config_dict, f, allow_unicode=True)
 
+    def for_stage(self, stage: str) -> "Config":
+        """Get the configuration with model_settings overridden for a stage ("question" or "answer")"""
+        return resolve_stage_config(self, stage)
+
     def to_dict(self) -> Dict[str, Any]:
         """Convert configuration to dictionary"""
         config_dict = self.model_dump()
@@ -107,6 +237,39 @@ class Config(BaseModel):
         
         return config_dict
 
+def resolve_stage_config(config: Any, stage: Optional[str]) -> Any:
+    """Return config with the <stage>_model_settings overrides merged into model_settings.
+    
+    A stage model or api_key replaces the inherited models or api_keys list unless the
+    stage sets that list too. The original config is returned unchanged when the stage
+    has no overrides.
+    """
+    overrides = getattr(config, f"{stage}_model_settings", None) if stage else None
+    if overrides is None:
+        return config
+    if isinstance(overrides, dict):
+        values = {key: value for key, value in overrides.items() if value is not None}
+    else:
+        values = overrides.model_dump(exclude_none=True)
+    if not values:
+        return config
+    # Otherwise the inherited lists, which take precedence when pooling, would shadow the override
+    if "model" in values and "models" not in values:
+        values["models"] = []
+    if "api_key" in values and "api_keys" not in values:
+        values["api_keys"] = []
+    
+    return with_model_settings(config, **values)
+
+def with_model_settings(config: Any, **updates) -> Any:
+    """Return a copy of config whose model_settings have some fields replaced"""
+    model_settings = config.model_settings.model_copy(update=updates)
+    if isinstance(config, BaseModel):
+        return config.model_copy(update={"model_settings": model_settings})
+    updated = copy.copy(config)
+    updated.model_settings = model_settings
+    return updated
+
 class ConfigManager:
     """Configuration manager"""
     _instance = None
@@ -1,5 +1,13 @@
+import builtins
+import json
+import random
 import time
-from typing import Optional, Dict, Any
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from email.utils import parsedate_to_datetime
+from threading import Event, Lock
+from typing import Optional, Dict, Any, Callable, Deque, Iterator, TypeVar
 from ..core.logger import Logger
 
 logger = Logger.get_instance()
@@ -57,6 +65,10 @@ class APIError(TextFissionError):
     """API related errors"""
     pass
 
+class RateLimitError(APIError):
+    """Provider rate limit (HTTP 429) errors"""
+    pass
+
 class ResourceError(TextFissionError):
     """Resource related errors"""
     pass
@@ -69,6 +81,18 @@ class RetryError(TextFissionError):
     """Retry related errors"""
     pass
 
+class DeadlineExceeded(TimeoutError):
+    """The job deadline expired; never retried"""
+    pass
+
+class CallCancelled(TextFissionError):
+    """The caller no longer needs the result of a model call; never retried"""
+    pass
+
+class CircuitOpenError(ModelError):
+    """A provider's circuit breaker is open; never retried"""
+    pass
+
 class ErrorHandler:
     """Error handling utility class"""
     
@@ -107,40 +131,443 @@ class ErrorHandler:
         max_attempts: int = 3,
         delay: float = 1.0,
         backoff: float = 2.0,
-        error_codes: Optional[list] = None
+        error_codes: Optional[list] = None,
+        policy: Optional["RetryPolicy"] = None
     ):
-        """Retry decorator for handling retryable errors"""
+        """Retry decorator for handling retryable errors
+        
+        Without a policy, TextFissionErrors (optionally filtered by error_codes) are
+        retried with plain exponential backoff. With a policy, its classification,
+        jittered backoff, Retry-After handling and retry budget are used instead.
+        """
+        if policy is None:
+            def retryable(error: BaseException) -> bool:
+                return isinstance(error, TextFissionError) and (
+                    not error_codes or error.error_code in error_codes
+                )
+            policy = RetryPolicy(
+                max_attempts=max_attempts,
+                base_delay=delay,
+                multiplier=backoff,
+                max_delay=float("inf"),
+                jitter=False,
+                budget=None,
+                retryable=retryable
+            )
+        
         def wrapper(*args, **kwargs):
-            last_error = None
-            current_delay = delay
-            
-            for attempt in range(max_attempts):
+            try:
+                return policy.execute(func, *args, **kwargs)
+            except RetryExhausted as e:
+                raise RetryError(
+                    f"Max retry attempts ({e.attempts}) exceeded",
+                    error_code="MAX_RETRIES_EXCEEDED",
+                    details={"last_error": str(e.last_error)}
+                )
+            except TextFissionError:
+                raise
+            except Exception as e:
+                raise ErrorHandler.handle_error(e)
+        
+        return wrapper
+    
+    @staticmethod
+    def wrap_provider_error(error: Exception, message: str) -> "ModelError":
+        """Convert a provider SDK exception into a ModelError carrying retry information"""
+        if isinstance(error, TextFissionError):
+            return error
+        
+        status = get_status_code(error)
+        details = {
+            "status_code": status,
+            "retry_after": get_retry_after(error),
+            "retryable": is_retryable_error(error),
+            "provider_error": type(error).__name__
+        }
+        if status == 429:
+            return RateLimitError(message, error_code=ErrorCodes.RATE_LIMIT, details=details)
+        if isinstance(error, builtins.TimeoutError) or "timeout" in type(error).__name__.lower():
+            return TimeoutError(message, error_code=ErrorCodes.CONNECTION_TIMEOUT, details=details)
+        return ModelError(message, error_code=ErrorCodes.API_ERROR, details=details)
+
+T = TypeVar("T")
+
+_RETRYABLE_STATUS = {408, 409, 425, 429, 500, 502, 503, 504}
+_NON_RETRYABLE_TYPES = (
+    DeadlineExceeded,
+    CallCancelled,
+    CircuitOpenError,
+    ValidationError,
+    ConfigurationError,
+    RetryError,
+    TypeError,
+    KeyError,
+    AttributeError,
+    NotImplementedError
+)
+
+def get_status_code(error: BaseException) -> Optional[int]:
+    """Get the HTTP status code attached to an exception, if any"""
+    for candidate in (error, getattr(error, "__cause__", None)):
+        if candidate is None:
+            continue
+        details = getattr(candidate, "details", None)
+        if isinstance(details, dict) and isinstance(details.get("status_code"), int):
+            return details["status_code"]
+        for attr in ("status_code", "status", "http_status"):
+            value = getattr(candidate, attr, None)
+            if isinstance(value, int):
+                return value
+    return None
+
+def get_retry_after(error: BaseException) -> Optional[float]:
+    """Get the Retry-After delay (seconds) attached to an exception, if any"""
+    for candidate in (error, getattr(error, "__cause__", None)):
+        if candidate is None:
+            continue
+        details = getattr(candidate, "details", None)
+        if isinstance(details, dict) and details.get("retry_after") is not None:
+            return float(details["retry_after"])
+        value = getattr(candidate, "retry_after", None)
+        if isinstance(value, (int, float)):
+            return float(value)
+        response = getattr(candidate, "response", None)
+        headers = getattr(response, "headers", None)
+        if headers is None:
+            continue
+        try:
+            header = headers.get("retry-after-ms")
+            if header is not None:
+                return float(header) / 1000.0
+            header = headers.get("retry-after")
+        except Exception:
+            continue
+        if header is None:
+            continue
+        try:
+            return max(0.0, float(header))
+        except (TypeError, ValueError):
+            try:
+                return max(0.0, parsedate_to_datetime(header).timestamp() - time.time())
+            except (TypeError, ValueError):
+                continue
+    return None
+
+def is_retryable_error(error: BaseException) -> bool:
+    """Classify an exception as transient (worth retrying) or permanent"""
+    details = getattr(error, "details", None)
+    if isinstance(details, dict) and isinstance(details.get("retryable"), bool):
+        return details["retryable"]
+    if isinstance(error, json.JSONDecodeError):
+        # Malformed model output; a new sample may parse
+        return True
+    if isinstance(error, _NON_RETRYABLE_TYPES) or type(error) is ValueError:
+        return False
+    
+    status = get_status_code(error)
+    if status is not None:
+        return status in _RETRYABLE_STATUS
+    return True
+
+class RetryExhausted(Exception):
+    """Raised by RetryPolicy.execute when every attempt failed with a retryable error"""
+    
+    def __init__(self, attempts: int, last_error: BaseException):
+        self.attempts = attempts
+        self.last_error = last_error
+        super().__init__(f"Gave up after {attempts} attempts: {last_error}")
+
+class RetryBudget:
+    """Global cap on retries per time window.
+    
+    Within every window at most min_retries + ratio * requests retries are
+    allowed, so a provider outage cannot multiply the request volume.
+    """
+    _shared: Optional["RetryBudget"] = None
+    _shared_lock = Lock()
+    
+    def __init__(self, ratio: float = 0.2, min_retries: int = 10, window: float = 60.0):
+        self.ratio = ratio
+        self.min_retries = min_retries
+        self.window = window
+        self._requests: Deque[float] = deque()
+        self._retries: Deque[float] = deque()
+        self._lock = Lock()
+        self.exhausted_count = 0
+    
+    @classmethod
+    def shared(cls, **kwargs) -> "RetryBudget":
+        """Get the process-wide budget (kwargs only apply on creation)"""
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls(**kwargs)
+            return cls._shared
+    
+    def _prune(self, now: float) -> None:
+        for events in (self._requests, self._retries):
+            while events and now - events[0] > self.window:
+                events.popleft()
+    
+    def record_request(self) -> None:
+        """Record a first attempt"""
+        with self._lock:
+            now = time.monotonic()
+            self._prune(now)
+            self._requests.append(now)
+    
+    def try_spend(self) -> bool:
+        """Take one retry from the budget if available"""
+        with self._lock:
+            now = time.monotonic()
+            self._prune(now)
+            if len(self._retries) >= self.min_retries + self.ratio * len(self._requests):
+                self.exhausted_count += 1
+                return False
+            self._retries.append(now)
+            return True
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """Get requests and retries in the current window"""
+        with self._lock:
+            self._prune(time.monotonic())
+            return {
+                "requests": len(self._requests),
+                "retries": len(self._retries),
+                "exhausted": self.exhausted_count,
+                "window": self.window
+            }
+
+_retry_scope: ContextVar[bool] = ContextVar("textfission_retry_scope", default=False)
+_deadline: ContextVar[Optional["Deadline"]] = ContextVar("textfission_deadline", default=None)
+_cancellation: ContextVar[Optional[Event]] = ContextVar("textfission_cancellation", default=None)
+
+class Deadline:
+    """Point in time by which a whole job must finish.
+    
+    Inside deadline_scope() model calls cap their request timeout at the remaining
+    time, and retries stop once the remainder cannot cover another attempt.
+    """
+    
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.expires_at = time.monotonic() + seconds
+    
+    @classmethod
+    def from_config(cls, config: Any) -> Optional["Deadline"]:
+        """Start the job deadline from ProcessingConfig.job_timeout, or None when unset"""
+        processing = getattr(config, "processing_config", None)
+        seconds = getattr(processing, "job_timeout", None)
+        return cls(seconds) if seconds else None
+    
+    @staticmethod
+    def current() -> Optional["Deadline"]:
+        """Deadline of the running job, if any"""
+        return _deadline.get()
+    
+    def remaining(self) -> float:
+        """Seconds left, never negative"""
+        return max(0.0, self.expires_at - time.monotonic())
+    
+    def expired(self) -> bool:
+        return time.monotonic() >= self.expires_at
+    
+    def check(self) -> None:
+        """Raise DeadlineExceeded once the deadline has passed"""
+        if self.expired():
+            raise DeadlineExceeded(
+                f"Job deadline of {self.seconds}s exceeded",
+                error_code=ErrorCodes.DEADLINE_EXCEEDED,
+                details={"retryable": False}
+            )
+
+@contextmanager
+def deadline_scope(deadline: Optional[Deadline]) -> Iterator[Optional[Deadline]]:
+    """Make deadline the current one for the block (a no-op for None)"""
+    if deadline is None:
+        yield None
+        return
+    token = _deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _deadline.reset(token)
+
+@contextmanager
+def cancellation_scope(event: Optional[Event]) -> Iterator[Optional[Event]]:
+    """Make event the cancel signal of model calls started in the block (a no-op for None).
+    
+    Once it is set, calls stop retrying, requests not yet sent are not sent and
+    streams and mock requests in flight abort with CallCancelled.
+    """
+    if event is None:
+        yield None
+        return
+    token = _cancellation.set(event)
+    try:
+        yield event
+    finally:
+        _cancellation.reset(token)
+
+def check_cancelled() -> None:
+    """Raise CallCancelled once the current cancellation event is set"""
+    event = _cancellation.get()
+    if event is not None and event.is_set():
+        raise CallCancelled(
+            "Model call cancelled",
+            error_code=ErrorCodes.CANCELLED,
+            details={"retryable": False}
+        )
+
+def sleep_unless_cancelled(seconds: float) -> None:
+    """Sleep, waking up early and raising CallCancelled when the call is cancelled"""
+    event = _cancellation.get()
+    if event is None:
+        time.sleep(seconds)
+        return
+    event.wait(seconds)
+    check_cancelled()
+
+def get_request_timeout(timeout: Optional[float]) -> Optional[float]:
+    """Per-request timeout capped by the remaining job deadline; raises if it already expired"""
+    deadline = _deadline.get()
+    if deadline is None:
+        return timeout
+    deadline.check()
+    remaining = deadline.remaining()
+    return remaining if timeout is None else min(timeout, remaining)
+
+class RetryPolicy:
+    """Single retry engine: classification, exponential backoff with full jitter,
+    Retry-After support and a shared retry budget.
+    
+    Policies do not stack: a policy executed inside another policy's attempt
+    makes a single attempt and leaves retrying to the outermost one.
+    """
+    
+    def __init__(
+        self,
+        max_attempts: int = 3,
+        base_delay: float = 1.0,
+        max_delay: float = 30.0,
+        multiplier: float = 2.0,
+        jitter: bool = True,
+        budget: Optional[RetryBudget] = None,
+        retryable: Optional[Callable[[BaseException], bool]] = None,
+        max_retry_after: float = 120.0
+    ):
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.multiplier = multiplier
+        self.jitter = jitter
+        self.budget = budget
+        self.retryable = retryable or is_retryable_error
+        self.max_retry_after = max_retry_after
+    
+    @classmethod
+    def from_config(cls, config: Any, **overrides) -> "RetryPolicy":
+        """Build the policy from ProcessingConfig, sharing the global retry budget"""
+        processing = getattr(config, "processing_config", None)
+        params = {
+            "max_attempts": getattr(processing, "retry_attempts", 3),
+            "base_delay": getattr(processing, "retry_delay", 1.0),
+            "max_delay": getattr(processing, "retry_max_delay", 30.0),
+            "budget": RetryBudget.shared(
+                ratio=getattr(processing, "retry_budget_ratio", 0.2),
+                min_retries=getattr(processing, "retry_budget_min", 10),
+                window=getattr(processing, "retry_budget_window", 60.0)
+            )
+        }
+        params.update({k: v for k, v in overrides.items() if v is not None})
+        return cls(**params)
+    
+    def with_overrides(self, **overrides) -> "RetryPolicy":
+        """Copy of this policy with some parameters replaced (None values are ignored)"""
+        params = {
+            "max_attempts": self.max_attempts,
+            "base_delay": self.base_delay,
+            "max_delay": self.max_delay,
+            "multiplier": self.multiplier,
+            "jitter": self.jitter,
+            "budget": self.budget,
+            "retryable": self.retryable,
+            "max_retry_after": self.max_retry_after
+        }
+        params.update({k: v for k, v in overrides.items() if v is not None})
+        return RetryPolicy(**params)
+    
+    def compute_delay(self, attempt: int, error: Optional[BaseException] = None) -> float:
+        """Delay before the next attempt (attempt counts from 1)"""
+        delay = min(self.max_delay, self.base_delay * (self.multiplier ** (attempt - 1)))
+        if self.jitter:
+            delay = random.uniform(0, delay)
+        retry_after = get_retry_after(error) if error is not None else None
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.max_retry_after))
+        return delay
+    
+    @staticmethod
+    def in_scope() -> bool:
+        """Whether the caller already runs inside a retrying policy"""
+        return _retry_scope.get()
+    
+    @contextmanager
+    def _scope(self) -> Iterator[None]:
+        token = _retry_scope.set(True)
+        try:
+            yield
+        finally:
+            _retry_scope.reset(token)
+    
+    def execute(self, func: Callable[..., T], *args, **kwargs) -> T:
+        """Call func, retrying retryable failures.
+        
+        Non-retryable errors, budget denials and retries the job deadline cannot
+        fit propagate unchanged; running out of attempts raises RetryExhausted.
+        A cancelled call (see cancellation_scope) makes no further attempt.
+        """
+        if self.in_scope():
+            # An outer policy owns retrying
+            return func(*args, **kwargs)
+        
+        if self.budget is not None:
+            self.budget.record_request()
+        
+        deadline = _deadline.get()
+        with self._scope():
+            for attempt in range(1, self.max_attempts + 1):
+                check_cancelled()
+                if deadline is not None:
+                    deadline.check()
+                started = time.monotonic()
                 try:
                     return func(*args, **kwargs)
-                except TextFissionError as e:
-                    last_error = e
-                    if error_codes and e.error_code not in error_codes:
+                except Exception as e:
+                    if not self.retryable(e):
+                        raise
+                    if attempt >= self.max_attempts:
+                        raise RetryExhausted(attempt, e) from e
+                    if self.budget is not None and not self.budget.try_spend():
+                        logger.warning("Retry budget exhausted, not retrying", error=str(e))
                         raise
                     
-                    if attempt < max_attempts - 1:
+                    delay = self.compute_delay(attempt, e)
+                    # Assume the next attempt takes as long as this one did
+                    if deadline is not None and deadline.remaining() < delay + time.monotonic() - started:
                         logger.warning(
-                            f"Retry attempt {attempt + 1} of {max_attempts}",
-                            error_code=e.error_code,
-                            delay=current_delay
-                        )
-                        time.sleep(current_delay)
-                        current_delay *= backoff
-                    else:
-                        raise RetryError(
-                            f"Max retry attempts ({max_attempts}) exceeded",
-                            error_code="MAX_RETRIES_EXCEEDED",
-                            details={"last_error": str(last_error)}
+                            "Remaining deadline cannot cover another attempt, not retrying",
+                            error=str(e),
+                            remaining=round(deadline.remaining(), 3)
                         )
-                except Exception as e:
-                    last_error = ErrorHandler.handle_error(e)
-                    raise last_error
-        
-        return wrapper
+                        raise
+                    logger.warning(
+                        f"Retry attempt {attempt} of {self.max_attempts - 1}",
+                        error=str(e),
+                        error_code=getattr(e, "error_code", None),
+                        delay=round(delay, 3)
+                    )
+                    sleep_unless_cancelled(delay)
+        raise AssertionError("unreachable")
 
 class ErrorCodes:
     """Error code constants"""
@@ -154,6 +581,7 @@ class ErrorCodes:
     MODEL_ERROR = "MODEL_ERROR"
     API_ERROR = "API_ERROR"
     RATE_LIMIT = "RATE_LIMIT"
+    CIRCUIT_OPEN = "CIRCUIT_OPEN"
     INVALID_RESPONSE = "INVALID_RESPONSE"
     
     # Generation errors
@@ -165,6 +593,8 @@ class ErrorCodes:
     PROCESSING_ERROR = "PROCESSING_ERROR"
     INVALID_INPUT = "INVALID_INPUT"
     PROCESSING_TIMEOUT = "PROCESSING_TIMEOUT"
+    DEADLINE_EXCEEDED = "DEADLINE_EXCEEDED"
+    CANCELLED = "CANCELLED"
     
     # Validation errors
     VALIDATION_ERROR = "VALIDATION_ERROR"
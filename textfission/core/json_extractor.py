@@ -0,0 +1,189 @@
+from typing import Any, Dict, List, Optional, Tuple
+import json
+import re
+from ..core.exceptions import GenerationError
+from ..core.logger import Logger
+
+logger = Logger.get_instance()
+
+# Tokens that matter for structure: whole strings (possibly unterminated) and brackets/commas.
+# The string alternative is linear: it never backtracks into the string body.
+_TOKEN = re.compile(r'"(?:[^"\\]|\\.)*(")?|[{}\[\],]')
+_OPENER_OF = {"}": "{", "]": "["}
+_CLOSER_OF = {"{": "}", "[": "]"}
+_decoder = json.JSONDecoder()
+
+def extract_json(response: str, repair: bool = True) -> Any:
+    """Extract the first JSON object from a model response.
+
+    Handles surrounding prose and markdown code fences. With repair enabled, a
+    response cut off by max_tokens is closed after its last complete array item
+    instead of failing. Raises GenerationError for empty responses and
+    json.JSONDecodeError when nothing can be parsed.
+    """
+    if not response or not response.strip():
+        raise GenerationError("Model returned empty response")
+
+    start = response.find("{")
+    while start != -1:
+        # Fast path: the C decoder reads exactly one object starting here
+        try:
+            return _decoder.raw_decode(response, start)[0]
+        except json.JSONDecodeError:
+            pass
+
+        truncated, repaired = _scan(response, start)
+        if truncated:
+            if repair and repaired is not None:
+                try:
+                    result = json.loads(repaired)
+                except json.JSONDecodeError:
+                    result = None
+                if result is not None:
+                    logger.info(
+                        "Repaired truncated JSON response",
+                        kept_chars=len(repaired),
+                        response_chars=len(response) - start
+                    )
+                    return result
+            # Every later brace is nested inside this unterminated object
+            break
+        start = response.find("{", start + 1)
+
+    return json.loads(response)
+
+def repair_truncated_json(text: str, start: int = 0) -> Optional[str]:
+    """Close a JSON value that runs off the end of text.
+
+    Returns the text cut after its last complete array item or nested value with
+    the open structures closed, or None if the value is not truncated or has no
+    clean cut point.
+    """
+    return _scan(text, start)[1]
+
+def _scan(text: str, start: int) -> Tuple[bool, Optional[str]]:
+    """Single pass over the value opening at start.
+
+    Tracks open brackets outside strings and, per depth, the last position where
+    the value can be cut cleanly. Complete nested values are skipped with the C
+    decoder. Returns whether the value runs off the end of text and, if so, its
+    repaired form (None when there is no clean cut point).
+    """
+    stack: List[str] = []
+    cuts: Dict[int, int] = {}  # depth -> last clean cut position at that depth
+    pos = start
+
+    while True:
+        match = _TOKEN.search(text, pos)
+        if match is None:
+            break
+        token = match.group(0)
+        pos = match.end()
+        if token[0] == '"':
+            if match.group(1) is None:
+                break  # cut off inside a string
+        elif token in _CLOSER_OF:
+            if stack:
+                try:
+                    pos = _decoder.raw_decode(text, match.start())[1]
+                except json.JSONDecodeError:
+                    pass
+                else:
+                    cuts[len(stack)] = pos
+                    continue
+            stack.append(token)
+            if token == "[":
+                cuts[len(stack)] = pos
+        elif token in _OPENER_OF:
+            if not stack or stack.pop() != _OPENER_OF[token]:
+                return False, None
+            if not stack:
+                return False, None  # balanced, so not truncated
+            for depth in [depth for depth in cuts if depth > len(stack)]:
+                del cuts[depth]
+            cuts[len(stack)] = pos
+        elif stack and stack[-1] == "[":
+            # Comma between array items: everything before it is complete
+            cuts[len(stack)] = match.start()
+
+    if not stack:
+        return False, None
+
+    # Drop a partial object or array that is an element of an array rather than keep it half filled
+    limit = len(stack)
+    for depth in range(1, len(stack)):
+        if stack[depth - 1] == "[":
+            limit = depth
+            break
+    candidates = [(position, depth) for depth, position in cuts.items() if depth <= limit]
+    if not candidates:
+        return True, None
+    position, depth = max(candidates)
+    return True, text[start:position] + "".join(_CLOSER_OF[opener] for opener in reversed(stack[:depth]))
+
+class IncrementalArrayParser:
+    """Parse the elements of one JSON array while the text streams in.
+
+    feed() returns every object or array element completed by the new text, so
+    callers can act on items before the response is finished. The array is the
+    one under key, or the first array when key is None.
+    """
+
+    def __init__(self, key: Optional[str] = None):
+        self._array_start = re.compile(r'"%s"\s*:\s*\[' % re.escape(key) if key else r"\[")
+        self._buffer = ""
+        self._pos = 0
+        self._in_array = False
+        self._depth = 0
+        self._element_start: Optional[int] = None
+        self._in_string = False
+        self._escape = False
+        self.finished = False
+
+    def feed(self, text: str) -> List[Any]:
+        """Add streamed text and return the elements it completed"""
+        items: List[Any] = []
+        if self.finished or not text:
+            return items
+        self._buffer += text
+
+        if not self._in_array:
+            match = self._array_start.search(self._buffer)
+            if match is None:
+                return items
+            self._in_array = True
+            self._pos = match.end()
+
+        buffer = self._buffer
+        pos = self._pos
+        while pos < len(buffer):
+            char = buffer[pos]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in _CLOSER_OF:
+                if self._depth == 0:
+                    self._element_start = pos
+                self._depth += 1
+            elif char in _OPENER_OF:
+                if self._depth == 0:
+                    # End of the array itself
+                    self.finished = True
+                    pos += 1
+                    break
+                self._depth -= 1
+                if self._depth == 0 and self._element_start is not None:
+                    try:
+                        items.append(json.loads(buffer[self._element_start:pos + 1]))
+                    except json.JSONDecodeError as e:
+                        logger.debug("Skipping malformed streamed array element", error=str(e))
+                    self._element_start = None
+            pos += 1
+        self._pos = pos
+        return items
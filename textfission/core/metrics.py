@@ -0,0 +1,132 @@
+from typing import Any, Dict, Optional, Sequence
+from bisect import bisect_left
+from threading import Lock
+import time
+
+# Upper bounds (milliseconds) of the default latency buckets. The last bucket is open ended.
+DEFAULT_LATENCY_BUCKETS_MS = (
+    0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500,
+    1000, 2500, 5000, 10000, 30000, 60000
+)
+
+class Counter:
+    """Thread-safe integer counter: inc() counts events, dec() and set() let it serve as a gauge (e.g. bytes stored)"""
+
+    def __init__(self, value: int = 0):
+        self._value = value
+        self._lock = Lock()
+
+    def inc(self, amount: int = 1) -> None:
+        """Increase counter"""
+        with self._lock:
+            self._value += amount
+
+    def dec(self, amount: int = 1) -> None:
+        """Decrease counter (used for gauges such as bytes stored)"""
+        with self._lock:
+            self._value -= amount
+
+    def set(self, value: int) -> None:
+        """Set counter value"""
+        with self._lock:
+            self._value = value
+
+    @property
+    def value(self) -> int:
+        return self._value
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram with O(1) memory and cheap snapshots"""
+
+    def __init__(self, buckets_ms: Sequence[float] = DEFAULT_LATENCY_BUCKETS_MS):
+        self.buckets_ms = tuple(buckets_ms)
+        self._counts = [0] * (len(self.buckets_ms) + 1)
+        self._count = 0
+        self._sum_ms = 0.0
+        self._min_ms: Optional[float] = None
+        self._max_ms: Optional[float] = None
+        self._lock = Lock()
+
+    def observe(self, seconds: float) -> None:
+        """Record a latency sample given in seconds"""
+        ms = seconds * 1000.0
+        index = bisect_left(self.buckets_ms, ms)
+        with self._lock:
+            self._counts[index] += 1
+            self._count += 1
+            self._sum_ms += ms
+            if self._min_ms is None or ms < self._min_ms:
+                self._min_ms = ms
+            if self._max_ms is None or ms > self._max_ms:
+                self._max_ms = ms
+
+    def time(self) -> "_Timer":
+        """Context manager recording the elapsed time of its block"""
+        return _Timer(self)
+
+    @property
+    def count(self) -> int:
+        return self._count
+
+    def percentile(self, p: float) -> Optional[float]:
+        """Estimate the p-th percentile (0-100) in milliseconds from bucket bounds"""
+        with self._lock:
+            counts = list(self._counts)
+            total = self._count
+            max_ms = self._max_ms
+        if not total:
+            return None
+
+        rank = max(1, int(round(total * p / 100.0)))
+        seen = 0
+        for index, bucket_count in enumerate(counts):
+            seen += bucket_count
+            if seen >= rank:
+                if index < len(self.buckets_ms):
+                    return min(self.buckets_ms[index], max_ms)
+                return max_ms
+        return max_ms
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Get a point-in-time summary of the histogram"""
+        with self._lock:
+            count = self._count
+            sum_ms = self._sum_ms
+            min_ms = self._min_ms
+            max_ms = self._max_ms
+            counts = list(self._counts)
+
+        labels = [f"le_{bound:g}ms" for bound in self.buckets_ms] + ["inf"]
+        return {
+            "count": count,
+            "mean_ms": sum_ms / count if count else 0.0,
+            "min_ms": min_ms,
+            "max_ms": max_ms,
+            "p50_ms": self.percentile(50),
+            "p90_ms": self.percentile(90),
+            "p99_ms": self.percentile(99),
+            "buckets": {label: n for label, n in zip(labels, counts) if n}
+        }
+
+    def reset(self) -> None:
+        """Reset all samples"""
+        with self._lock:
+            self._counts = [0] * (len(self.buckets_ms) + 1)
+            self._count = 0
+            self._sum_ms = 0.0
+            self._min_ms = None
+            self._max_ms = None
+
+class _Timer:
+    """Context manager feeding a LatencyHistogram"""
+
+    def __init__(self, histogram: LatencyHistogram):
+        self.histogram = histogram
+        self.start = 0.0
+
+    def __enter__(self) -> "_Timer":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.histogram.observe(time.perf_counter() - self.start)
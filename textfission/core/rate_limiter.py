@@ -0,0 +1,239 @@
+from typing import Any, Dict, Optional, Tuple
+from dataclasses import dataclass
+from threading import Lock
+import hashlib
+import re
+import time
+from ..core.exceptions import CallCancelled, sleep_unless_cancelled
+from ..core.logger import Logger
+from ..core.metrics import Counter, LatencyHistogram
+
+try:
+    import tiktoken
+except ImportError:  # fall back to a character based estimate
+    tiktoken = None
+
+logger = Logger.get_instance()
+
+_CJK_PATTERN = re.compile(r"[\u3000-\u303f\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\uff00-\uffef]")
+_encoding = None
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the number of tokens in text before sending it to a provider"""
+    global _encoding
+    if not text:
+        return 0
+    if tiktoken is not None:
+        try:
+            if _encoding is None:
+                _encoding = tiktoken.get_encoding("cl100k_base")
+            return len(_encoding.encode(text))
+        except Exception:
+            pass
+    # CJK characters are roughly one token each, other text roughly four characters per token
+    cjk_chars = len(_CJK_PATTERN.findall(text))
+    return cjk_chars + (len(text) - cjk_chars) // 4 + 1
+
+class TokenBucket:
+    """Token bucket that lets callers reserve capacity ahead of time.
+
+    Reservations may drive the bucket negative; the caller is told how long to
+    wait until its reservation is covered, which keeps waiters in FIFO order.
+    """
+
+    def __init__(self, capacity: float, refill_per_second: float):
+        self.capacity = float(capacity)
+        self.refill_per_second = float(refill_per_second)
+        self.tokens = float(capacity)
+        self.updated_at = time.monotonic()
+        self.lock = Lock()
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self.updated_at
+        if elapsed > 0:
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.refill_per_second)
+            self.updated_at = now
+
+    def reserve(self, amount: float) -> float:
+        """Take amount from the bucket and return the seconds to wait before using it"""
+        with self.lock:
+            self._refill(time.monotonic())
+            self.tokens -= amount
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.refill_per_second
+
+    def adjust(self, delta: float) -> None:
+        """Give back (positive) or charge (negative) tokens after the fact"""
+        with self.lock:
+            self._refill(time.monotonic())
+            self.tokens = min(self.capacity, self.tokens + delta)
+
+    def available(self) -> float:
+        """Currently available tokens"""
+        with self.lock:
+            self._refill(time.monotonic())
+            return self.tokens
+
+@dataclass
+class RateLimitReservation:
+    """Capacity reserved for one request"""
+    estimated_tokens: int
+    waited: float
+
+class RateLimiter:
+    """Client-side limiter for requests per minute and tokens per minute"""
+
+    def __init__(
+        self,
+        requests_per_minute: Optional[int] = None,
+        tokens_per_minute: Optional[int] = None,
+        name: str = "default"
+    ):
+        self.name = name
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.request_bucket = (
+            TokenBucket(requests_per_minute, requests_per_minute / 60.0)
+            if requests_per_minute else None
+        )
+        self.token_bucket = (
+            TokenBucket(tokens_per_minute, tokens_per_minute / 60.0)
+            if tokens_per_minute else None
+        )
+        self.requests = Counter()
+        self.throttled = Counter()
+        self.estimated_tokens = Counter()
+        self.actual_tokens = Counter()
+        self.refunded_tokens = Counter()
+        self.wait_latency = LatencyHistogram()
+
+    def acquire(self, estimated_tokens: int = 0) -> RateLimitReservation:
+        """Block until one request and estimated_tokens fit within the limits.
+
+        A call cancelled while throttled gives its request slot and tokens back.
+        """
+        wait = 0.0
+        if self.request_bucket is not None:
+            wait = max(wait, self.request_bucket.reserve(1))
+        if self.token_bucket is not None and estimated_tokens:
+            wait = max(wait, self.token_bucket.reserve(estimated_tokens))
+
+        self.requests.inc()
+        self.estimated_tokens.inc(estimated_tokens)
+        self.wait_latency.observe(wait)
+        if wait > 0:
+            self.throttled.inc()
+            logger.debug(f"Rate limiter {self.name} throttling request", wait=round(wait, 3))
+            try:
+                sleep_unless_cancelled(wait)
+            except CallCancelled:
+                if self.request_bucket is not None:
+                    self.request_bucket.adjust(1)
+                if self.token_bucket is not None and estimated_tokens:
+                    self.token_bucket.adjust(estimated_tokens)
+                raise
+        return RateLimitReservation(estimated_tokens=estimated_tokens, waited=wait)
+
+    def reconcile(self, reservation: Optional[RateLimitReservation], actual_tokens: Optional[int]) -> None:
+        """Correct the token bucket once the provider reported the real usage"""
+        if reservation is None or actual_tokens is None:
+            return
+        self.actual_tokens.inc(actual_tokens)
+        if self.token_bucket is not None:
+            self.token_bucket.adjust(reservation.estimated_tokens - actual_tokens)
+
+    def refund(self, reservation: Optional[RateLimitReservation]) -> None:
+        """Return the reserved tokens of a request that failed without usage.
+
+        The request slot is not returned: providers count failed requests against
+        their request limit too.
+        """
+        if reservation is None:
+            return
+        self.refunded_tokens.inc(reservation.estimated_tokens)
+        if self.token_bucket is not None:
+            self.token_bucket.adjust(reservation.estimated_tokens)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Get limiter counters"""
+        return {
+            "name": self.name,
+            "requests_per_minute": self.requests_per_minute,
+            "tokens_per_minute": self.tokens_per_minute,
+            "requests": self.requests.value,
+            "throttled": self.throttled.value,
+            "estimated_tokens": self.estimated_tokens.value,
+            "actual_tokens": self.actual_tokens.value,
+            "refunded_tokens": self.refunded_tokens.value,
+            "available_requests": self.request_bucket.available() if self.request_bucket else None,
+            "available_tokens": self.token_bucket.available() if self.token_bucket else None,
+            "wait_latency": self.wait_latency.snapshot()
+        }
+
+class RateLimiterRegistry:
+    """Process-wide registry so every generator shares one limiter per provider, key and model"""
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance._limiters = {}
+            cls._instance._lock = Lock()
+        return cls._instance
+
+    @classmethod
+    def get_instance(cls) -> "RateLimiterRegistry":
+        """Get singleton instance"""
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    @staticmethod
+    def make_key(provider: str, api_key: str, model: str) -> Tuple[str, str, str]:
+        """Build a registry key without keeping the raw API key around"""
+        key_hash = hashlib.sha256((api_key or "").encode("utf-8")).hexdigest()[:12]
+        return (provider, key_hash, model)
+
+    def get_limiter(
+        self,
+        provider: str,
+        api_key: str,
+        model: str,
+        requests_per_minute: Optional[int] = None,
+        tokens_per_minute: Optional[int] = None
+    ) -> Optional[RateLimiter]:
+        """Get or create the shared limiter, or None when no limits are configured"""
+        if not requests_per_minute and not tokens_per_minute:
+            return None
+
+        key = self.make_key(provider, api_key, model)
+        with self._lock:
+            limiter = self._limiters.get(key)
+            if limiter is None:
+                limiter = RateLimiter(
+                    requests_per_minute,
+                    tokens_per_minute,
+                    name=f"{provider}:{model}:{key[1]}"
+                )
+                self._limiters[key] = limiter
+            elif (limiter.requests_per_minute, limiter.tokens_per_minute) != (requests_per_minute, tokens_per_minute):
+                logger.warning(
+                    f"Rate limiter {limiter.name} already exists with other limits; keeping the first ones",
+                    requests_per_minute=limiter.requests_per_minute,
+                    tokens_per_minute=limiter.tokens_per_minute,
+                    ignored_requests_per_minute=requests_per_minute,
+                    ignored_tokens_per_minute=tokens_per_minute
+                )
+            return limiter
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Get counters of every registered limiter"""
+        with self._lock:
+            limiters = list(self._limiters.values())
+        return {limiter.name: limiter.snapshot() for limiter in limiters}
+
+    def clear(self) -> None:
+        """Drop all limiters"""
+        with self._lock:
+            self._limiters.clear()
@@ -5,8 +5,102 @@ import json
 import csv
 import pandas as pd
 import os
+import textwrap
 from pathlib import Path
 
+class RecordWriter:
+    """Writes dataset records to a file one at a time and flushes each one.
+
+    The file is valid (closed brackets, header) whenever the writer is closed,
+    including after a failure, so partial runs keep what they produced.
+    """
+    newline: Optional[str] = None
+
+    def __init__(self, output_path: str, encoding: str = "utf-8"):
+        self.output_path = output_path
+        self.count = 0
+        try:
+            os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+            self._file = open(output_path, "w", encoding=encoding, newline=self.newline)
+            self._start()
+        except Exception as e:
+            raise ExportError(f"Error opening {output_path} for writing: {str(e)}")
+
+    def _start(self) -> None:
+        pass
+
+    def _write(self, record: Dict[str, Any]) -> None:
+        raise NotImplementedError
+
+    def _finish(self) -> None:
+        pass
+
+    def write(self, record: Dict[str, Any]) -> None:
+        """Append one record"""
+        try:
+            self._write(record)
+            self._file.flush()
+        except Exception as e:
+            raise ExportError(f"Error writing record to {self.output_path}: {str(e)}")
+        self.count += 1
+
+    def close(self) -> None:
+        """Terminate the file and close it"""
+        if self._file.closed:
+            return
+        try:
+            self._finish()
+        finally:
+            self._file.close()
+
+    def __enter__(self) -> "RecordWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+class JSONRecordWriter(RecordWriter):
+    """JSON array writer producing the same layout as JSONExporter"""
+
+    def __init__(self, output_path: str, encoding: str = "utf-8", indent: int = 2):
+        self.indent = indent
+        super().__init__(output_path, encoding)
+
+    def _start(self) -> None:
+        self._file.write("[")
+
+    def _write(self, record: Dict[str, Any]) -> None:
+        item = textwrap.indent(json.dumps(record, ensure_ascii=False, indent=self.indent), " " * self.indent)
+        self._file.write(("\n" if self.count == 0 else ",\n") + item)
+
+    def _finish(self) -> None:
+        self._file.write("]" if self.count == 0 else "\n]")
+
+class CSVRecordWriter(RecordWriter):
+    """CSV writer taking its header from the first record"""
+    newline = ""
+
+    def _start(self) -> None:
+        self._writer = None
+
+    def _write(self, record: Dict[str, Any]) -> None:
+        if self._writer is None:
+            self._writer = csv.DictWriter(self._file, fieldnames=list(record), lineterminator=os.linesep, extrasaction="ignore")
+            self._writer.writeheader()
+        self._writer.writerow(record)
+
+class TXTRecordWriter(RecordWriter):
+    """Question/answer text writer producing the same layout as TXTExporter"""
+
+    def __init__(self, output_path: str, encoding: str = "utf-8", separator: str = "\n\n"):
+        self.separator = separator
+        super().__init__(output_path, encoding)
+
+    def _write(self, record: Dict[str, Any]) -> None:
+        if self.count:
+            self._file.write(self.separator)
+        self._file.write(f"Question: {record['question']}\nAnswer: {record['answer']}")
+
 class JSONExporter(BaseExporter):
     """JSON format exporter"""
     
@@ -29,6 +123,10 @@ class JSONExporter(BaseExporter):
         except Exception as e:
             raise ExportError(f"Error exporting to JSON: {str(e)}")
 
+    def open_writer(self, output_path: str) -> RecordWriter:
+        """Open a writer that appends records to a JSON array file"""
+        return JSONRecordWriter(output_path, self.encoding, self.indent)
+
 class CSVExporter(BaseExporter):
     """CSV format exporter"""
     
@@ -52,6 +150,10 @@ class CSVExporter(BaseExporter):
         except Exception as e:
             raise ExportError(f"Error exporting to CSV: {str(e)}")
 
+    def open_writer(self, output_path: str) -> RecordWriter:
+        """Open a writer that appends records as CSV rows"""
+        return CSVRecordWriter(output_path, self.encoding)
+
 class TXTExporter(BaseExporter):
     """TXT format exporter"""
     
@@ -80,6 +182,10 @@ class TXTExporter(BaseExporter):
         except Exception as e:
             raise ExportError(f"Error exporting to TXT: {str(e)}")
 
+    def open_writer(self, output_path: str) -> RecordWriter:
+        """Open a writer that appends question/answer blocks"""
+        return TXTRecordWriter(output_path, self.encoding, self.separator)
+
 class DatasetExporter:
     """Main dataset exporter class"""
     
@@ -108,6 +214,15 @@ class DatasetExporter:
         except Exception as e:
             raise ExportError(f"Error exporting dataset: {str(e)}")
 
+    def open_writer(self, output_path: str, format: Optional[str] = None) -> RecordWriter:
+        """Open an incremental writer for the format (default: from the file extension)"""
+        if not format:
+            format = Path(output_path).suffix[1:].lower()
+        exporter = self.exporters.get(format)
+        if not exporter:
+            raise ExportError(f"Unsupported export format: {format}")
+        return exporter.open_writer(output_path)
+
     def export_multiple(self, data: List[Dict[str, Any]], output_dir: str, formats: List[str]) -> Dict[str, str]:
         """Export dataset to multiple formats"""
         try:
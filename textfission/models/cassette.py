@@ -0,0 +1,362 @@
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from pathlib import Path
+from threading import Lock
+import hashlib
+import json
+import os
+import struct
+import time
+import zlib
+from ..core.base import BaseModel
+from ..core.exceptions import (
+    ErrorCodes,
+    ModelError,
+    RateLimitError,
+    get_retry_after,
+    get_status_code,
+    is_retryable_error
+)
+from ..core.logger import Logger
+from ..core.metrics import Counter
+from ..core.rate_limiter import estimate_tokens
+
+logger = Logger.get_instance()
+
+CASSETTE_MAGIC = b"TFCASSE1"
+# Request key (blake2b-128 of method, prompt and arguments), latency in seconds, payload length
+_RECORD_HEADER = struct.Struct(">16sdI")
+
+class Cassette:
+    """Append-only file of recorded model calls, indexed by request.
+
+    Each record is a fixed header followed by a zlib-compressed JSON payload with
+    the request, the result or error and, for streams, the delta timings. Opening
+    a cassette reads only the headers to build the index, so lookups seek straight
+    to the payload. Records of the same request are served in recording order,
+    repeating the last one when the recordings run out. A record cut off by a
+    crash is dropped when the file is reopened.
+    """
+
+    _shared: Dict[str, "Cassette"] = {}
+    _shared_lock = Lock()
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self._lock = Lock()
+        self._index: Dict[bytes, List[Tuple[int, int, float]]] = {}
+        self._cursor: Dict[bytes, int] = {}
+        self._writer = None
+        self._reader = None
+        self.records = 0
+        if self.path.exists():
+            self._load_index()
+
+    @classmethod
+    def shared(cls, path: str) -> "Cassette":
+        """The process-wide cassette for path, so every model of a run appends to one file"""
+        key = os.path.abspath(path)
+        with cls._shared_lock:
+            cassette = cls._shared.get(key)
+            if cassette is None:
+                cassette = cls(path)
+                cls._shared[key] = cassette
+            return cassette
+
+    @classmethod
+    def close_all(cls) -> None:
+        """Close and forget every shared cassette"""
+        with cls._shared_lock:
+            cassettes = list(cls._shared.values())
+            cls._shared.clear()
+        for cassette in cassettes:
+            cassette.close()
+
+    @staticmethod
+    def request_key(method: str, prompt: Any, kwargs: Dict[str, Any]) -> bytes:
+        """Hash identifying a request independently of the model instance that sends it"""
+        data = json.dumps([method, prompt, kwargs], sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.blake2b(data.encode("utf-8"), digest_size=16).digest()
+
+    def _load_index(self) -> None:
+        size = self.path.stat().st_size
+        with open(self.path, "rb") as f:
+            if f.read(len(CASSETTE_MAGIC)) != CASSETTE_MAGIC:
+                raise ModelError(f"Not a cassette file: {self.path}")
+            good_end = f.tell()
+            while True:
+                header = f.read(_RECORD_HEADER.size)
+                if not header:
+                    break
+                if len(header) < _RECORD_HEADER.size:
+                    break
+                key, latency, length = _RECORD_HEADER.unpack(header)
+                offset = f.tell()
+                if offset + length > size:
+                    break
+                f.seek(length, os.SEEK_CUR)
+                self._index.setdefault(key, []).append((offset, length, latency))
+                self.records += 1
+                good_end = f.tell()
+        if good_end < size:
+            logger.warning("Dropping incomplete cassette record", path=str(self.path), bytes=size - good_end)
+            os.truncate(self.path, good_end)
+
+    def record(
+        self,
+        method: str,
+        prompt: Any,
+        kwargs: Dict[str, Any],
+        latency: float,
+        result: Any = None,
+        error: Optional[BaseException] = None,
+        deltas: Optional[List[Tuple[float, str]]] = None
+    ) -> None:
+        """Append one call with its outcome and duration"""
+        payload: Dict[str, Any] = {"method": method, "prompt": prompt, "kwargs": kwargs, "result": result}
+        if error is not None:
+            payload["error"] = {
+                "type": type(error).__name__,
+                "message": str(error),
+                "status_code": get_status_code(error),
+                "retry_after": get_retry_after(error),
+                "retryable": is_retryable_error(error)
+            }
+        if deltas is not None:
+            payload["deltas"] = deltas
+        data = zlib.compress(json.dumps(payload, ensure_ascii=False, default=str).encode("utf-8"))
+        key = self.request_key(method, prompt, kwargs)
+
+        with self._lock:
+            if self._writer is None:
+                new_file = not self.path.exists() or self.path.stat().st_size == 0
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                self._writer = open(self.path, "ab")
+                if new_file:
+                    self._writer.write(CASSETTE_MAGIC)
+            self._writer.write(_RECORD_HEADER.pack(key, latency, len(data)))
+            offset = self._writer.tell()
+            self._writer.write(data)
+            # Flush per record so a crashed run keeps everything recorded so far
+            self._writer.flush()
+            self._index.setdefault(key, []).append((offset, len(data), latency))
+            self.records += 1
+
+    def next(self, method: str, prompt: Any, kwargs: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """The next recorded outcome of a request, or None when it was never recorded"""
+        key = self.request_key(method, prompt, kwargs)
+        with self._lock:
+            entries = self._index.get(key)
+            if not entries:
+                return None
+            position = self._cursor.get(key, 0)
+            self._cursor[key] = position + 1
+            offset, length, latency = entries[min(position, len(entries) - 1)]
+            if self._writer is not None:
+                self._writer.flush()
+            if self._reader is None:
+                self._reader = open(self.path, "rb")
+            self._reader.seek(offset)
+            data = self._reader.read(length)
+        payload = json.loads(zlib.decompress(data).decode("utf-8"))
+        payload["latency"] = latency
+        return payload
+
+    def rewind(self) -> None:
+        """Serve every request from its first recording again"""
+        with self._lock:
+            self._cursor.clear()
+
+    def __len__(self) -> int:
+        return self.records
+
+    def close(self) -> None:
+        with self._lock:
+            for handle in (self._writer, self._reader):
+                if handle is not None:
+                    handle.close()
+            self._writer = self._reader = None
+
+class RecordingModel(BaseModel):
+    """Wraps any model and appends every call, its outcome and its duration to a cassette.
+
+    Limiters, breaker and retries stay those of the wrapped model. Inside a
+    generator's retry scope every attempt is recorded separately, so a replay
+    reproduces the same sequence of failures and retries.
+    """
+
+    def __init__(self, model: BaseModel, cassette: Cassette):
+        super().__init__(model.config)
+        self.inner = model
+        self.cassette = cassette
+        self.provider = getattr(model, "provider", "model")
+        self.model = getattr(model, "model", None)
+        self.api_key = getattr(model, "api_key", None)
+        for name in ("rate_limiter", "concurrency_limiter", "circuit_breaker", "embedding_model",
+                     "embedding_batch_size", "max_embedding_batch_tokens"):
+            setattr(self, name, getattr(model, name, None))
+
+    def __getattr__(self, name: str) -> Any:
+        # Only reached for attributes the wrapper does not define, e.g. provider specifics
+        if name == "inner":
+            raise AttributeError(name)
+        return getattr(self.inner, name)
+
+    def _recorded(self, method: str, prompt: Any, kwargs: Dict[str, Any], call: Callable[[], Any]) -> Any:
+        start = time.perf_counter()
+        try:
+            result = call()
+        except Exception as e:
+            self.cassette.record(method, prompt, kwargs, time.perf_counter() - start, error=e)
+            raise
+        stored = result.tolist() if hasattr(result, "tolist") else result
+        self.cassette.record(method, prompt, kwargs, time.perf_counter() - start, result=stored)
+        return result
+
+    def generate(self, prompt: str, **kwargs) -> str:
+        return self._recorded("generate", prompt, kwargs, lambda: self.inner.generate(prompt, **kwargs))
+
+    def generate_json(
+        self,
+        prompt: str,
+        schema: Optional[Dict[str, Any]] = None,
+        schema_name: str = "response",
+        mode: str = "json_schema"
+    ) -> str:
+        kwargs = {"schema": schema, "schema_name": schema_name, "mode": mode}
+        return self._recorded("generate_json", prompt, kwargs, lambda: self.inner.generate_json(prompt, **kwargs))
+
+    def generate_stream(self, prompt: str) -> Iterator[str]:
+        """Stream from the wrapped model, recording each delta with its offset from the start"""
+        start = time.perf_counter()
+        deltas: List[Tuple[float, str]] = []
+        stream = self.inner.generate_stream(prompt)
+        try:
+            for delta in stream:
+                deltas.append((time.perf_counter() - start, delta))
+                yield delta
+        except Exception as e:
+            self.cassette.record("generate_stream", prompt, {}, time.perf_counter() - start, error=e, deltas=deltas)
+            raise
+        finally:
+            stream.close()
+        # A stream closed early by the caller is not recorded: its tail is unknown
+        self.cassette.record(
+            "generate_stream", prompt, {}, time.perf_counter() - start, result="".join(d for _, d in deltas), deltas=deltas
+        )
+
+    def get_embedding(self, text: str) -> list:
+        return self._recorded("get_embedding", text, {}, lambda: self.inner.get_embedding(text))
+
+    def get_embeddings(self, texts: List[str]) -> List[List[float]]:
+        texts = list(texts)
+        return self._recorded("get_embeddings", texts, {}, lambda: self.inner.get_embeddings(texts))
+
+    def count_tokens(self, text: str) -> int:
+        return self.inner.count_tokens(text)
+
+    def get_model_info(self) -> Dict[str, Any]:
+        info = dict(self.inner.get_model_info())
+        info["cassette"] = str(self.cassette.path)
+        return info
+
+class ReplayModel(BaseModel):
+    """Serves model calls from a cassette without contacting any provider.
+
+    Requests are matched by method, prompt and arguments. Recorded errors are
+    raised again with their status code and retry classification. With
+    emulate_latency, every call takes its recorded duration times latency_scale
+    (streams replay their delta timing). A request missing from the cassette
+    fails with a non-retryable CASSETTE_MISS error.
+    """
+    provider = "replay"
+    max_embedding_batch = 2048
+
+    def __init__(
+        self,
+        config,
+        cassette: Optional[Cassette] = None,
+        emulate_latency: Optional[bool] = None,
+        latency_scale: float = 1.0
+    ):
+        super().__init__(config)
+        settings = config.model_settings
+        self.api_key = settings.api_key
+        self.model = settings.model
+        self.cassette = cassette or Cassette.shared(settings.cassette)
+        self.emulate_latency = getattr(settings, "cassette_latency", False) if emulate_latency is None else emulate_latency
+        self.latency_scale = latency_scale
+        self.counters = {name: Counter() for name in ("hits", "misses", "errors")}
+
+    def _replay(self, method: str, prompt: Any, kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        payload = self.cassette.next(method, prompt, kwargs)
+        if payload is None:
+            self.counters["misses"].inc()
+            raise ModelError(
+                f"Request not found in cassette {self.cassette.path} ({method})",
+                error_code="CASSETTE_MISS",
+                details={"retryable": False}
+            )
+        self.counters["hits"].inc()
+        return payload
+
+    def _sleep(self, seconds: float) -> None:
+        if self.emulate_latency and seconds > 0:
+            time.sleep(seconds * self.latency_scale)
+
+    def _outcome(self, payload: Dict[str, Any]) -> Any:
+        error = payload.get("error")
+        if error is None:
+            return payload["result"]
+        self.counters["errors"].inc()
+        details = {
+            "status_code": error.get("status_code"),
+            "retry_after": error.get("retry_after"),
+            "retryable": error.get("retryable"),
+            "provider_error": error.get("type")
+        }
+        if error.get("status_code") == 429:
+            raise RateLimitError(error["message"], error_code=ErrorCodes.RATE_LIMIT, details=details)
+        raise ModelError(error["message"], error_code=ErrorCodes.API_ERROR, details=details)
+
+    def _call(self, method: str, prompt: Any, kwargs: Dict[str, Any]) -> Any:
+        payload = self._replay(method, prompt, kwargs)
+        self._sleep(payload["latency"])
+        return self._outcome(payload)
+
+    def generate(self, prompt: str, **kwargs) -> str:
+        return self._call("generate", prompt, kwargs)
+
+    def generate_json(
+        self,
+        prompt: str,
+        schema: Optional[Dict[str, Any]] = None,
+        schema_name: str = "response",
+        mode: str = "json_schema"
+    ) -> str:
+        return self._call("generate_json", prompt, {"schema": schema, "schema_name": schema_name, "mode": mode})
+
+    def generate_stream(self, prompt: str) -> Iterator[str]:
+        payload = self._replay("generate_stream", prompt, {})
+        elapsed = 0.0
+        for offset, delta in payload.get("deltas") or []:
+            self._sleep(offset - elapsed)
+            elapsed = offset
+            yield delta
+        self._sleep(payload["latency"] - elapsed)
+        self._outcome(payload)
+
+    def get_embedding(self, text: str) -> list:
+        return self._call("get_embedding", text, {})
+
+    def get_embeddings(self, texts: List[str]) -> List[List[float]]:
+        return self._call("get_embeddings", list(texts), {})
+
+    def count_tokens(self, text: str) -> int:
+        return estimate_tokens(text)
+
+    def snapshot(self) -> Dict[str, int]:
+        """Replayed, missing and error-raising requests"""
+        return {name: counter.value for name, counter in self.counters.items()}
+
+    def get_model_info(self) -> Dict[str, Any]:
+        return {"name": self.model, "type": "replay", "cassette": str(self.cassette.path)}
@@ -0,0 +1,86 @@
+from typing import Any, Callable, Dict, Optional, Tuple
+from threading import Lock
+import hashlib
+from ..core.logger import Logger
+from ..core.metrics import Counter
+
+logger = Logger.get_instance()
+
+class ClientRegistry:
+    """Process-wide registry of provider SDK clients keyed by provider, API key and base URL.
+
+    Models created for the same endpoint share one client and therefore one HTTP
+    connection pool, so repeated dataset runs reuse warm keep-alive connections
+    instead of opening new ones. Pool settings only apply when a client is created.
+    """
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance._clients = {}
+            cls._instance._settings = {}
+            cls._instance._lock = Lock()
+            cls._instance.counters = {name: Counter() for name in ("created", "reused", "closed")}
+        return cls._instance
+
+    @classmethod
+    def get_instance(cls) -> "ClientRegistry":
+        """Get singleton instance"""
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    @staticmethod
+    def make_key(provider: str, api_key: str, base_url: Optional[str]) -> Tuple[str, str, str]:
+        """Build a registry key without keeping the raw API key around"""
+        key_hash = hashlib.sha256((api_key or "").encode("utf-8")).hexdigest()[:12]
+        return (provider, key_hash, base_url or "")
+
+    def get_client(
+        self,
+        provider: str,
+        api_key: str,
+        base_url: Optional[str],
+        create: Callable[[], Any],
+        **settings
+    ) -> Any:
+        """Get the shared client, calling create() the first time; settings are recorded for snapshots"""
+        key = self.make_key(provider, api_key, base_url)
+        with self._lock:
+            client = self._clients.get(key)
+            if client is not None:
+                self.counters["reused"].inc()
+                return client
+            client = create()
+            self._clients[key] = client
+            self._settings[key] = settings
+        self.counters["created"].inc()
+        logger.debug(f"Created shared {provider} client", base_url=base_url or "default", **settings)
+        return client
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Get registered clients with their pool settings, and creation/reuse counters"""
+        with self._lock:
+            clients = {
+                f"{provider}:{key_hash}@{base_url or 'default'}": dict(self._settings[(provider, key_hash, base_url)])
+                for provider, key_hash, base_url in self._clients
+            }
+        data: Dict[str, Any] = {name: counter.value for name, counter in self.counters.items()}
+        data["clients"] = clients
+        return data
+
+    def clear(self) -> None:
+        """Close and drop all clients"""
+        with self._lock:
+            clients = list(self._clients.values())
+            self._clients.clear()
+            self._settings.clear()
+        for client in clients:
+            close = getattr(client, "close", None)
+            if callable(close):
+                try:
+                    close()
+                except Exception as e:
+                    logger.debug("Failed to close client", error=str(e))
+            self.counters["closed"].inc()
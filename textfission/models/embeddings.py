@@ -0,0 +1,153 @@
+from typing import Any, Dict, Iterable, List, Optional
+import hashlib
+import numpy as np
+from ..core.base import BaseModel
+from ..core.cache import Cache
+from ..core.concurrency import get_worker_count, parallel_map
+from ..core.exceptions import ModelError
+from ..core.logger import Logger
+from ..core.metrics import Counter
+from ..core.rate_limiter import estimate_tokens
+
+logger = Logger.get_instance()
+
+class EmbeddingService:
+    """Batched and cached embeddings returned as float32 NumPy matrices.
+
+    Inputs are deduplicated by content hash and looked up in the cache. The misses
+    are split into batches the provider accepts (embedding_batch_size inputs and,
+    where limited, max_embedding_batch_tokens estimated tokens) and sent on a
+    worker pool. Row i of the result is the vector of input i.
+    """
+
+    def __init__(
+        self,
+        config: Any,
+        model: Optional[BaseModel] = None,
+        cache: Optional[Cache] = None,
+        batch_size: Optional[int] = None,
+        max_workers: Optional[int] = None
+    ):
+        if model is None:
+            from .factory import ModelFactory
+            from ..core.config import with_model_settings
+            provider = getattr(config.model_settings, "embedding_provider", None)
+            if provider:
+                # A dedicated embedding backend, e.g. "local"; the failover chain is for generation
+                model = ModelFactory.create_model(with_model_settings(config, failover=[]), model_type=provider)
+            else:
+                model = ModelFactory.create_model(config)
+        self.config = config
+        self.model = model
+        processing = getattr(config, "processing_config", None)
+        if cache is None:
+            cache = Cache(
+                max_size=getattr(processing, "embedding_cache_size", 100000),
+                default_ttl=getattr(processing, "embedding_cache_ttl", 30 * 24 * 3600),
+                cache_dir=getattr(processing, "embedding_cache_dir", None)
+            )
+        self.cache = cache
+        self.batch_size = max(1, batch_size or getattr(model, "embedding_batch_size", 1))
+        self.max_batch_tokens = getattr(model, "max_embedding_batch_tokens", None)
+        self.max_workers = max_workers or get_worker_count(config)
+        self.dimension: Optional[int] = None
+        self.counters = {
+            name: Counter() for name in ("texts", "unique", "cache_hits", "embedded", "requests")
+        }
+
+    @staticmethod
+    def text_hash(text: str) -> str:
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    @property
+    def namespace(self) -> str:
+        """Provider and embedding model the cached vectors belong to (read per call: it can change, e.g. after fit)"""
+        return f"{getattr(self.model, 'provider', 'model')}:{getattr(self.model, 'embedding_model', None)}"
+
+    def _cache_key(self, digest: str) -> str:
+        return f"embedding:{self.namespace}:{digest}"
+
+    def embed(self, texts: Iterable[str]) -> np.ndarray:
+        """Embed texts into a contiguous (len(texts), dimension) float32 matrix"""
+        texts = list(texts)
+        digests = [self.text_hash(text) for text in texts]
+        unique: Dict[str, str] = {}
+        for digest, text in zip(digests, texts):
+            unique.setdefault(digest, text)
+        self.counters["texts"].inc(len(texts))
+        self.counters["unique"].inc(len(unique))
+
+        vectors: Dict[str, np.ndarray] = {}
+        missing: List[str] = []
+        for digest in unique:
+            vector = self.cache.get(self._cache_key(digest))
+            if vector is None:
+                missing.append(digest)
+            else:
+                vectors[digest] = vector
+        self.counters["cache_hits"].inc(len(vectors))
+
+        batches = self._batches(missing, unique)
+        if batches:
+            logger.debug("Requesting embeddings", texts=len(missing), batches=len(batches))
+            results = parallel_map(
+                lambda batch: self._embed_batch([unique[digest] for digest in batch]),
+                batches,
+                self.max_workers
+            )
+            for batch, rows in zip(batches, results):
+                for digest, row in zip(batch, rows):
+                    # Copy the row so the cache does not keep the whole batch array alive
+                    vector = row.copy()
+                    vectors[digest] = vector
+                    self.cache.set(self._cache_key(digest), vector, persist=True)
+
+        if not texts:
+            return np.zeros((0, self.dimension or 0), dtype=np.float32)
+        dimension = len(next(iter(vectors.values())))
+        matrix = np.empty((len(texts), dimension), dtype=np.float32)
+        for index, digest in enumerate(digests):
+            vector = vectors[digest]
+            if len(vector) != dimension:
+                raise ModelError(
+                    f"Embedding dimensions differ ({len(vector)} != {dimension}); "
+                    f"was the cache filled by another model?"
+                )
+            matrix[index] = vector
+        self.dimension = dimension
+        return matrix
+
+    def embed_one(self, text: str) -> np.ndarray:
+        """Embed a single text as a float32 vector"""
+        return self.embed([text])[0]
+
+    def _batches(self, digests: List[str], texts: Dict[str, str]) -> List[List[str]]:
+        """Split digests into batches within the provider's input and token limits"""
+        batches: List[List[str]] = []
+        current: List[str] = []
+        tokens = 0
+        for digest in digests:
+            cost = estimate_tokens(texts[digest]) if self.max_batch_tokens else 0
+            if current and (len(current) >= self.batch_size or (self.max_batch_tokens and tokens + cost > self.max_batch_tokens)):
+                batches.append(current)
+                current, tokens = [], 0
+            current.append(digest)
+            tokens += cost
+        if current:
+            batches.append(current)
+        return batches
+
+    def _embed_batch(self, texts: List[str]) -> np.ndarray:
+        """One provider request for a batch of texts"""
+        self.counters["requests"].inc()
+        rows = np.asarray(self.model.get_embeddings(texts), dtype=np.float32)
+        if rows.ndim != 2 or rows.shape[0] != len(texts):
+            raise ModelError(f"Expected {len(texts)} embeddings, got array of shape {rows.shape}")
+        self.counters["embedded"].inc(len(texts))
+        return rows
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Input, deduplication, cache and request counters"""
+        data: Dict[str, Any] = {name: counter.value for name, counter in self.counters.items()}
+        data["dimension"] = self.dimension
+        return data
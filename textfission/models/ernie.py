@@ -1,10 +1,14 @@
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 from ..core.base import BaseModel
 from ..core.exceptions import ModelError
 import erniebot
 
 class ErnieModel(BaseModel):
     """文心一言模型实现"""
+    provider = "ernie"
+    default_embedding_model = "ernie-text-embedding"
+    # 文心向量接口每次最多16条输入
+    max_embedding_batch = 16
     
     def __init__(self, config):
         super().__init__(config)
@@ -12,35 +16,66 @@ class ErnieModel(BaseModel):
         self.model = config.model_settings.model or "ernie-bot"
         self.temperature = config.model_settings.temperature
         
-        # 设置API密钥
-        erniebot.api_key = self.api_key
+        # 凭证随每次调用通过 _config_ 传入，不修改全局配置，多个密钥的实例可以并发使用
+        self._init_limiters()
+
+    def _sdk_config(self) -> Dict[str, Any]:
+        """本实例的请求级SDK配置"""
+        return {"access_token": self.api_key}
 
     def generate(self, prompt: str, **kwargs) -> str:
         """使用文心一言生成文本"""
-        try:
+        return self._call_with_retry(self._generate_once, prompt, message="文心一言API调用失败", **kwargs)
+
+    def _generate_once(self, prompt: str, **kwargs) -> str:
+        """单次调用文心一言"""
+        with self._capacity(prompt, kwargs.get("max_output_tokens") or 0) as reservation:
             response = erniebot.ChatCompletion.create(
                 model=self.model,
                 messages=[
                     {"role": "user", "content": prompt}
                 ],
                 temperature=self.temperature,
+                _config_=self._sdk_config(),
+                request_timeout=self._request_timeout(),
                 **kwargs
             )
-            return response.get_result()
-        except Exception as e:
-            raise ModelError(f"文心一言API调用失败: {str(e)}")
+        self._settle_capacity(reservation, getattr(response, "usage", None))
+        return response.get_result()
+
+    def _generate_json(self, prompt: str, schema: Optional[Dict[str, Any]], schema_name: str, mode: str) -> str:
+        """使用JSON模式生成（文心一言仅支持json_object，schema由提示词约束）"""
+        return self.generate(prompt, response_format="json_object")
 
     def get_embedding(self, text: str) -> list:
         """获取文本嵌入向量"""
         try:
             response = erniebot.Embedding.create(
-                model="ernie-text-embedding",
-                input=text
+                model=self.embedding_model,
+                input=text,
+                _config_=self._sdk_config(),
+                request_timeout=self._request_timeout()
             )
             return response.get_result()
         except Exception as e:
             raise ModelError(f"获取嵌入向量失败: {str(e)}")
 
+    def get_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """批量获取文本嵌入向量（一次请求）"""
+        return self._call_with_retry(self._embed_once, list(texts), message="获取嵌入向量失败")
+
+    def _embed_once(self, texts: List[str]) -> List[List[float]]:
+        """单次调用文心向量接口"""
+        with self._capacity("\n".join(texts)) as reservation:
+            response = erniebot.Embedding.create(
+                model=self.embedding_model,
+                input=texts,
+                _config_=self._sdk_config(),
+                request_timeout=self._request_timeout()
+            )
+        self._settle_capacity(reservation, getattr(response, "usage", None))
+        return response.get_result()
+
     def count_tokens(self, text: str) -> int:
         """计算文本token数量"""
         # 文心一言没有直接的token计数API，使用估算
@@ -3,7 +3,11 @@ from .base import BaseModel
 from .openai import OpenAIModel
 from .qianwen import QianwenModel
 from .ernie import ErnieModel
-from ..core.config import Config
+from .failover import FailoverModel
+from .local import LocalEmbeddingModel
+from .mock import MockModel
+from .cassette import Cassette, RecordingModel, ReplayModel
+from ..core.config import Config, StageModelConfig, resolve_stage_config, with_model_settings
 from ..core.exceptions import ModelError
 
 class ModelFactory:
@@ -14,6 +18,8 @@ class ModelFactory:
         "openai": OpenAIModel,
         "qianwen": QianwenModel,
         "ernie": ErnieModel,
+        "local": LocalEmbeddingModel,
+        "mock": MockModel,
     }
     
     # 模型名称到类型的映射
@@ -42,20 +48,33 @@ class ModelFactory:
         "ernie-bot": "ernie",
         "ernie-bot-turbo": "ernie",
         "ernie-bot-4": "ernie",
+        
+        # 本地词法向量（离线，仅支持嵌入）
+        "lexical-hash": "local",
+        
+        # 离线压测用的模拟模型
+        "mock": "mock",
     }
     
     @classmethod
-    def create_model(cls, config: Config, model_type: Optional[str] = None) -> BaseModel:
+    def create_model(cls, config: Config, model_type: Optional[str] = None, stage: Optional[str] = None) -> BaseModel:
         """
         根据配置创建模型实例
         
         Args:
             config: 配置对象
             model_type: 模型类型，如果为None则根据模型名称自动推断
+            stage: 处理阶段（"question" 或 "answer"），使用该阶段的模型配置覆盖
             
         Returns:
-            BaseModel: 模型实例
+            BaseModel: 模型实例；配置了 failover 时返回按顺序切换的 FailoverModel；
+                配置了 cassette 时返回录制模型，回放模式下返回不访问服务商的 ReplayModel
         """
+        config = resolve_stage_config(config, stage)
+        cassette = getattr(config.model_settings, "cassette", None)
+        cassette = cassette if isinstance(cassette, str) else None
+        if cassette and getattr(config.model_settings, "cassette_mode", "record") == "replay":
+            return ReplayModel(config)
         if model_type is None:
             model_type = cls._infer_model_type(config.model_settings.model)
         
@@ -63,7 +82,26 @@ class ModelFactory:
             raise ModelError(f"不支持的模型类型: {model_type}")
         
         model_class = cls.MODEL_REGISTRY[model_type]
-        return model_class(config)
+        model = model_class(config)
+        
+        failover = getattr(config.model_settings, "failover", None)
+        if failover:
+            model = FailoverModel([model] + [cls._create_failover_model(config, entry) for entry in failover])
+        if cassette:
+            model = RecordingModel(model, Cassette.shared(cassette))
+        return model
+    
+    @classmethod
+    def _create_failover_model(cls, config: Config, entry: StageModelConfig) -> BaseModel:
+        """
+        创建故障切换链中的后备模型
+        
+        后备模型继承主模型的生成参数，但不继承接口地址和密钥池，且总是启用熔断器
+        """
+        values = dict(entry) if isinstance(entry, dict) else entry.model_dump(exclude_none=True)
+        updates = {"api_base_url": None, "api_keys": [], "models": [], "failover": [], "circuit_breaker": True, "cassette": None}
+        updates.update({key: value for key, value in values.items() if value is not None})
+        return cls.create_model(with_model_settings(config, **updates))
     
     @classmethod
     def _infer_model_type(cls, model_name: str) -> str:
@@ -86,6 +124,8 @@ class ModelFactory:
             ("deepseek-", "openai"),  # DeepSeek兼容OpenAI接口
             ("qwen-", "qianwen"),
             ("ernie-", "ernie"),
+            ("local-", "local"),
+            ("mock-", "mock"),
         ]:
             if model_name.startswith(prefix):
                 return model_type
@@ -0,0 +1,125 @@
+from typing import Any, Dict, Iterator, List, Optional
+from ..core.base import BaseModel
+from ..core.circuit_breaker import CircuitBreaker
+from ..core.concurrency import invoke_model, stream_model
+from ..core.exceptions import CircuitOpenError, ErrorCodes, ModelError
+from ..core.logger import Logger
+from ..core.metrics import Counter
+
+logger = Logger.get_instance()
+
+class FailoverModel(BaseModel):
+    """Chain of backends used in order, skipping those whose circuit breaker is open.
+
+    Requests go to the first backend with a closed (or probing) circuit, so during
+    an outage they move straight to the next healthy backend instead of retrying
+    against the broken one. Errors from a backend whose circuit is still closed
+    propagate to the caller's retry policy as usual.
+    """
+    provider = "failover"
+
+    def __init__(self, models: List[BaseModel]):
+        if not models:
+            raise ModelError("Failover chain needs at least one model")
+        super().__init__(models[0].config)
+        self.models = models
+        self.api_key = getattr(models[0], "api_key", None)
+        self.model = getattr(models[0], "model", None)
+        self.counters = {name: Counter() for name in ("requests", "failovers", "exhausted")}
+        self.embedding_model = models[0].embedding_model
+        # Batches must fit every backend they may fail over to
+        self.embedding_batch_size = min(model.embedding_batch_size for model in models)
+        token_limits = [model.max_embedding_batch_tokens for model in models if model.max_embedding_batch_tokens]
+        self.max_embedding_batch_tokens = min(token_limits) if token_limits else None
+
+    def _available(self) -> Iterator[BaseModel]:
+        """Backends in chain order whose circuit is not open"""
+        for model in self.models:
+            breaker = getattr(model, "circuit_breaker", None)
+            if breaker is not None and breaker.state == CircuitBreaker.OPEN:
+                continue
+            yield model
+
+    def _on_backend(self, index: int, model: BaseModel) -> None:
+        if index:
+            self.counters["failovers"].inc()
+            logger.debug("Failing over", primary=self.model, backend=getattr(model, "model", None))
+
+    def _exhausted(self, last_error: Optional[BaseException]) -> CircuitOpenError:
+        self.counters["exhausted"].inc()
+        names = ", ".join(str(getattr(model, "model", model)) for model in self.models)
+        return CircuitOpenError(
+            f"All backends in failover chain are unavailable: {names}",
+            error_code=ErrorCodes.CIRCUIT_OPEN,
+            details={"retryable": False, "last_error": str(last_error) if last_error else None}
+        )
+
+    def _call(self, method: str, prompt: str, **kwargs) -> Any:
+        self.counters["requests"].inc()
+        last_error: Optional[BaseException] = None
+        for model in self._available():
+            try:
+                result = invoke_model(model, prompt, method=method, **kwargs)
+            except CircuitOpenError as e:
+                # Another request took the half-open probe first
+                last_error = e
+                continue
+            self._on_backend(self.models.index(model), model)
+            return result
+        raise self._exhausted(last_error)
+
+    def generate(self, prompt: str, **kwargs) -> str:
+        """Generate text on the first available backend"""
+        return self._call("generate", prompt, **kwargs)
+
+    def generate_json(
+        self,
+        prompt: str,
+        schema: Optional[Dict[str, Any]] = None,
+        schema_name: str = "response",
+        mode: str = "json_schema"
+    ) -> str:
+        """Generate JSON on the first available backend using its structured output"""
+        return self._call("generate_json", prompt, schema=schema, schema_name=schema_name, mode=mode)
+
+    def generate_stream(self, prompt: str) -> Iterator[str]:
+        """Stream from the first available backend"""
+        self.counters["requests"].inc()
+        last_error: Optional[BaseException] = None
+        for model in self._available():
+            stream = stream_model(model, prompt)
+            try:
+                first = next(stream, None)
+            except CircuitOpenError as e:
+                last_error = e
+                continue
+            self._on_backend(self.models.index(model), model)
+            try:
+                if first is not None:
+                    yield first
+                yield from stream
+            finally:
+                stream.close()
+            return
+        raise self._exhausted(last_error)
+
+    def get_embedding(self, text: str) -> list:
+        """Get an embedding from the first available backend"""
+        return self._call("get_embedding", text)
+
+    def get_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """Get embeddings for several texts from the first available backend"""
+        return self._call("get_embeddings", texts)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Chain counters and the breaker state of every backend"""
+        data: Dict[str, Any] = {name: counter.value for name, counter in self.counters.items()}
+        data["backends"] = [
+            {
+                "model": getattr(model, "model", None),
+                "provider": getattr(model, "provider", None),
+                "state": model.circuit_breaker.state if getattr(model, "circuit_breaker", None) else None
+            }
+            for model in self.models
+        ]
+        return data
@@ -0,0 +1,411 @@
+from typing import Any, Dict, List, Optional
+import argparse
+import asyncio
+import base64
+import json
+import threading
+import time
+import uuid
+import numpy as np
+from aiohttp import web
+from ..core.config import Config, CustomConfig, ExportConfig, MockModelConfig, ModelConfig, ProcessingConfig
+from ..core.exceptions import ConfigurationError
+from ..core.metrics import Counter
+from ..core.rate_limiter import estimate_tokens
+from .mock import MockModel, MockOutcome
+
+_ERROR_TYPES = {
+    400: ("invalid_request_error", None),
+    404: ("invalid_request_error", "not_found"),
+    429: ("requests", "rate_limit_exceeded"),
+    503: ("server_error", "service_unavailable")
+}
+
+class FakeOpenAIServer:
+    """Local OpenAI-compatible HTTP server backed by the mock model.
+
+    Serves POST /v1/chat/completions (plain and SSE streaming), POST /v1/embeddings
+    and GET /v1/models, so the real OpenAI client, its connection pool, timeouts,
+    429 handling and stream parsing run end to end. Responses, latency, 5xx/429
+    errors and truncated or malformed output follow MockModelConfig; latency is
+    slept on the event loop, so slow requests do not tie up server threads.
+
+    profile scripts the behaviour over time: a list of phases such as
+    {"duration": 10, "rate_limit_rate": 0.5}, each overriding MockModelConfig fields
+    for duration seconds from server start. After the last phase the base settings
+    apply again, or the profile restarts with loop_profile. requests_per_second
+    and max_concurrency add server-side limits that answer 429 with Retry-After.
+    """
+
+    def __init__(
+        self,
+        settings: Optional[MockModelConfig] = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        profile: Optional[List[Dict[str, Any]]] = None,
+        loop_profile: bool = False,
+        requests_per_second: Optional[float] = None,
+        max_concurrency: Optional[int] = None,
+        embedding_dimension: int = 256
+    ):
+        self.settings = settings or MockModelConfig()
+        self.host = host
+        self.port = port
+        self.loop_profile = loop_profile
+        self.requests_per_second = requests_per_second
+        self.max_concurrency = max_concurrency
+        self.embedding_dimension = embedding_dimension
+
+        # Model 0 serves the base settings, model i the i-th profile phase
+        self._models = [self._make_model(self.settings)]
+        self._phase_ends: List[float] = []
+        elapsed = 0.0
+        for phase in profile or []:
+            overrides = dict(phase)
+            duration = overrides.pop("duration", None)
+            if duration is None or duration <= 0:
+                raise ConfigurationError("Every profile phase needs a positive duration")
+            unknown = set(overrides) - set(MockModelConfig.model_fields)
+            if unknown:
+                raise ConfigurationError(f"Unknown profile settings: {', '.join(sorted(unknown))}")
+            self._models.append(self._make_model(self.settings.model_copy(update=overrides)))
+            elapsed += duration
+            self._phase_ends.append(elapsed)
+
+        self._started = time.monotonic()
+        self._tokens = float(requests_per_second or 0)
+        self._refilled = self._started
+        self._inflight = 0
+        self.counters = {
+            name: Counter() for name in (
+                "requests", "chat", "streams", "embeddings", "aborted", "throttled", "rejected"
+            )
+        }
+        self._statuses: Dict[int, int] = {}
+        self._max_inflight = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._runner: Optional[web.AppRunner] = None
+
+    def _make_model(self, settings: MockModelConfig) -> MockModel:
+        return MockModel(Config(
+            model_settings=ModelConfig(
+                api_key="fake", model="mock", mock=settings, embedding_dimension=self.embedding_dimension
+            ),
+            processing_config=ProcessingConfig(),
+            export_config=ExportConfig(),
+            custom_config=CustomConfig()
+        ))
+
+    @property
+    def base_url(self) -> str:
+        """URL to use as api_base_url"""
+        return f"http://{self.host}:{self.port}/v1"
+
+    def phase(self) -> int:
+        """Index of the current profile phase, or -1 when the base settings apply"""
+        if not self._phase_ends:
+            return -1
+        elapsed = time.monotonic() - self._started
+        if self.loop_profile:
+            elapsed %= self._phase_ends[-1]
+        for index, end in enumerate(self._phase_ends):
+            if elapsed < end:
+                return index
+        return -1
+
+    def _model(self) -> MockModel:
+        return self._models[self.phase() + 1]
+
+    # HTTP
+
+    def app(self) -> web.Application:
+        """aiohttp application serving the endpoints"""
+        app = web.Application(middlewares=[self._track])
+        app.router.add_post("/v1/chat/completions", self._chat)
+        app.router.add_post("/v1/embeddings", self._embeddings)
+        app.router.add_get("/v1/models", self._list_models)
+        app.on_startup.append(self._on_startup)
+        return app
+
+    async def _on_startup(self, app: web.Application) -> None:
+        self._started = time.monotonic()
+        self._refilled = self._started
+
+    @web.middleware
+    async def _track(self, request: web.Request, handler) -> web.StreamResponse:
+        """Count requests and statuses, and apply the server-side limits"""
+        self.counters["requests"].inc()
+        response = self._admit() if request.method == "POST" else None
+        if response is None:
+            self._inflight += 1
+            self._max_inflight = max(self._max_inflight, self._inflight)
+            try:
+                response = await handler(request)
+            finally:
+                self._inflight -= 1
+        self._statuses[response.status] = self._statuses.get(response.status, 0) + 1
+        return response
+
+    def _admit(self) -> Optional[web.Response]:
+        """429 response when the request exceeds the rate or concurrency limit"""
+        if self.max_concurrency is not None and self._inflight >= self.max_concurrency:
+            self.counters["rejected"].inc()
+            return self._error(429, "Too many concurrent requests", retry_after=0.1)
+        if self.requests_per_second:
+            now = time.monotonic()
+            # Token bucket holding at most one second of requests
+            self._tokens = min(
+                self.requests_per_second,
+                self._tokens + (now - self._refilled) * self.requests_per_second
+            )
+            self._refilled = now
+            if self._tokens < 1:
+                self.counters["throttled"].inc()
+                return self._error(
+                    429, "Rate limit reached for requests", retry_after=(1 - self._tokens) / self.requests_per_second
+                )
+            self._tokens -= 1
+        return None
+
+    @staticmethod
+    def _error(status: int, message: str, retry_after: Optional[float] = None) -> web.Response:
+        """Error response with the OpenAI error body"""
+        error_type, code = _ERROR_TYPES.get(status, ("server_error", None))
+        headers = {"x-request-id": f"req-{uuid.uuid4().hex[:16]}"}
+        if retry_after is not None:
+            headers["Retry-After"] = f"{retry_after:.3f}"
+        return web.json_response(
+            {"error": {"message": message, "type": error_type, "param": None, "code": code}},
+            status=status,
+            headers=headers
+        )
+
+    def _failure(self, outcome: MockOutcome) -> web.Response:
+        if outcome.status == 429:
+            return self._error(429, "Mock rate limit exceeded", retry_after=outcome.retry_after)
+        return self._error(outcome.status, "Mock service unavailable")
+
+    @staticmethod
+    async def _json(request: web.Request) -> Optional[Dict[str, Any]]:
+        try:
+            body = await request.json()
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            return None
+        return body if isinstance(body, dict) else None
+
+    @staticmethod
+    def _prompt(messages: List[Dict[str, Any]]) -> str:
+        """Text of the last user message (content parts are joined)"""
+        for message in reversed(messages):
+            if message.get("role") != "user":
+                continue
+            content = message.get("content")
+            if isinstance(content, list):
+                return "".join(part.get("text", "") for part in content if isinstance(part, dict))
+            return content or ""
+        return ""
+
+    async def _chat(self, request: web.Request) -> web.StreamResponse:
+        body = await self._json(request)
+        if body is None or not isinstance(body.get("messages"), list):
+            return self._error(400, "Request body must be a JSON object with messages")
+        self.counters["chat"].inc()
+        prompt = self._prompt(body["messages"])
+        model = self._model()
+        outcome = model.plan(prompt)
+        stream = bool(body.get("stream"))
+        await asyncio.sleep(outcome.latency * (0.3 if stream else 1.0))
+        if outcome.status != 200:
+            return self._failure(outcome)
+
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:24]}"
+        name = body.get("model") or "mock"
+        finish_reason = "length" if outcome.truncated else "stop"
+        if not stream:
+            prompt_tokens = estimate_tokens(prompt)
+            completion_tokens = estimate_tokens(outcome.text)
+            return web.json_response({
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": name,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": outcome.text},
+                    "finish_reason": finish_reason
+                }],
+                "usage": {
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": completion_tokens,
+                    "total_tokens": prompt_tokens + completion_tokens
+                }
+            })
+
+        self.counters["streams"].inc()
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream", "Cache-Control": "no-cache"})
+        await response.prepare(request)
+
+        def event(delta: Dict[str, Any], reason: Optional[str] = None) -> bytes:
+            chunk = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": name,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": reason}]
+            }
+            return f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode("utf-8")
+
+        deltas = model.stream_deltas(outcome.text)
+        gap = outcome.latency * 0.7 / len(deltas)
+        try:
+            await response.write(event({"role": "assistant", "content": ""}))
+            for delta in deltas:
+                if gap > 0:
+                    await asyncio.sleep(gap)
+                await response.write(event({"content": delta}))
+            await response.write(event({}, finish_reason))
+            await response.write(b"data: [DONE]\n\n")
+            await response.write_eof()
+        except ConnectionResetError:
+            # The client closed the stream early
+            self.counters["aborted"].inc()
+        return response
+
+    async def _embeddings(self, request: web.Request) -> web.Response:
+        body = await self._json(request)
+        texts = body.get("input") if body else None
+        if isinstance(texts, str):
+            texts = [texts]
+        if not texts or not isinstance(texts, list) or not all(isinstance(text, str) for text in texts):
+            return self._error(400, "input must be a string or a list of strings")
+        self.counters["embeddings"].inc()
+        model = self._model()
+        outcome = model.plan_embeddings(texts)
+        await asyncio.sleep(outcome.latency)
+        if outcome.status != 200:
+            return self._failure(outcome)
+
+        # Embedding is CPU-bound: keep it off the event loop so other requests are served meanwhile
+        vectors = np.asarray(
+            await asyncio.get_running_loop().run_in_executor(None, model.embed, texts),
+            dtype=np.float32
+        )
+        # The OpenAI client asks for base64 encoded float32 vectors by default
+        encode = body.get("encoding_format") == "base64"
+        data = [
+            {
+                "object": "embedding",
+                "index": index,
+                "embedding": base64.b64encode(row.tobytes()).decode("ascii") if encode else row.tolist()
+            }
+            for index, row in enumerate(vectors)
+        ]
+        tokens = sum(estimate_tokens(text) for text in texts)
+        return web.json_response({
+            "object": "list",
+            "data": data,
+            "model": body.get("model") or "mock-embedding",
+            "usage": {"prompt_tokens": tokens, "total_tokens": tokens}
+        })
+
+    async def _list_models(self, request: web.Request) -> web.Response:
+        return web.json_response({
+            "object": "list",
+            "data": [
+                {"id": name, "object": "model", "created": 0, "owned_by": "textfission"}
+                for name in ("mock", "mock-embedding")
+            ]
+        })
+
+    # Lifecycle
+
+    def start(self) -> str:
+        """Serve on a background thread; returns the base URL"""
+        if self._thread is not None:
+            return self.base_url
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="fake-openai-server", daemon=True)
+        self._thread.start()
+        self.port = asyncio.run_coroutine_threadsafe(self._serve(), self._loop).result(timeout=10)
+        return self.base_url
+
+    async def _serve(self) -> int:
+        self._runner = web.AppRunner(self.app(), access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        return self._runner.addresses[0][1]
+
+    def stop(self) -> None:
+        """Stop serving and join the server thread"""
+        if self._thread is None:
+            return
+        asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result(timeout=10)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=10)
+        self._loop.close()
+        self._thread = self._loop = self._runner = None
+
+    def __enter__(self) -> "FakeOpenAIServer":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def stats(self) -> Dict[str, Any]:
+        """Request counters, responses by status, peak concurrency and the current phase"""
+        data: Dict[str, Any] = {name: counter.value for name, counter in self.counters.items()}
+        data["statuses"] = dict(sorted(self._statuses.items()))
+        data["max_inflight"] = self._max_inflight
+        data["phase"] = self.phase()
+        return data
+
+def main(argv=None):
+    """Run the fake server in the foreground"""
+    parser = argparse.ArgumentParser(description="OpenAI-compatible fake server backed by the mock model")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--latency", default="lognormal", help="none / fixed / uniform / normal / lognormal / exponential")
+    parser.add_argument("--latency-mean", type=float, default=0.2)
+    parser.add_argument("--latency-sigma", type=float, default=0.5)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--retry-after", type=float, default=1.0)
+    parser.add_argument("--truncation-rate", type=float, default=0.0)
+    parser.add_argument("--malformed-rate", type=float, default=0.0)
+    parser.add_argument("--requests-per-second", type=float)
+    parser.add_argument("--max-concurrency", type=int)
+    parser.add_argument("--profile", help="JSON file with a list of phases, e.g. [{\"duration\": 10, \"error_rate\": 0.5}]")
+    parser.add_argument("--loop-profile", action="store_true")
+    args = parser.parse_args(argv)
+
+    profile = None
+    if args.profile:
+        with open(args.profile, encoding="utf-8") as f:
+            profile = json.load(f)
+    server = FakeOpenAIServer(
+        MockModelConfig(
+            seed=args.seed,
+            latency=args.latency,
+            latency_mean=args.latency_mean,
+            latency_sigma=args.latency_sigma,
+            error_rate=args.error_rate,
+            rate_limit_rate=args.rate_limit_rate,
+            retry_after=args.retry_after,
+            truncation_rate=args.truncation_rate,
+            malformed_rate=args.malformed_rate
+        ),
+        host=args.host,
+        port=args.port,
+        profile=profile,
+        loop_profile=args.loop_profile,
+        requests_per_second=args.requests_per_second,
+        max_concurrency=args.max_concurrency
+    )
+    web.run_app(server.app(), host=args.host, port=args.port, access_log=None)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import hashlib
+import math
+import re
+import zlib
+from collections import Counter as TermCounter
+import numpy as np
+from ..core.base import BaseModel
+from ..core.exceptions import ModelError
+
+# Han, kana, Hangul and CJK compatibility ideographs: scripts written without spaces
+_CJK = "぀-ヿ㐀-䶿一-鿿가-힯豈-﫿"
+_TOKEN = re.compile(rf"[{_CJK}]+|[^\W_{_CJK}]+")
+_CJK_RUN = re.compile(rf"[{_CJK}]")
+
+def lexical_features(text: str, char_ngram: int = 3) -> List[str]:
+    """Lexical features of text for both Latin and CJK scripts.
+
+    Words in space-separated scripts give the lowercased word plus its character
+    n-grams (with boundary markers), so inflections still overlap. Runs of CJK
+    characters give character unigrams and bigrams, which stand in for words.
+    """
+    features: List[str] = []
+    for token in _TOKEN.findall(text.lower()):
+        if _CJK_RUN.match(token):
+            features.extend(token)
+            features.extend(token[i:i + 2] for i in range(len(token) - 1))
+        else:
+            features.append(token)
+            marked = f"<{token}>"
+            if len(marked) > char_ngram:
+                features.extend("#" + marked[i:i + char_ngram] for i in range(len(marked) - char_ngram + 1))
+    return features
+
+class LocalEmbeddingModel(BaseModel):
+    """Offline lexical embeddings: feature hashing, TF-IDF weighting and a random projection.
+
+    Features are hashed into n_features buckets with a random sign and weighted by
+    sublinear term frequency times IDF (1 until fit() has seen a corpus). Dense
+    vectors project the hashed features to embedding_dimension with a sparse
+    random projection and are L2 normalized, so their dot product approximates the
+    cosine similarity of the TF-IDF vectors. Everything runs in NumPy without
+    network access; the backend cannot generate text.
+    """
+    provider = "local"
+    default_embedding_model = "lexical-hash"
+    max_embedding_batch = 4096
+
+    def __init__(
+        self,
+        config,
+        n_features: int = 2 ** 18,
+        dimension: Optional[int] = None,
+        projection_density: int = 4,
+        seed: int = 0
+    ):
+        super().__init__(config)
+        settings = config.model_settings
+        if n_features <= 0 or n_features & (n_features - 1):
+            raise ModelError("n_features must be a power of two")
+        self.api_key = ""
+        self.model = settings.model or self.default_embedding_model
+        self.n_features = n_features
+        self.dimension = dimension or getattr(settings, "embedding_dimension", None) or 256
+        self.seed = seed
+        self.idf: Optional[np.ndarray] = None
+        self.documents = 0
+
+        # Each hashed feature contributes to projection_density output dimensions with
+        # random signs (very sparse random projection), so the matrix is never materialized
+        rng = np.random.default_rng(seed)
+        self._projection_index = rng.integers(0, self.dimension, size=(n_features, projection_density), dtype=np.int32)
+        self._projection_sign = (
+            rng.choice(np.array([-1.0, 1.0], dtype=np.float32), size=(n_features, projection_density))
+            / np.float32(math.sqrt(projection_density))
+        )
+        self.embedding_model = f"{self.default_embedding_model}-{self.dimension}-s{seed}"
+
+    def generate(self, prompt: str, **kwargs) -> str:
+        raise ModelError("The local embedding backend cannot generate text")
+
+    def count_tokens(self, text: str) -> int:
+        """Number of word and CJK character tokens"""
+        return sum(len(token) if _CJK_RUN.match(token) else 1 for token in _TOKEN.findall(text))
+
+    def _hash(self, features: Iterable[str]) -> Dict[int, float]:
+        """Signed hashed term counts of one text"""
+        mask = self.n_features - 1
+        counts: Dict[int, float] = {}
+        for feature, count in TermCounter(features).items():
+            code = zlib.crc32(feature.encode("utf-8"))
+            index = code & mask
+            # The top bit is independent of the bucket bits for n_features <= 2**31
+            sign = -1.0 if code >> 31 else 1.0
+            counts[index] = counts.get(index, 0.0) + sign * (1.0 + math.log(count))
+        return counts
+
+    def fit(self, texts: Iterable[str]) -> "LocalEmbeddingModel":
+        """Learn IDF weights from a corpus; later vectors down-weight common features"""
+        df = np.zeros(self.n_features, dtype=np.float64)
+        documents = 0
+        for text in texts:
+            indices = list(self._hash(lexical_features(text)))
+            df[indices] += 1
+            documents += 1
+        self.documents = documents
+        self.idf = (np.log((1 + documents) / (1 + df)) + 1).astype(np.float32)
+        # Vectors change with the IDF, so caches keyed by model name must not mix them
+        fingerprint = hashlib.sha256(self.idf.tobytes()).hexdigest()[:8]
+        self.embedding_model = f"{self.default_embedding_model}-{self.dimension}-s{self.seed}-idf{fingerprint}"
+        return self
+
+    def sparse_features(self, texts: Iterable[str]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """L2 normalized TF-IDF vectors over n_features buckets in CSR form.
+
+        Returns (data, indices, indptr), the layout scipy.sparse.csr_matrix accepts
+        with shape (len(texts), n_features).
+        """
+        data: List[float] = []
+        indices: List[int] = []
+        indptr = [0]
+        for text in texts:
+            counts = self._hash(lexical_features(text))
+            indices.extend(counts)
+            data.extend(counts.values())
+            indptr.append(len(indices))
+
+        data_array = np.asarray(data, dtype=np.float32)
+        index_array = np.asarray(indices, dtype=np.int64)
+        indptr_array = np.asarray(indptr, dtype=np.int64)
+        if self.idf is not None and len(index_array):
+            data_array *= self.idf[index_array]
+        rows = np.repeat(np.arange(len(indptr) - 1), np.diff(indptr_array))
+        norms = np.sqrt(np.bincount(rows, weights=data_array.astype(np.float64) ** 2, minlength=len(indptr) - 1))
+        norms[norms == 0] = 1.0
+        data_array /= norms[rows].astype(np.float32)
+        return data_array, index_array, indptr_array
+
+    def embed(self, texts: Iterable[str]) -> np.ndarray:
+        """Dense (len(texts), dimension) float32 matrix of L2 normalized vectors"""
+        data, indices, indptr = self.sparse_features(texts)
+        count = len(indptr) - 1
+        rows = np.repeat(np.arange(count, dtype=np.int64), np.diff(indptr))
+        targets = rows[:, None] * self.dimension + self._projection_index[indices]
+        weights = data[:, None] * self._projection_sign[indices]
+        dense = np.bincount(
+            targets.ravel(), weights=weights.ravel(), minlength=count * self.dimension
+        ).reshape(count, self.dimension).astype(np.float32)
+        norms = np.linalg.norm(dense, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return dense / norms
+
+    def get_embedding(self, text: str) -> list:
+        """Get the dense embedding of text"""
+        return self.embed([text])[0].tolist()
+
+    def get_embeddings(self, texts: List[str]) -> np.ndarray:
+        """Get dense embeddings for several texts as one float32 array (rows in input order)"""
+        return self.embed(texts)
+
+    def get_model_info(self) -> Dict[str, Any]:
+        return {
+            "name": self.embedding_model,
+            "type": "local",
+            "n_features": self.n_features,
+            "dimension": self.dimension,
+            "fitted_documents": self.documents
+        }
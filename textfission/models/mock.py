@@ -0,0 +1,386 @@
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple
+from collections import OrderedDict
+from threading import Lock
+import builtins
+import hashlib
+import json
+import math
+import random
+import re
+from ..core.base import BaseModel
+from ..core.config import MockModelConfig
+from ..core.exceptions import ModelError, sleep_unless_cancelled
+from ..core.metrics import Counter, LatencyHistogram
+from ..core.rate_limiter import RateLimitReservation, estimate_tokens
+
+# Prompts whose send count is remembered; the least recently sent are forgotten beyond this
+_MAX_TRACKED_PROMPTS = 65536
+_SENTENCE_END = re.compile(r"(?<=[.!?。！？；;])\s*")
+_WORD = re.compile(r"[^\W\d_]{4,}")
+_QUESTION_TEMPLATES = {
+    "en": (
+        "What does the text say about {topic}?",
+        "How does the text describe {topic}?",
+        "Why does the text mention {topic}?",
+        "What role does {topic} play according to the text?"
+    ),
+    "zh": (
+        "文中关于“{topic}”说了什么？",
+        "文本如何描述“{topic}”？",
+        "文中为什么提到“{topic}”？",
+        "根据文本，“{topic}”有什么作用？"
+    )
+}
+_STOPWORDS = {"this", "that", "with", "from", "have", "were", "which", "their", "there", "these", "those", "been", "into", "also"}
+
+class MockOutcome(NamedTuple):
+    """Planned result of one mock request"""
+    text: str
+    latency: float
+    status: int
+    retry_after: Optional[float]
+    truncated: bool
+
+class MockAPIError(Exception):
+    """Simulated provider error carrying an HTTP status like the SDK exceptions do"""
+
+    def __init__(self, message: str, status_code: int, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+class MockModel(BaseModel):
+    """Offline model that answers question and answer prompts with valid JSON derived from the prompt.
+
+    Questions are built from the sentences of the chunk and honour the counts,
+    question types and difficulty range stated in the prompt; answers quote the
+    chunk sentence sharing the most words with the question. Latency, 5xx and 429
+    errors, truncated and malformed responses are injected according to
+    model_settings.mock. All randomness is seeded by the mock seed, the prompt and
+    how often that prompt was sent before, so a run is reproducible regardless of
+    thread scheduling while retries of a prompt still see fresh outcomes.
+
+    Requests go through the same rate limiter, adaptive concurrency limiter,
+    circuit breaker, retry policy and request timeout as the real providers.
+    """
+    provider = "mock"
+    default_embedding_model = "mock-embedding"
+    max_embedding_batch = 2048
+
+    def __init__(self, config):
+        super().__init__(config)
+        settings = config.model_settings
+        self.api_key = settings.api_key
+        self.model = settings.model or "mock"
+        self.settings: MockModelConfig = getattr(settings, "mock", None) or MockModelConfig()
+        self._sends: "OrderedDict[str, int]" = OrderedDict()
+        self._lock = Lock()
+        self._embedder = None
+        self.counters = {
+            name: Counter() for name in ("requests", "errors", "rate_limited", "timeouts", "truncated", "malformed")
+        }
+        self.latency = LatencyHistogram()
+        self._init_limiters()
+
+    # Randomness and fault injection
+
+    def _rng(self, prompt: str) -> random.Random:
+        """Generator seeded by the mock seed, the prompt and the number of earlier sends of it"""
+        digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+        with self._lock:
+            attempt = self._sends.pop(digest, 0)
+            self._sends[digest] = attempt + 1
+            if len(self._sends) > _MAX_TRACKED_PROMPTS:
+                self._sends.popitem(last=False)
+        return random.Random(f"{self.settings.seed}:{digest}:{attempt}")
+
+    def sample_latency(self, rng: random.Random) -> float:
+        """Draw one request latency in seconds from the configured distribution"""
+        s = self.settings
+        mean = max(0.0, s.latency_mean)
+        if s.latency == "none" or mean == 0:
+            value = 0.0
+        elif s.latency == "fixed":
+            value = mean
+        elif s.latency == "uniform":
+            value = rng.uniform(s.latency_min, max(s.latency_min, 2 * mean - s.latency_min))
+        elif s.latency == "normal":
+            value = rng.gauss(mean, s.latency_sigma)
+        elif s.latency == "lognormal":
+            value = rng.lognormvariate(math.log(mean) - s.latency_sigma ** 2 / 2, s.latency_sigma)
+        elif s.latency == "exponential":
+            value = rng.expovariate(1.0 / mean)
+        else:
+            raise ModelError(f"Unknown mock latency distribution: {s.latency}")
+        return max(s.latency_min, value)
+
+    def _wait(self, latency: float) -> None:
+        """Sleep for the request latency, failing like a client timeout when it exceeds the request timeout.
+
+        A cancelled call stops waiting, like a client closing the connection.
+        """
+        timeout = self._request_timeout()
+        if timeout is not None and latency > timeout:
+            sleep_unless_cancelled(max(0.0, timeout))
+            self.counters["timeouts"].inc()
+            raise builtins.TimeoutError(f"Mock request timed out after {timeout:.3f}s")
+        if latency > 0:
+            sleep_unless_cancelled(latency)
+
+    def _failure(self, rng: random.Random) -> Tuple[int, Optional[float]]:
+        """HTTP status of a request (200, 429 or 503) and its Retry-After"""
+        s = self.settings
+        roll = rng.random()
+        if roll < s.rate_limit_rate:
+            return 429, s.retry_after
+        if roll < s.rate_limit_rate + s.error_rate:
+            return 503, None
+        return 200, None
+
+    def _raise_failure(self, status: int, retry_after: Optional[float]) -> None:
+        if status == 429:
+            self.counters["rate_limited"].inc()
+            raise MockAPIError("Error code: 429 - mock rate limit exceeded", 429, retry_after=retry_after)
+        if status != 200:
+            self.counters["errors"].inc()
+            raise MockAPIError(f"Error code: {status} - mock service unavailable", status)
+
+    def _distort(self, text: str, rng: random.Random) -> Tuple[str, bool]:
+        """Truncate or break the response text according to the configured rates; also tells if it was truncated"""
+        roll = rng.random()
+        if roll < self.settings.truncation_rate:
+            self.counters["truncated"].inc()
+            return text[:max(1, int(len(text) * rng.uniform(0.3, 0.9)))], True
+        if roll < self.settings.truncation_rate + self.settings.malformed_rate:
+            self.counters["malformed"].inc()
+            # Single quotes and a dangling comma: looks like JSON, never parses
+            return "Sure! Here is the result:\n" + text.replace('"', "'").rstrip("}") + ",}", False
+        return text, False
+
+    def plan(self, prompt: str) -> MockOutcome:
+        """Sample the outcome of one request without waiting: response text, latency and status.
+
+        Also used by the fake OpenAI-compatible server, which serves the plan over HTTP.
+        """
+        rng = self._rng(prompt)
+        latency = self.sample_latency(rng)
+        status, retry_after = self._failure(random.Random(rng.random()))
+        text, truncated = self._distort(self.render(prompt, rng), rng)
+        return MockOutcome(text, latency, status, retry_after, truncated)
+
+    def _generate_once(self, prompt: str, **kwargs) -> str:
+        self.counters["requests"].inc()
+        with self._capacity(prompt, kwargs.get("max_tokens") or 0) as reservation:
+            outcome = self.plan(prompt)
+            self._wait(outcome.latency)
+            self._raise_failure(outcome.status, outcome.retry_after)
+        self.latency.observe(outcome.latency)
+        self._settle_capacity(reservation, {"total_tokens": estimate_tokens(prompt) + estimate_tokens(outcome.text)})
+        return outcome.text
+
+    # Model interface
+
+    def generate(self, prompt: str, **kwargs) -> str:
+        """Generate a mock response with injected latency and failures"""
+        return self._call_with_retry(self._generate_once, prompt, message="Mock model call failed", **kwargs)
+
+    def _generate_json(self, prompt: str, schema: Optional[Dict[str, Any]], schema_name: str, mode: str) -> str:
+        """The mock always answers in JSON, so structured output is the plain call"""
+        return self.generate(prompt)
+
+    def generate_stream(self, prompt: str) -> Iterator[str]:
+        """Stream the response in stream_chunk_chars deltas, spreading the latency over them.
+
+        About a third of the latency passes before the first delta. Failures are
+        raised before anything is streamed, like an HTTP error status, and starting
+        the stream is retried like any other request.
+        """
+        outcome, reservation = self._call_with_retry(self._open_stream, prompt, message="Failed to start mock stream")
+        received: List[str] = []
+        try:
+            deltas = self.stream_deltas(outcome.text)
+            gap = outcome.latency * 0.7 / len(deltas)
+            for delta in deltas:
+                if gap > 0:
+                    sleep_unless_cancelled(gap)
+                received.append(delta)
+                yield delta
+            self.latency.observe(outcome.latency)
+        finally:
+            self._settle_capacity(
+                reservation,
+                {"total_tokens": estimate_tokens(prompt) + estimate_tokens("".join(received))}
+            )
+
+    def _open_stream(self, prompt: str) -> Tuple[MockOutcome, Optional[RateLimitReservation]]:
+        """One attempt at starting a stream: the wait for the first delta and its injected failure"""
+        self.counters["requests"].inc()
+        with self._capacity(prompt) as reservation:
+            outcome = self.plan(prompt)
+            self._wait(outcome.latency * 0.3)
+            self._raise_failure(outcome.status, outcome.retry_after)
+        return outcome, reservation
+
+    def stream_deltas(self, text: str) -> List[str]:
+        """Split a response into streamed deltas of stream_chunk_chars characters"""
+        size = max(1, self.settings.stream_chunk_chars)
+        return [text[i:i + size] for i in range(0, len(text), size)] or [""]
+
+    def get_embedding(self, text: str) -> list:
+        """Deterministic lexical embedding of text"""
+        return self.get_embeddings([text])[0].tolist()
+
+    def get_embeddings(self, texts: List[str]) -> Any:
+        """Deterministic lexical embeddings after one injected request latency"""
+        return self._call_with_retry(self._embed_once, list(texts), message="Mock embeddings call failed")
+
+    def _embed_once(self, texts: List[str]) -> Any:
+        text = "\n".join(texts)
+        with self._capacity(text) as reservation:
+            outcome = self.plan_embeddings(texts)
+            self._wait(outcome.latency)
+            self._raise_failure(outcome.status, outcome.retry_after)
+        self._settle_capacity(reservation, {"total_tokens": estimate_tokens(text)})
+        return self.embed(texts)
+
+    def plan_embeddings(self, texts: List[str]) -> MockOutcome:
+        """Sample latency and status of one embeddings request (the outcome carries no text)"""
+        rng = self._rng("\n".join(texts))
+        latency = self.sample_latency(rng)
+        status, retry_after = self._failure(rng)
+        return MockOutcome("", latency, status, retry_after, False)
+
+    def embed(self, texts: List[str]) -> Any:
+        """Deterministic lexical embeddings without latency or failures"""
+        with self._lock:
+            if self._embedder is None:
+                from .local import LocalEmbeddingModel
+                self._embedder = LocalEmbeddingModel(self.config, n_features=2 ** 14, seed=self.settings.seed)
+        return self._embedder.embed(texts)
+
+    def count_tokens(self, text: str) -> int:
+        return estimate_tokens(text)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Injected fault counters and observed latency"""
+        data: Dict[str, Any] = {name: counter.value for name, counter in self.counters.items()}
+        data["latency"] = self.latency.snapshot()
+        return data
+
+    def get_model_info(self) -> Dict[str, Any]:
+        return {"name": self.model, "type": "mock", "latency": self.settings.latency, "seed": self.settings.seed}
+
+    # Responses derived from the prompt
+
+    def render(self, prompt: str, rng: random.Random) -> str:
+        """Valid JSON answering an answer prompt or a question prompt"""
+        if "\n\nQuestion:\n" in prompt:
+            return json.dumps(self._answer(prompt, rng), ensure_ascii=False)
+        return json.dumps({"questions": self._questions(prompt, rng)}, ensure_ascii=False)
+
+    @staticmethod
+    def _section(prompt: str, marker: str, end: Optional[str] = None) -> str:
+        start = prompt.rfind(marker)
+        if start == -1:
+            return ""
+        text = prompt[start + len(marker):]
+        if end is not None and end in text:
+            text = text[:text.index(end)]
+        return text.strip()
+
+    @staticmethod
+    def _sentences(text: str, max_words: int = 20) -> List[str]:
+        """Sentences of text; unpunctuated runs of words are cut into max_words windows"""
+        sentences = []
+        for sentence in _SENTENCE_END.split(text):
+            words = sentence.split()
+            if len(words) > max_words * 2:
+                sentences.extend(" ".join(words[i:i + max_words]) for i in range(0, len(words), max_words))
+            elif len(sentence.strip()) >= 4:
+                sentences.append(sentence.strip())
+        return sentences
+
+    @staticmethod
+    def _is_chinese(text: str) -> bool:
+        return bool(re.search(r"[一-鿿]", text))
+
+    @staticmethod
+    def _topic(sentence: str, chinese: bool) -> str:
+        if chinese:
+            return re.sub(r"[，。！？；：、\s]", "", sentence)[:12]
+        words = list(dict.fromkeys(word for word in _WORD.findall(sentence) if word.lower() not in _STOPWORDS))
+        longest = sorted(words, key=len, reverse=True)[:3]
+        # Keep sentence order so the topic reads naturally
+        return " ".join(word for word in words if word in longest)[:60] or sentence[:40]
+
+    def _questions(self, prompt: str, rng: random.Random) -> List[Dict[str, Any]]:
+        chinese = "问题类型应包含" in prompt
+        chunk = self._section(prompt, "\n\nText:\n")
+        counts = re.search(r"(?:Generate|生成)\s*(\d+)\s*(?:to|到)\s*(\d+)", prompt)
+        low, high = (int(counts.group(1)), int(counts.group(2))) if counts else (1, 3)
+        difficulty = re.search(r"(?:between|在)\s*([\d.]+)\s*(?:and|到)\s*([\d.]+)", prompt)
+        min_difficulty, max_difficulty = (
+            (float(difficulty.group(1)), float(difficulty.group(2))) if difficulty else (0.3, 0.8)
+        )
+        types_line = re.search(r"(?:Question types should include:|问题类型应包含：)\s*(.*)", prompt)
+        types = [t.strip() for t in types_line.group(1).split(",") if t.strip()] if types_line else []
+        types = types or ["factual"]
+
+        sentences = self._sentences(chunk) or [chunk or "the text"]
+        templates = _QUESTION_TEMPLATES["zh" if chinese else "en"]
+        candidates = [
+            (template.format(topic=self._topic(sentence, chinese)), sentence)
+            for template in templates
+            for sentence in sentences
+        ]
+        # Skip questions the prompt lists as already accepted
+        candidates = [(text, sentence) for text, sentence in candidates if f"- {text}" not in prompt]
+        count = rng.randint(min(low, high), max(low, high))
+        questions = []
+        seen = set()
+        for text, sentence in candidates:
+            if len(questions) >= count:
+                break
+            if text in seen:
+                continue
+            seen.add(text)
+            topic_words = _WORD.findall(sentence)[:3] if not chinese else [self._topic(sentence, True)[:4]]
+            questions.append({
+                "text": text,
+                "type": types[len(questions) % len(types)],
+                "difficulty": round(rng.uniform(min_difficulty, max_difficulty), 2) if max_difficulty > min_difficulty else min_difficulty,
+                "keywords": topic_words or [text[:10]],
+                "context_required": True
+            })
+        for question in questions:
+            question["difficulty"] = min(max(question["difficulty"], min_difficulty), max_difficulty)
+        return questions
+
+    def _answer(self, prompt: str, rng: random.Random) -> Dict[str, Any]:
+        chunk = self._section(prompt, "\n\nText:\n", "\n\nQuestion:\n")
+        question = self._section(prompt, "\n\nQuestion:\n")
+        confidence = re.search(r"(?:confidence should be|置信度应达到)\s*([\d.]+)", prompt)
+        min_confidence = float(confidence.group(1)) if confidence else 0.7
+        sentences = self._sentences(chunk) or [chunk]
+        chinese = self._is_chinese(question)
+
+        def overlap(sentence: str) -> int:
+            if chinese:
+                return len(set(sentence) & set(question))
+            return len({w.lower() for w in _WORD.findall(sentence)} & {w.lower() for w in _WORD.findall(question)})
+
+        best = max(range(len(sentences)), key=lambda i: (overlap(sentences[i]), -i))
+        evidence = sentences[best]
+        position = chunk.find(evidence)
+        return {
+            "answer": evidence,
+            "metadata": {
+                "quality": "excellent",
+                "confidence": round(min(1.0, max(min_confidence, rng.uniform(0.85, 0.99))), 2),
+                "relevance_score": round(rng.uniform(0.8, 1.0), 2),
+                "completeness_score": round(rng.uniform(0.75, 1.0), 2),
+                "coherence_score": round(rng.uniform(0.85, 1.0), 2),
+                "supporting_evidence": [evidence],
+                "citations": [{"text": evidence, "position": f"{position}-{position + len(evidence)}"}]
+            }
+        }
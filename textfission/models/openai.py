@@ -1,12 +1,20 @@
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Iterator, Tuple
 from ..core.base import BaseModel
-from ..core.exceptions import ModelError
+from ..core.exceptions import ModelError, ErrorHandler
+from ..core.rate_limiter import RateLimitReservation, estimate_tokens
+from ..core.concurrency import get_worker_count
+from .clients import ClientRegistry
+import httpx
 import openai
 from openai import OpenAI
-import time
 
 class OpenAIModel(BaseModel):
     """OpenAI model implementation"""
+    provider = "openai"
+    default_embedding_model = "text-embedding-ada-002"
+    # The embeddings endpoint takes up to 2048 inputs and about 300k tokens per request
+    max_embedding_batch = 2048
+    max_embedding_batch_tokens = 300000
     
     def __init__(self, config):
         super().__init__(config)
@@ -19,11 +27,8 @@ class OpenAIModel(BaseModel):
         self.presence_penalty = config.model_settings.presence_penalty
         self.api_base_url = config.model_settings.api_base_url
         
-        # Initialize OpenAI client with custom base URL if provided
-        if self.api_base_url:
-            self.client = OpenAI(api_key=self.api_key, base_url=self.api_base_url)
-        else:
-            self.client = OpenAI(api_key=self.api_key)
+        # Shared client (and connection pool) for this key and base URL
+        self.client = self._shared_client()
         
         # Set default values if not provided
         if not self.model:
@@ -38,76 +43,194 @@ class OpenAIModel(BaseModel):
             self.frequency_penalty = 0.0
         if self.presence_penalty is None:
             self.presence_penalty = 0.0
+        
+        self._init_limiters()
 
-    def generate(self, prompt: str, max_retries: int = 3, retry_delay: float = 1.0) -> str:
-        """Generate text using OpenAI model"""
-        for attempt in range(max_retries):
-            try:
-                response = self.client.chat.completions.create(
-                    model=self.model,
-                    messages=[
-                        {"role": "system", "content": "You are a helpful assistant."},
-                        {"role": "user", "content": prompt}
-                    ],
-                    temperature=self.temperature,
-                    max_tokens=self.max_tokens,
-                    top_p=self.top_p,
-                    frequency_penalty=self.frequency_penalty,
-                    presence_penalty=self.presence_penalty
-                )
-                return response.choices[0].message.content.strip()
-            except Exception as e:
-                if attempt == max_retries - 1:
-                    raise ModelError(f"Failed to generate text after {max_retries} attempts: {str(e)}")
-                time.sleep(retry_delay * (attempt + 1))  # Exponential backoff
+    def _shared_client(self) -> OpenAI:
+        """Get the process-wide client for this key and base URL, creating it with a sized connection pool"""
+        settings = self.config.model_settings
+        keepalive = getattr(settings, "http_max_keepalive_connections", None) or max(20, get_worker_count(self.config))
+        limits = httpx.Limits(
+            max_connections=max(getattr(settings, "http_max_connections", 100), keepalive),
+            max_keepalive_connections=keepalive,
+            keepalive_expiry=getattr(settings, "http_keepalive_expiry", 30.0)
+        )
 
-    def generate_with_custom_params(self, prompt: str, **kwargs) -> str:
-        """Generate text with custom parameters"""
+        def create() -> OpenAI:
+            # Built directly rather than with openai.DefaultHttpxClient (openai>=1.17), with the SDK's default timeout
+            http_client = httpx.Client(limits=limits, timeout=httpx.Timeout(600.0, connect=5.0), follow_redirects=True)
+            if self.api_base_url:
+                return OpenAI(api_key=self.api_key, base_url=self.api_base_url, http_client=http_client)
+            return OpenAI(api_key=self.api_key, http_client=http_client)
+
+        return ClientRegistry.get_instance().get_client(
+            self.provider,
+            self.api_key,
+            self.api_base_url,
+            create,
+            max_connections=limits.max_connections,
+            max_keepalive_connections=limits.max_keepalive_connections,
+            keepalive_expiry=limits.keepalive_expiry
+        )
+
+    def generate(self, prompt: str, max_retries: Optional[int] = None, retry_delay: Optional[float] = None) -> str:
+        """Generate text using OpenAI model
+        
+        Retries follow the shared retry policy; max_retries and retry_delay override
+        its attempt count and base delay. Inside a generator's retry scope a single
+        attempt is made.
+        """
+        policy = self.retry_policy.with_overrides(max_attempts=max_retries, base_delay=retry_delay)
+        return self._call_with_retry(
+            self._generate_once,
+            prompt,
+            message="Failed to generate text",
+            retry_policy=policy
+        )
+
+    def _generate_once(self, prompt: str) -> str:
+        """Single chat completion request"""
+        with self._capacity(prompt, self.max_tokens) as reservation:
+            response = self.client.chat.completions.create(
+                model=self.model,
+                messages=[
+                    {"role": "system", "content": "You are a helpful assistant."},
+                    {"role": "user", "content": prompt}
+                ],
+                temperature=self.temperature,
+                max_tokens=self.max_tokens,
+                top_p=self.top_p,
+                frequency_penalty=self.frequency_penalty,
+                presence_penalty=self.presence_penalty,
+                timeout=self._request_timeout()
+            )
+        self._settle_capacity(reservation, getattr(response, "usage", None))
+        return response.choices[0].message.content.strip()
+
+    def generate_stream(self, prompt: str) -> Iterator[str]:
+        """Stream the completion as text deltas; closing the iterator early aborts the request"""
+        stream, reservation = self._call_with_retry(
+            self._open_stream,
+            prompt,
+            message="Failed to start streaming generation"
+        )
+        received = []
         try:
-            # Get default parameters
-            params = {
-                "model": self.model,
-                "messages": [
+            for event in stream:
+                choices = getattr(event, "choices", None)
+                if not choices:
+                    continue
+                delta = getattr(choices[0].delta, "content", None)
+                if delta:
+                    received.append(delta)
+                    yield delta
+        except Exception as e:
+            raise ErrorHandler.wrap_provider_error(e, f"Streaming generation failed: {str(e)}")
+        finally:
+            close = getattr(stream, "close", None)
+            if callable(close):
+                close()
+            # Streams carry no usage, and an early stop bills only what was produced
+            self._settle_capacity(
+                reservation,
+                {"total_tokens": estimate_tokens(prompt) + estimate_tokens("".join(received))}
+            )
+
+    def _open_stream(self, prompt: str) -> Tuple[Any, Optional[RateLimitReservation]]:
+        """One attempt at starting a streaming completion, with its own capacity reservation"""
+        with self._capacity(prompt, self.max_tokens) as reservation:
+            stream = self.client.chat.completions.create(
+                model=self.model,
+                messages=[
                     {"role": "system", "content": "You are a helpful assistant."},
                     {"role": "user", "content": prompt}
                 ],
-                "temperature": self.temperature,
-                "max_tokens": self.max_tokens,
-                "top_p": self.top_p,
-                "frequency_penalty": self.frequency_penalty,
-                "presence_penalty": self.presence_penalty
+                temperature=self.temperature,
+                max_tokens=self.max_tokens,
+                top_p=self.top_p,
+                frequency_penalty=self.frequency_penalty,
+                presence_penalty=self.presence_penalty,
+                stream=True,
+                timeout=self._request_timeout()
+            )
+        return stream, reservation
+
+    def chat_params(self, prompt: str, **kwargs) -> Dict[str, Any]:
+        """Chat completion request body for prompt with this model's settings, updated with kwargs"""
+        params = {
+            "model": self.model,
+            "messages": [
+                {"role": "system", "content": "You are a helpful assistant."},
+                {"role": "user", "content": prompt}
+            ],
+            "temperature": self.temperature,
+            "max_tokens": self.max_tokens,
+            "top_p": self.top_p,
+            "frequency_penalty": self.frequency_penalty,
+            "presence_penalty": self.presence_penalty
+        }
+        params.update(kwargs)
+        return params
+
+    @staticmethod
+    def response_format_param(schema: Optional[Dict[str, Any]], schema_name: str, mode: str) -> Dict[str, Any]:
+        """response_format for a strict JSON schema, or JSON object mode without a schema"""
+        if mode == "json_schema" and schema is not None:
+            return {
+                "type": "json_schema",
+                "json_schema": {"name": schema_name, "schema": schema, "strict": True}
             }
-            
-            # Update with custom parameters
-            params.update(kwargs)
-            
-            # Generate response
-            response = self.client.chat.completions.create(**params)
-            return response.choices[0].message.content.strip()
+        return {"type": "json_object"}
+
+    def generate_with_custom_params(self, prompt: str, **kwargs) -> str:
+        """Generate text with custom parameters"""
+        try:
+            params = self.chat_params(prompt, **kwargs)
+            return self._call_with_retry(
+                self._create_completion,
+                prompt,
+                params,
+                message="Error generating text with custom parameters"
+            )
+        except ModelError:
+            raise
         except Exception as e:
             raise ModelError(f"Error generating text with custom parameters: {str(e)}")
 
+    def _create_completion(self, prompt: str, params: Dict[str, Any]) -> str:
+        """Single chat completion call with explicit parameters; a timeout among them replaces the configured one"""
+        params = dict(params)
+        timeout = self._request_timeout(params.pop("timeout", None))
+        with self._capacity(prompt, params.get("max_tokens") or 0) as reservation:
+            response = self.client.chat.completions.create(**params, timeout=timeout)
+        self._settle_capacity(reservation, getattr(response, "usage", None))
+        return response.choices[0].message.content.strip()
+
+    def _generate_json(self, prompt: str, schema: Optional[Dict[str, Any]], schema_name: str, mode: str) -> str:
+        """Generate with response_format set to a strict JSON schema or JSON object mode"""
+        return self.generate_with_custom_params(
+            prompt,
+            response_format=self.response_format_param(schema, schema_name, mode)
+        )
+
     def get_embedding(self, text: str) -> list:
         """Get embedding for text"""
-        try:
-            response = self.client.embeddings.create(
-                model="text-embedding-ada-002",
-                input=text
-            )
-            return response.data[0].embedding
-        except Exception as e:
-            raise ModelError(f"Error getting embedding: {str(e)}")
+        return self._call_with_retry(self._embed_once, text, message="Error getting embedding")[0]
 
     def get_embeddings(self, texts: list) -> list:
-        """Get embeddings for multiple texts"""
-        try:
+        """Get embeddings for multiple texts in one request"""
+        return self._call_with_retry(self._embed_once, list(texts), message="Error getting embeddings")
+
+    def _embed_once(self, texts: Any) -> list:
+        """Single embeddings call; texts is one string or a list of strings"""
+        with self._capacity(texts if isinstance(texts, str) else "\n".join(texts)) as reservation:
             response = self.client.embeddings.create(
-                model="text-embedding-ada-002",
-                input=texts
+                model=self.embedding_model,
+                input=texts,
+                timeout=self._request_timeout()
             )
-            return [data.embedding for data in response.data]
-        except Exception as e:
-            raise ModelError(f"Error getting embeddings: {str(e)}")
+        self._settle_capacity(reservation, getattr(response, "usage", None))
+        return [data.embedding for data in response.data]
 
     def count_tokens(self, text: str) -> int:
         """Count tokens in text"""
@@ -0,0 +1,257 @@
+from typing import Any, Callable, Deque, Dict, List, Optional, TypeVar
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from itertools import count
+from threading import Lock, Thread
+import contextvars
+import json
+import time
+from ..core.base import BaseModel
+from ..core.exceptions import CallCancelled, DeadlineExceeded, GenerationError, ModelError, RetryBudget, ValidationError
+from ..core.logger import Logger
+from ..core.metrics import Counter, LatencyHistogram
+
+logger = Logger.get_instance()
+
+T = TypeVar("T")
+
+# Failures of the reply or of the caller's deadline or cancellation, not of the provider: they do not eject a member
+_NON_PROVIDER_ERRORS = (GenerationError, ValidationError, json.JSONDecodeError, DeadlineExceeded, CallCancelled)
+
+class PoolMember:
+    """One model client in a pool with its load and health state"""
+
+    def __init__(self, model: BaseModel, index: int):
+        self.model = model
+        self.index = index
+        self.name = f"{getattr(model, 'provider', 'model')}:{getattr(model, 'model', index)}#{index}"
+        self.outstanding = 0
+        self.consecutive_failures = 0
+        self.ejected_until = 0.0
+        self.counters = {
+            name: Counter() for name in ("requests", "successes", "failures", "ejections", "abandoned")
+        }
+        self.latency = LatencyHistogram()
+
+    def is_healthy(self, now: float) -> bool:
+        return now >= self.ejected_until
+
+    def spare_capacity(self) -> float:
+        """Requests the member's rate limiter would admit right now (infinite without limits)"""
+        limiter = getattr(self.model, "rate_limiter", None)
+        bucket = getattr(limiter, "request_bucket", None)
+        return bucket.available() if bucket is not None else float("inf")
+
+    def snapshot(self, now: float) -> Dict[str, Any]:
+        data: Dict[str, Any] = {
+            "outstanding": self.outstanding,
+            "healthy": self.is_healthy(now),
+            "consecutive_failures": self.consecutive_failures,
+            "ejected_for": max(0.0, self.ejected_until - now)
+        }
+        data.update({name: counter.value for name, counter in self.counters.items()})
+        data["latency"] = self.latency.snapshot()
+        return data
+
+class ModelPool:
+    """Load balancer over model clients (one per API key and model).
+
+    Requests go round-robin or to the member with the fewest outstanding
+    requests, preferring members whose rate limiter still has capacity. A member
+    whose provider calls fail failure_threshold times in a row is ejected for
+    ejection_seconds and then tried again; invalid replies do not count.
+
+    With hedge_percentile set, a call still running after that percentile of the
+    recent successful latencies is duplicated on another member; the first
+    successful result wins. Hedges are capped at hedge_budget_ratio of the calls
+    in each hedge_budget_window seconds. Provider calls cannot be interrupted, so
+    the losing attempt runs to completion and is abandoned; no new hedge starts
+    while max_abandoned (default: the pool size) abandoned attempts are running.
+    """
+
+    STRATEGIES = ("round_robin", "least_outstanding")
+
+    def __init__(
+        self,
+        models: List[BaseModel],
+        strategy: str = "least_outstanding",
+        failure_threshold: int = 3,
+        ejection_seconds: float = 30.0,
+        hedge_percentile: Optional[float] = None,
+        hedge_min_samples: int = 20,
+        hedge_budget_ratio: float = 0.1,
+        hedge_budget_window: float = 60.0,
+        latency_window: int = 200,
+        max_abandoned: Optional[int] = None
+    ):
+        if not models:
+            raise ModelError("Model pool needs at least one model")
+        if strategy not in self.STRATEGIES:
+            raise ModelError(f"Unknown load balancing strategy: {strategy}")
+        self.members = [PoolMember(model, index) for index, model in enumerate(models)]
+        self.strategy = strategy
+        self.failure_threshold = max(1, failure_threshold)
+        self.ejection_seconds = ejection_seconds
+        self._next = count()
+        self._lock = Lock()
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = max(1, hedge_min_samples)
+        # Same sliding-window accounting as retries, without a free minimum
+        self.hedge_budget = RetryBudget(ratio=hedge_budget_ratio, min_retries=0, window=hedge_budget_window)
+        self._recent: Deque[float] = deque(maxlen=max(1, latency_window))
+        self.max_abandoned = len(self.members) if max_abandoned is None else max(0, max_abandoned)
+        self._abandoned = 0
+        self.counters = {name: Counter() for name in ("calls", "hedges", "hedge_wins", "hedges_denied")}
+
+    def __len__(self) -> int:
+        return len(self.members)
+
+    @property
+    def models(self) -> List[BaseModel]:
+        return [member.model for member in self.members]
+
+    def acquire(self, exclude: Optional[PoolMember] = None) -> PoolMember:
+        """Pick a member for the next request and count it as outstanding"""
+        with self._lock:
+            now = time.monotonic()
+            candidates = [m for m in self.members if m.is_healthy(now) and m is not exclude]
+            if not candidates:
+                candidates = [m for m in self.members if m is not exclude] or self.members
+                # Everything is ejected: use whichever member comes back first
+                candidates = [min(candidates, key=lambda m: m.ejected_until)]
+
+            if self.strategy == "round_robin":
+                member = candidates[next(self._next) % len(candidates)]
+            else:
+                member = min(candidates, key=lambda m: (m.outstanding, -m.spare_capacity(), m.counters["requests"].value))
+            member.outstanding += 1
+        member.counters["requests"].inc()
+        return member
+
+    def release(self, member: PoolMember, latency: float, error: Optional[BaseException] = None) -> None:
+        """Record the outcome of a request and update the member's health"""
+        with self._lock:
+            member.outstanding -= 1
+            if error is None:
+                member.consecutive_failures = 0
+                self._recent.append(latency)
+            elif not isinstance(error, _NON_PROVIDER_ERRORS):
+                member.consecutive_failures += 1
+                if member.consecutive_failures >= self.failure_threshold:
+                    member.ejected_until = time.monotonic() + self.ejection_seconds
+                    member.consecutive_failures = 0
+                    member.counters["ejections"].inc()
+                    logger.warning(
+                        f"Ejecting pool member {member.name}",
+                        seconds=self.ejection_seconds,
+                        error=str(error)
+                    )
+        if error is None:
+            member.counters["successes"].inc()
+            member.latency.observe(latency)
+        else:
+            member.counters["failures"].inc()
+
+    def call(self, func: Callable[..., T], *args, **kwargs) -> T:
+        """Run func(model, *args, **kwargs) on the selected member, hedging slow calls when enabled"""
+        self.counters["calls"].inc()
+        self.hedge_budget.record_request()
+        delay = self.hedge_delay()
+        if delay is None:
+            return self._run(self.acquire(), func, args, kwargs)
+        return self._hedged_call(delay, func, args, kwargs)
+
+    def _run(self, member: PoolMember, func: Callable[..., T], args: tuple, kwargs: Dict[str, Any]) -> T:
+        start = time.perf_counter()
+        try:
+            result = func(member.model, *args, **kwargs)
+        except Exception as e:
+            self.release(member, time.perf_counter() - start, e)
+            raise
+        self.release(member, time.perf_counter() - start)
+        return result
+
+    def hedge_delay(self) -> Optional[float]:
+        """Seconds after which a call gets a hedge, or None when hedging is off or not yet calibrated"""
+        if self.hedge_percentile is None or len(self.members) < 2:
+            return None
+        with self._lock:
+            samples = sorted(self._recent)
+        if len(samples) < self.hedge_min_samples:
+            return None
+        index = min(len(samples) - 1, int(len(samples) * self.hedge_percentile / 100.0))
+        return samples[index]
+
+    def _start(self, member: PoolMember, func: Callable[..., T], args: tuple, kwargs: Dict[str, Any]) -> "Future[T]":
+        """Run one attempt on its own thread, inheriting the caller's context (retry scope)"""
+        future: "Future[T]" = Future()
+        future.set_running_or_notify_cancel()
+        context = contextvars.copy_context()
+
+        def target():
+            try:
+                future.set_result(context.run(self._run, member, func, args, kwargs))
+            except BaseException as e:
+                future.set_exception(e)
+
+        Thread(target=target, name=f"hedge-{member.name}", daemon=True).start()
+        return future
+
+    def _hedged_call(self, delay: float, func: Callable[..., T], args: tuple, kwargs: Dict[str, Any]) -> T:
+        primary = self.acquire()
+        attempts = {self._start(primary, func, args, kwargs): primary}
+        done, pending = wait(attempts, timeout=delay)
+
+        hedge = None
+        if not done:
+            with self._lock:
+                saturated = self._abandoned >= self.max_abandoned
+            if not saturated and self.hedge_budget.try_spend():
+                hedge = self.acquire(exclude=primary)
+                self.counters["hedges"].inc()
+                logger.debug("Hedging slow request", primary=primary.name, hedge=hedge.name, delay=round(delay, 3))
+                attempts[self._start(hedge, func, args, kwargs)] = hedge
+            else:
+                self.counters["hedges_denied"].inc()
+
+        error: Optional[BaseException] = None
+        pending = set(attempts)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is not None:
+                    error = future.exception()
+                    continue
+                winner = attempts[future]
+                if winner is hedge:
+                    self.counters["hedge_wins"].inc()
+                # Provider SDK calls cannot be interrupted: the loser is abandoned and its result dropped
+                for loser in pending:
+                    self._abandon(attempts[loser], loser)
+                return future.result()
+        raise error
+
+    def _abandon(self, member: PoolMember, future: "Future[Any]") -> None:
+        """Count a losing attempt as abandoned until it finishes"""
+        member.counters["abandoned"].inc()
+        with self._lock:
+            self._abandoned += 1
+        future.add_done_callback(self._abandoned_done)
+
+    def _abandoned_done(self, future: "Future[Any]") -> None:
+        with self._lock:
+            self._abandoned -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Pool-level call and hedging counters"""
+        data: Dict[str, Any] = {name: counter.value for name, counter in self.counters.items()}
+        data["hedge_delay"] = self.hedge_delay()
+        with self._lock:
+            data["abandoned_running"] = self._abandoned
+        data["hedge_rate"] = data["hedges"] / data["calls"] if data["calls"] else 0.0
+        return data
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Get load, health and latency of every member"""
+        now = time.monotonic()
+        return {member.name: member.snapshot(now) for member in self.members}
@@ -1,10 +1,14 @@
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 from ..core.base import BaseModel
 from ..core.exceptions import ModelError
 from dashscope import Generation
 
 class QianwenModel(BaseModel):
     """通义千问模型实现"""
+    provider = "qianwen"
+    default_embedding_model = "text-embedding-v1"
+    # 通用文本向量接口每次最多25条输入
+    max_embedding_batch = 25
     
     def __init__(self, config):
         super().__init__(config)
@@ -12,36 +16,48 @@ class QianwenModel(BaseModel):
         self.model = config.model_settings.model or "qwen-turbo"
         self.temperature = config.model_settings.temperature
         
-        # 设置API密钥
-        import os
-        os.environ['DASHSCOPE_API_KEY'] = self.api_key
+        # API密钥随每次调用传入，不写入进程环境变量，多个密钥的实例可以并发使用
+        self._init_limiters()
 
     def generate(self, prompt: str, **kwargs) -> str:
         """使用通义千问生成文本"""
-        try:
+        return self._call_with_retry(self._generate_once, prompt, message="通义千问API调用失败", **kwargs)
+
+    def _generate_once(self, prompt: str, **kwargs) -> str:
+        """单次调用通义千问"""
+        with self._capacity(prompt, kwargs.get("max_tokens") or 0) as reservation:
             response = Generation.call(
                 model=self.model,
+                api_key=self.api_key,
                 messages=[
                     {"role": "user", "content": prompt}
                 ],
                 temperature=self.temperature,
+                request_timeout=self._request_timeout(),
                 **kwargs
             )
-            
-            if response.status_code == 200:
-                return response.output.choices[0].message.content
-            else:
-                raise ModelError(f"通义千问API调用失败: {response.message}")
-        except Exception as e:
-            raise ModelError(f"通义千问API调用失败: {str(e)}")
+            if response.status_code != 200:
+                raise ModelError(
+                    f"通义千问API调用失败: {response.message}",
+                    error_code="RATE_LIMIT" if response.status_code == 429 else "API_ERROR",
+                    details={"status_code": response.status_code}
+                )
+        self._settle_capacity(reservation, getattr(response, "usage", None))
+        return response.output.choices[0].message.content
+
+    def _generate_json(self, prompt: str, schema: Optional[Dict[str, Any]], schema_name: str, mode: str) -> str:
+        """使用JSON模式生成（通义千问仅支持json_object，schema由提示词约束）"""
+        return self.generate(prompt, response_format={"type": "json_object"})
 
     def get_embedding(self, text: str) -> list:
         """获取文本嵌入向量"""
         try:
             from dashscope import TextEmbedding
             response = TextEmbedding.call(
-                model="text-embedding-v1",
-                input=text
+                model=self.embedding_model,
+                input=text,
+                api_key=self.api_key,
+                request_timeout=self._request_timeout()
             )
             
             if response.status_code == 200:
@@ -51,6 +67,30 @@ class QianwenModel(BaseModel):
         except Exception as e:
             raise ModelError(f"获取嵌入向量失败: {str(e)}")
 
+    def get_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """批量获取文本嵌入向量（一次请求）"""
+        return self._call_with_retry(self._embed_once, list(texts), message="获取嵌入向量失败")
+
+    def _embed_once(self, texts: List[str]) -> List[List[float]]:
+        """单次调用通义千问文本向量接口"""
+        from dashscope import TextEmbedding
+        with self._capacity("\n".join(texts)) as reservation:
+            response = TextEmbedding.call(
+                model=self.embedding_model,
+                input=texts,
+                api_key=self.api_key,
+                request_timeout=self._request_timeout()
+            )
+            if response.status_code != 200:
+                raise ModelError(
+                    f"获取嵌入向量失败: {response.message}",
+                    error_code="RATE_LIMIT" if response.status_code == 429 else "API_ERROR",
+                    details={"status_code": response.status_code}
+                )
+        self._settle_capacity(reservation, getattr(response, "usage", None))
+        embeddings = sorted(response.output.embeddings, key=lambda item: item.text_index)
+        return [item.embedding for item in embeddings]
+
     def count_tokens(self, text: str) -> int:
         """计算文本token数量"""
         # 通义千问没有直接的token计数API，使用估算
@@ -1,15 +1,32 @@
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, Optional, Tuple, Iterable
 from ..core.base import BaseAnswerGenerator
-from ..core.exceptions import GenerationError
+from ..core.exceptions import GenerationError, RetryPolicy, RetryExhausted, DeadlineExceeded, cancellation_scope
+from ..core.concurrency import invoke_model, get_worker_count, parallel_map, submit_in_context
+from ..core.json_extractor import extract_json
+from ..core.config import resolve_stage_config, with_model_settings
+from ..core.logger import Logger
+from ..core.metrics import Counter, LatencyHistogram
 from ..models.factory import ModelFactory
-import json
+from ..models.pool import ModelPool
 from tqdm import tqdm
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import Executor, ThreadPoolExecutor, FIRST_COMPLETED, wait
 from dataclasses import dataclass
+from threading import Event
 from enum import Enum
 import re
-from statistics import mean, stdev
 import time
+from statistics import mean, stdev
+
+logger = Logger.get_instance()
+
+def _bigrams(text: str) -> set:
+    text = re.sub(r"\s+", " ", text.lower()).strip()
+    return {text[i:i + 2] for i in range(len(text) - 1)} or {text}
+
+def answer_similarity(first: str, second: str) -> float:
+    """Jaccard similarity of character bigrams, usable for Chinese and English answers"""
+    a, b = _bigrams(first), _bigrams(second)
+    return len(a & b) / len(a | b) if a | b else 1.0
 
 class AnswerQuality(Enum):
     """Quality levels for generated answers"""
@@ -44,26 +61,50 @@ class AnswerGenerator(BaseAnswerGenerator):
     """Enhanced answer generator using language models"""
     
     def __init__(self, config):
+        # Answer stage model overrides
+        config = resolve_stage_config(config, "answer")
         super().__init__(config)
         self.models = []
         self.language = getattr(config.custom_config, 'language', 'en')
         self.answer_prompt = self._get_answer_prompt()
         self.min_confidence = getattr(config.custom_config, 'min_confidence', 0.7)
         self.min_quality = getattr(config.custom_config, 'min_quality', AnswerQuality.GOOD)
+        # The only retry layer: model calls made inside it do not retry on their own
+        self.retry_policy = RetryPolicy.from_config(config)
+        # "json_schema" or "json_object" uses the provider's structured output, None plain text
+        self.response_format = getattr(config.model_settings, 'response_format', None)
+        self.counters = {
+            name: Counter() for name in ("calls", "attempts", "model_requests", "structured_requests", "parse_failures")
+        }
+        self.quorum_size = getattr(config.model_settings, 'quorum_size', None)
+        self.quorum_similarity = getattr(config.model_settings, 'quorum_similarity', 0.6)
+        self.model_stats: Dict[str, Dict[str, Any]] = {}
         self._initialize_models()
 
     def _initialize_models(self):
-        """Initialize multiple models if configured"""
-        # Initialize models
-        if self.config.model_settings.use_parallel and self.config.model_settings.api_keys:
-            for api_key, model_name in zip(self.config.model_settings.api_keys, self.config.model_settings.models):
-                model_config = self.config.model_settings.copy()
-                model_config.api_key = api_key
-                model_config.model = model_name
-                self.models.append(ModelFactory.create_model(self.config))
-        else:
-            # 确保至少有一个默认模型
-            self.models.append(ModelFactory.create_model(self.config))
+        """Build one client per configured API key and model pair and balance requests over them"""
+        settings = self.config.model_settings
+        api_keys = settings.api_keys or [settings.api_key]
+        model_names = settings.models or [settings.model]
+        for api_key in api_keys:
+            for model_name in model_names:
+                member_config = with_model_settings(self.config, api_key=api_key, model=model_name)
+                self.models.append(ModelFactory.create_model(member_config))
+        
+        self.pool = ModelPool(
+            self.models,
+            strategy=getattr(settings, "pool_strategy", "least_outstanding"),
+            failure_threshold=getattr(settings, "pool_failure_threshold", 3),
+            ejection_seconds=getattr(settings, "pool_ejection_seconds", 30.0),
+            hedge_percentile=getattr(settings, "hedge_percentile", None),
+            hedge_min_samples=getattr(settings, "hedge_min_samples", 20),
+            hedge_budget_ratio=getattr(settings, "hedge_budget_ratio", 0.1)
+        )
+
+    @property
+    def worker_count(self) -> int:
+        """Worker threads for answer batches: the configured workers for each pool member"""
+        return get_worker_count(self.config) * len(self.pool)
 
     def _get_answer_prompt(self) -> str:
         """Get the enhanced answer generation prompt based on language"""
@@ -147,6 +188,86 @@ class AnswerGenerator(BaseAnswerGenerator):
             min_confidence=self.min_confidence
         )
 
+    @staticmethod
+    def _response_schema() -> Dict[str, Any]:
+        """JSON schema of the answer output format"""
+        score = {"type": "number"}
+        return {
+            "type": "object",
+            "properties": {
+                "answer": {"type": "string"},
+                "metadata": {
+                    "type": "object",
+                    "properties": {
+                        "quality": {"type": "string", "enum": ["excellent", "good", "fair", "poor"]},
+                        "confidence": score,
+                        "relevance_score": score,
+                        "completeness_score": score,
+                        "coherence_score": score,
+                        "supporting_evidence": {"type": "array", "items": {"type": "string"}},
+                        "citations": {
+                            "type": "array",
+                            "items": {
+                                "type": "object",
+                                "properties": {
+                                    "text": {"type": "string"},
+                                    "position": {"type": "string"}
+                                },
+                                "required": ["text", "position"],
+                                "additionalProperties": False
+                            }
+                        }
+                    },
+                    "required": [
+                        "quality", "confidence", "relevance_score", "completeness_score",
+                        "coherence_score", "supporting_evidence", "citations"
+                    ],
+                    "additionalProperties": False
+                }
+            },
+            "required": ["answer", "metadata"],
+            "additionalProperties": False
+        }
+
+    def _call_model(self, model, prompt: str) -> str:
+        """Call a model, using its structured output mode when response_format is configured"""
+        self.counters["model_requests"].inc()
+        if not self.response_format:
+            return invoke_model(model, prompt)
+        self.counters["structured_requests"].inc()
+        return invoke_model(
+            model,
+            prompt,
+            method="generate_json",
+            schema=self._response_schema(),
+            schema_name="answer",
+            mode=self.response_format
+        )
+
+    def _parse_response(self, response: str) -> dict:
+        """Extract JSON from a response, counting and logging failures"""
+        try:
+            return extract_json(response)
+        except Exception as e:
+            self.counters["parse_failures"].inc()
+            logger.warning(
+                "Failed to parse answer response",
+                error=str(e),
+                structured=bool(self.response_format),
+                parse_failures=self.counters["parse_failures"].value
+            )
+            raise
+
+    def get_stats(self) -> Dict[str, int]:
+        """Counters of generation calls, attempts, retries, model requests and parse failures"""
+        stats = {name: counter.value for name, counter in self.counters.items()}
+        stats["retries"] = max(0, stats["attempts"] - stats["calls"])
+        pool = getattr(self, "pool", None)
+        if pool is not None:
+            stats["hedges"] = pool.counters["hedges"].value
+            stats["hedge_wins"] = pool.counters["hedge_wins"].value
+        return stats
+
     def _validate_answer(self, answer_data: Dict[str, Any]) -> bool:
         """Validate generated answer"""
         if not isinstance(answer_data, dict):
@@ -155,6 +276,9 @@ class AnswerGenerator(BaseAnswerGenerator):
         if "answer" not in answer_data or "metadata" not in answer_data:
             return False
         
+        if not isinstance(answer_data["answer"], str) or not isinstance(answer_data["metadata"], dict):
+            return False
+        
         metadata = answer_data["metadata"]
         required_fields = [
             "quality", "confidence", "relevance_score",
@@ -224,97 +348,164 @@ class AnswerGenerator(BaseAnswerGenerator):
         
         return citations
 
-    def _extract_json_from_response(self, response: str) -> dict:
-        """Extract JSON from model response, handling markdown code blocks"""
-        if not response or not response.strip():
-            raise GenerationError("Model returned empty response")
-        # 优先提取 markdown 代码块
-        json_match = re.search(r'```(?:json)?\s*(\{.*?\})\s*```', response, re.DOTALL)
-        if json_match:
-            return json.loads(json_match.group(1))
-        # 再尝试直接提取大括号
-        json_match = re.search(r'\{.*\}', response, re.DOTALL)
-        if json_match:
-            return json.loads(json_match.group(0))
-        # 最后直接尝试
-        return json.loads(response)
-
-    def generate(self, chunk: str, question: str, max_retries: int = 3, retry_delay: float = 2.0) -> Dict[str, Any]:
+    def generate(self, chunk: str, question: str, max_retries: Optional[int] = None, retry_delay: Optional[float] = None) -> Dict[str, Any]:
         """Generate answer for a question from text chunk, with retry and robust JSON extraction"""
-        last_exception = None
-        for attempt in range(max_retries):
-            try:
-                # Use the first model if multiple models are available
-                model = self.models[0]
-                
-                # Prepare the prompt
-                prompt = f"{self._format_prompt()}\n\nText:\n{chunk}\n\nQuestion:\n{question}"
-
-                # Generate answer using the model
-                response = model.generate(prompt)
-
-                # Parse the response using robust extraction
-                answer_data = self._extract_json_from_response(response)
-                if not self._validate_answer(answer_data):
-                    raise GenerationError("Invalid answer format or quality")
-                
-                # Add citations if not present
-                if not answer_data["metadata"]["citations"]:
-                    answer_data["metadata"]["citations"] = self._extract_citations(
-                        answer_data["answer"], chunk
-                    )
-                
-                return answer_data
-            except Exception as e:
-                last_exception = e
-                print(f"[重试] 第{attempt+1}次生成答案失败: {e}")
-                time.sleep(retry_delay * (attempt + 1))
-        # 最终失败
-        raise GenerationError(f"Error generating answer after {max_retries} attempts: {last_exception}")
+        if isinstance(question, dict):
+            question = question.get("text", "")
+        policy = self.retry_policy.with_overrides(max_attempts=max_retries, base_delay=retry_delay)
+        self.counters["calls"].inc()
+        try:
+            return policy.execute(self._generate_once, chunk, question)
+        except RetryExhausted as e:
+            raise GenerationError(f"Error generating answer after {e.attempts} attempts: {e.last_error}")
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            raise GenerationError(f"Error generating answer: {e}")
+
+    def _generate_once(self, chunk: str, question: str) -> Dict[str, Any]:
+        """Single generation attempt: call the model, parse and validate"""
+        self.counters["attempts"].inc()
+        # Generate answer on the pool member chosen by the load balancer. Parsing and
+        # validation run inside the pooled call so a hedged duplicate only wins with a valid answer
+        return self.pool.call(self._answer_with_model, self.build_prompt(chunk, question), chunk)
+
+    def _answer_with_model(self, model, prompt: str, chunk: Optional[str] = None) -> Dict[str, Any]:
+        """Call one model, then parse and validate its answer"""
+        return self.answer_from_response(self._call_model(model, prompt), chunk)
+
+    def build_prompt(self, chunk: str, question: str) -> str:
+        """Full answer prompt for a question about a chunk"""
+        return f"{self._format_prompt()}\n\nText:\n{chunk}\n\nQuestion:\n{question}"
+
+    def answer_from_response(self, response: str, chunk: Optional[str] = None) -> Dict[str, Any]:
+        """Parse and validate a model response; with chunk, fill in missing citations from it"""
+        answer_data = self._parse_response(response)
+        if not self._validate_answer(answer_data):
+            raise GenerationError("Invalid answer format or quality")
+        
+        # Add citations if not present
+        if chunk is not None and not answer_data["metadata"]["citations"]:
+            answer_data["metadata"]["citations"] = self._extract_citations(
+                answer_data["answer"], chunk
+            )
+        
+        return answer_data
 
     def generate_parallel(self, chunk: str, question: str) -> Dict[str, Dict[str, Any]]:
-        """Generate answers for a question from text chunk using multiple models in parallel"""
+        """Generate answers for a question from text chunk using multiple models in parallel.
+
+        With quorum_size set, returns as soon as that many models produced valid
+        answers agreeing by quorum_similarity; the remaining calls are cancelled:
+        they stop retrying, send no further requests and abort streams in flight.
+        Otherwise waits for every model and returns all valid answers.
+        """
         try:
             if not self.config.model_settings.use_parallel:
                 return {"default": self.generate(chunk, question)}
 
             # Prepare the prompt
-            prompt = f"{self._format_prompt()}\n\nText:\n{chunk}\n\nQuestion:\n{question}"
-
-            # Generate answers using all models in parallel
-            answers = {}
-            with ThreadPoolExecutor(max_workers=len(self.models)) as executor:
-                future_to_model = {
-                    executor.submit(model.generate, prompt): model
-                    for model in self.models
-                }
-
-                for future in as_completed(future_to_model):
-                    model = future_to_model[future]
-                    try:
-                        response = future.result()
+            prompt = self.build_prompt(chunk, question)
+
+            # Generate answers using one client of every configured model in parallel
+            models = list({model.model: model for model in reversed(self.models)}.values())
+            quorum = min(self.quorum_size, len(models)) if self.quorum_size else None
+            answers: Dict[str, Dict[str, Any]] = {}
+            executor = ThreadPoolExecutor(max_workers=len(models))
+            cancelled = Event()
+            future_to_model = {}
+            try:
+                with cancellation_scope(cancelled):
+                    future_to_model = {
+                        submit_in_context(executor, self._timed_answer, model, prompt): model
+                        for model in models
+                    }
+                pending = set(future_to_model)
+                while pending:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        model = future_to_model[future]
                         try:
-                            answer_data = self._extract_json_from_response(response)
-                            if self._validate_answer(answer_data):
-                                answers[model.model] = answer_data
+                            answers[model.model] = future.result()
                         except Exception as e:
-                            print(f"Error parsing response from model {model.model}: {e}")
-                    except Exception as e:
-                        print(f"Error generating answer with model {model.model}: {str(e)}")
-
+                            logger.warning(f"No valid answer from model {model.model}", error=str(e))
+                    agreeing = self._find_quorum(answers, quorum) if quorum else None
+                    if agreeing:
+                        for name in agreeing:
+                            self._model_stat(name)["wins"].inc()
+                        for future in pending:
+                            self._model_stat(future_to_model[future].model)["abandoned"].inc()
+                        return {name: answers[name] for name in agreeing}
+            finally:
+                # Do not wait for calls a quorum made unnecessary, and stop those already running
+                cancelled.set()
+                for future in future_to_model:
+                    future.cancel()
+                executor.shutdown(wait=False)
+
+            if quorum:
+                logger.warning("Parallel answers did not reach quorum", quorum=quorum, valid=len(answers))
             return answers
 
         except Exception as e:
             raise GenerationError(f"Error generating parallel answers: {str(e)}")
 
+    def _timed_answer(self, model, prompt: str) -> Dict[str, Any]:
+        """Answer with one model, recording its latency and outcome"""
+        stats = self._model_stat(model.model)
+        stats["calls"].inc()
+        start = time.perf_counter()
+        answer_data = self._answer_with_model(model, prompt)
+        stats["latency"].observe(time.perf_counter() - start)
+        stats["valid"].inc()
+        return answer_data
+
+    def _model_stat(self, name: str) -> Dict[str, Any]:
+        stats = self.model_stats.get(name)
+        if stats is None:
+            stats = self.model_stats.setdefault(name, {
+                "calls": Counter(), "valid": Counter(), "wins": Counter(), "abandoned": Counter(),
+                "latency": LatencyHistogram()
+            })
+        return stats
+
+    def _find_quorum(self, answers: Dict[str, Dict[str, Any]], quorum: int) -> Optional[List[str]]:
+        """Models of the first group of quorum answers all similar to one of them, if any"""
+        if len(answers) < quorum:
+            return None
+        for name, answer in answers.items():
+            group = [
+                other for other, other_answer in answers.items()
+                if other == name or answer_similarity(answer["answer"], other_answer["answer"]) >= self.quorum_similarity
+            ]
+            if len(group) >= quorum:
+                return group[:quorum]
+        return None
+
+    def get_model_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Per-model calls, valid answers, quorum wins, abandoned calls and latency of parallel answering"""
+        return {
+            name: {
+                key: value.snapshot() if isinstance(value, LatencyHistogram) else value.value
+                for key, value in stats.items()
+            }
+            for name, stats in list(self.model_stats.items())
+        }
+
     def generate_batch(self, chunk: str, questions: List[str], show_progress: bool = True) -> List[Dict[str, Any]]:
         """Generate answers for multiple questions from a chunk"""
         try:
-            if show_progress:
-                questions = tqdm(questions, desc="Generating answers")
-            return [self.generate(chunk, question) for question in questions]
+            results = parallel_map(
+                lambda question: self.generate(chunk, question),
+                list(questions),
+                self.worker_count,
+                show_progress=show_progress,
+                desc="Generating answers"
+            )
         except Exception as e:
             raise GenerationError(f"Error generating answers in batch: {str(e)}")
+        logger.info("Answer generation batch finished", questions=len(results), **self.get_stats())
+        return results
 
     def generate_batch_parallel(self, chunk: str, questions: List[str], show_progress: bool = True) -> List[Dict[str, Dict[str, Any]]]:
         """Generate answers for multiple questions from a chunk using multiple models in parallel"""
@@ -332,6 +523,11 @@ class AnswerProcessor:
         self.config = config
         self.generator = generator or AnswerGenerator(config)
 
+    def _worker_count(self) -> int:
+        """Worker threads for answering, scaled by the generator's pool size when it has one"""
+        worker_count = getattr(self.generator, "worker_count", None)
+        return worker_count if isinstance(worker_count, int) and worker_count > 0 else get_worker_count(self.config)
+
     def process_question(self, chunk: str, question: str) -> Dict[str, Any]:
         """Process a single question and generate answer"""
         try:
@@ -360,14 +556,75 @@ class AnswerProcessor:
         except Exception as e:
             raise GenerationError(f"Error processing questions in parallel: {str(e)}")
 
+    def process_question_stream(
+        self,
+        chunk: str,
+        questions: Iterable[Any],
+        executor: Optional[Executor] = None
+    ) -> Tuple[List[Any], List[Dict[str, Any]]]:
+        """Answer questions while they are still being generated.
+        
+        Each question is submitted to the worker pool as soon as the iterable
+        yields it. Returns the consumed questions and their answers in order.
+        Streams running concurrently should share one executor; without it each
+        call creates its own pool.
+        """
+        if executor is None:
+            with ThreadPoolExecutor(max_workers=self._worker_count()) as own_executor:
+                return self.process_question_stream(chunk, questions, own_executor)
+        received: List[Any] = []
+        futures = []
+        try:
+            try:
+                for question in questions:
+                    received.append(question)
+                    futures.append(submit_in_context(executor, self.generator.generate, chunk, question))
+                answers = [future.result() for future in futures]
+            except BaseException:
+                for future in futures:
+                    future.cancel()
+                raise
+            return received, answers
+        except Exception as e:
+            raise GenerationError(f"Error processing question stream: {str(e)}")
+
     def process_qa_pairs(self, chunks: List[str], questions: List[List[str]], show_progress: bool = True) -> List[List[Dict[str, Any]]]:
-        """Process multiple chunks and their questions to generate answers"""
+        """Process multiple chunks and their questions to generate answers.
+
+        Generators that override generate_batch get one generate_batch call per chunk,
+        in order; the stock AnswerGenerator answers all pairs from one worker pool.
+        """
+        generate_batch = getattr(type(self.generator), "generate_batch", None)
+        if generate_batch is not None and generate_batch is not AnswerGenerator.generate_batch:
+            try:
+                if show_progress:
+                    pairs = tqdm(zip(chunks, questions), desc="Processing QA pairs", total=len(chunks))
+                else:
+                    pairs = zip(chunks, questions)
+                return [self.process_questions(chunk, chunk_questions, False) for chunk, chunk_questions in pairs]
+            except Exception as e:
+                raise GenerationError(f"Error processing QA pairs: {str(e)}")
         try:
-            if show_progress:
-                pairs = tqdm(zip(chunks, questions), desc="Processing QA pairs", total=len(chunks))
-            else:
-                pairs = zip(chunks, questions)
-            return [self.process_questions(chunk, chunk_questions, False) for chunk, chunk_questions in pairs]
+            # Flatten so every (chunk, question) pair competes for the same worker pool
+            pairs = [
+                (chunk, question)
+                for chunk, chunk_questions in zip(chunks, questions)
+                for question in chunk_questions
+            ]
+            answers = parallel_map(
+                lambda pair: self.generator.generate(*pair),
+                pairs,
+                self._worker_count(),
+                show_progress=show_progress,
+                desc="Processing QA pairs"
+            )
+            
+            results = []
+            offset = 0
+            for chunk_questions in questions[:len(chunks)]:
+                results.append(answers[offset:offset + len(chunk_questions)])
+                offset += len(chunk_questions)
+            return results
         except Exception as e:
             raise GenerationError(f"Error processing QA pairs: {str(e)}")
 
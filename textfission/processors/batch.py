@@ -0,0 +1,277 @@
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from contextlib import contextmanager
+from pathlib import Path
+import json
+import tempfile
+import time
+from ..core.concurrency import get_worker_count, parallel_map
+from ..core.exceptions import ConfigurationError, Deadline, DeadlineExceeded, ProcessingError
+from ..core.logger import Logger
+from ..core.metrics import Counter
+from ..models.failover import FailoverModel
+from ..models.openai import OpenAIModel
+from .question_generator import QuestionGenerator
+from .answer_generator import AnswerGenerator
+
+logger = Logger.get_instance()
+
+_TERMINAL_STATUSES = ("completed", "failed", "expired", "cancelled")
+
+class BatchRunner:
+    """Run the question and answer stages through an OpenAI-compatible batch API.
+
+    Each stage writes its requests as JSONL, uploads the file, creates a batch,
+    polls it until it finishes and feeds the outputs through the generators'
+    normal parsing and validation. Items the batch could not answer validly,
+    including every item of a failed or expired batch, are generated
+    interactively, so the result has the same shape and guarantees as the
+    regular pipeline. Answer requests are split over the answer pool's members,
+    one batch per API key and model.
+
+    The JSONL files are kept in batch_dir when it is configured; otherwise they
+    live in a temporary directory removed when the batch is done.
+    """
+
+    ENDPOINT = "/v1/chat/completions"
+
+    def __init__(
+        self,
+        config,
+        question_generator: Optional[QuestionGenerator] = None,
+        answer_generator: Optional[AnswerGenerator] = None
+    ):
+        self.config = config
+        self.question_generator = question_generator or QuestionGenerator(config)
+        self.answer_generator = answer_generator or AnswerGenerator(config)
+        processing = getattr(config, "processing_config", None)
+        self.poll_interval = getattr(processing, "batch_poll_interval", 30.0)
+        self.completion_window = getattr(processing, "batch_completion_window", "24h")
+        batch_dir = getattr(processing, "batch_dir", None)
+        self.batch_dir = Path(batch_dir) if batch_dir else None
+        if self.batch_dir is not None:
+            self.batch_dir.mkdir(parents=True, exist_ok=True)
+        self.counters = {name: Counter() for name in ("batches", "requests", "failed_requests", "fallbacks")}
+
+    @staticmethod
+    def _openai_model(model: Any) -> OpenAIModel:
+        """The OpenAI-compatible client behind a stage's model"""
+        if isinstance(model, FailoverModel):
+            model = model.models[0]
+        if not isinstance(model, OpenAIModel):
+            raise ConfigurationError(
+                f"Batch mode needs an OpenAI-compatible model, got {getattr(model, 'provider', type(model).__name__)}"
+            )
+        return model
+
+    def run(self, chunks: List[str]) -> Tuple[List[List[Dict[str, Any]]], List[List[Dict[str, Any]]]]:
+        """Generate questions and answers for chunks, returning them like the interactive pipeline"""
+        questions = self.generate_questions(chunks)
+        answers = self.generate_answers(chunks, questions)
+        return questions, answers
+
+    def generate_questions(self, chunks: List[str]) -> List[List[Dict[str, Any]]]:
+        """Question stage: one batch request per chunk"""
+        generator = self.question_generator
+        model = self._openai_model(generator.model)
+        extra = self._structured_params(model, generator, "questions")
+        requests = {
+            f"question-{index}": model.chat_params(generator.build_prompt(chunk), **extra)
+            for index, chunk in enumerate(chunks)
+        }
+        outputs = self.submit(model, requests, "questions")
+
+        results: List[List[Dict[str, Any]]] = []
+        failed: List[int] = []
+        for index, chunk in enumerate(chunks):
+            accepted: List[Dict[str, Any]] = []
+            output = outputs.get(f"question-{index}")
+            if output is not None:
+                try:
+                    generator.add_from_response(output, accepted)
+                except Exception as e:
+                    logger.warning("Discarding invalid batch question output", chunk=index, error=str(e))
+            if len(accepted) < generator.min_questions_per_chunk:
+                failed.append(index)
+            results.append(accepted[:generator.max_questions_per_chunk])
+
+        for index, questions in zip(failed, self._fallback(lambda index: generator.generate(chunks[index]), failed)):
+            results[index] = questions
+        return results
+
+    def generate_answers(
+        self,
+        chunks: List[str],
+        questions: List[List[Dict[str, Any]]]
+    ) -> List[List[Dict[str, Any]]]:
+        """Answer stage: one batch request per question, spread round-robin over the pool members"""
+        generator = self.answer_generator
+        models = [self._openai_model(model) for model in generator.models]
+        extras = [self._structured_params(model, generator, "answer") for model in models]
+        pairs = [
+            (chunk_index, question_index, question)
+            for chunk_index, chunk_questions in enumerate(questions)
+            for question_index, question in enumerate(chunk_questions)
+        ]
+        groups: List[Dict[str, Dict[str, Any]]] = [{} for _ in models]
+        for position, (chunk_index, question_index, question) in enumerate(pairs):
+            member = position % len(models)
+            groups[member][f"answer-{chunk_index}-{question_index}"] = models[member].chat_params(
+                generator.build_prompt(chunks[chunk_index], self._question_text(question)),
+                **extras[member]
+            )
+        names = ["answers"] if len(models) == 1 else [f"answers-{member}" for member in range(len(models))]
+        outputs: Dict[str, str] = {}
+        # Each member's batch is polled on its own thread, so the batches run side by side
+        for member_outputs in parallel_map(
+            lambda member: self.submit(models[member], groups[member], names[member]),
+            list(range(len(models))),
+            len(models)
+        ):
+            outputs.update(member_outputs)
+
+        results: List[List[Optional[Dict[str, Any]]]] = [[None] * len(chunk_questions) for chunk_questions in questions]
+        failed: List[Tuple[int, int, Any]] = []
+        for chunk_index, question_index, question in pairs:
+            output = outputs.get(f"answer-{chunk_index}-{question_index}")
+            try:
+                if output is None:
+                    raise ProcessingError("No batch output")
+                results[chunk_index][question_index] = generator.answer_from_response(output, chunks[chunk_index])
+            except Exception as e:
+                logger.debug("Batch answer unusable, regenerating", chunk=chunk_index, question=question_index, error=str(e))
+                failed.append((chunk_index, question_index, question))
+
+        answers = self._fallback(lambda item: generator.generate(chunks[item[0]], item[2]), failed, getattr(generator, "worker_count", None))
+        for (chunk_index, question_index, _), answer in zip(failed, answers):
+            results[chunk_index][question_index] = answer
+        return results
+
+    @staticmethod
+    def _question_text(question: Any) -> str:
+        return question.get("text", "") if isinstance(question, dict) else question
+
+    @staticmethod
+    def _structured_params(model: OpenAIModel, generator: Any, schema_name: str) -> Dict[str, Any]:
+        """response_format for the batch body when the generator uses structured output"""
+        if not generator.response_format:
+            return {}
+        return {
+            "response_format": model.response_format_param(
+                generator._response_schema(), schema_name, generator.response_format
+            )
+        }
+
+    def _fallback(self, func: Callable[[Any], Any], items: List[Any], worker_count: Optional[int] = None) -> List[Any]:
+        """Generate items the batch did not answer validly through the interactive path"""
+        if not items:
+            return []
+        self.counters["fallbacks"].inc(len(items))
+        logger.info("Generating batch leftovers interactively", items=len(items))
+        workers = worker_count if isinstance(worker_count, int) and worker_count > 0 else get_worker_count(self.config)
+        return parallel_map(func, items, workers)
+
+    def submit(self, model: OpenAIModel, requests: Dict[str, Dict[str, Any]], name: str) -> Dict[str, str]:
+        """Run one batch of chat completion requests, returning the message content per custom_id"""
+        if not requests:
+            return {}
+        client = model.client
+        with self._files_dir() as directory:
+            input_path = directory / f"{name}.jsonl"
+            with open(input_path, "w", encoding="utf-8") as f:
+                for custom_id, body in requests.items():
+                    f.write(json.dumps(
+                        {"custom_id": custom_id, "method": "POST", "url": self.ENDPOINT, "body": body},
+                        ensure_ascii=False
+                    ) + "\n")
+
+            try:
+                with open(input_path, "rb") as f:
+                    input_file = client.files.create(file=f, purpose="batch")
+                batch = client.batches.create(
+                    input_file_id=input_file.id,
+                    endpoint=self.ENDPOINT,
+                    completion_window=self.completion_window,
+                    metadata={"textfission_stage": name}
+                )
+            except Exception as e:
+                # No batch endpoint or a rejected upload: every request goes through the fallback
+                logger.warning(
+                    f"Could not submit {name} batch, generating its requests interactively",
+                    error=str(e),
+                    requests=len(requests)
+                )
+                return {}
+            self.counters["batches"].inc()
+            self.counters["requests"].inc(len(requests))
+            logger.info(f"Submitted {name} batch", batch_id=batch.id, requests=len(requests))
+
+            batch = self._wait(client, batch)
+            if batch.status != "completed":
+                # An expired batch may still carry the outputs it finished; the rest fall back
+                logger.warning(
+                    f"{name} batch ended with status {batch.status}, generating its requests interactively",
+                    batch_id=batch.id
+                )
+
+            outputs: Dict[str, str] = {}
+            if getattr(batch, "output_file_id", None):
+                content = client.files.content(batch.output_file_id).text
+                (directory / f"{name}.output.jsonl").write_text(content, encoding="utf-8")
+                outputs = self._parse_output(content)
+        failed = len(requests) - len(outputs)
+        if failed:
+            self.counters["failed_requests"].inc(failed)
+            logger.warning(f"{name} batch returned no usable output for some requests", batch_id=batch.id, failed=failed)
+        return outputs
+
+    @contextmanager
+    def _files_dir(self) -> Iterator[Path]:
+        """batch_dir, or a temporary directory removed on exit"""
+        if self.batch_dir is not None:
+            yield self.batch_dir
+            return
+        with tempfile.TemporaryDirectory(prefix="textfission-batch-") as directory:
+            yield Path(directory)
+
+    def _wait(self, client: Any, batch: Any) -> Any:
+        """Poll a batch until it reaches a terminal status, cancelling it if the job deadline expires"""
+        deadline = Deadline.current()
+        while batch.status not in _TERMINAL_STATUSES:
+            try:
+                if deadline is not None:
+                    deadline.check()
+                    time.sleep(min(self.poll_interval, deadline.remaining()))
+                    deadline.check()
+                else:
+                    time.sleep(self.poll_interval)
+            except DeadlineExceeded:
+                logger.warning("Job deadline expired, cancelling batch", batch_id=batch.id)
+                try:
+                    client.batches.cancel(batch.id)
+                except Exception as e:
+                    logger.warning("Failed to cancel batch", batch_id=batch.id, error=str(e))
+                raise
+            batch = client.batches.retrieve(batch.id)
+            logger.debug("Batch status", batch_id=batch.id, status=batch.status)
+        return batch
+
+    @staticmethod
+    def _parse_output(content: str) -> Dict[str, str]:
+        """Message content of every successful line of a batch output file"""
+        outputs: Dict[str, str] = {}
+        for line in content.splitlines():
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+                response = record.get("response") or {}
+                if record.get("error") or response.get("status_code") != 200:
+                    continue
+                outputs[record["custom_id"]] = response["body"]["choices"][0]["message"]["content"]
+            except (ValueError, KeyError, IndexError, TypeError) as e:
+                logger.warning("Skipping malformed batch output line", error=str(e))
+        return outputs
+
+    def get_stats(self) -> Dict[str, int]:
+        """Batches submitted, requests sent, requests without usable output and interactive fallbacks"""
+        return {name: counter.value for name, counter in self.counters.items()}
@@ -0,0 +1,216 @@
+from typing import Any, Callable, Dict, Iterable, List, Optional
+import contextvars
+import queue
+import threading
+from tqdm import tqdm
+from ..core.concurrency import get_worker_count
+from ..core.logger import Logger
+from ..core.metrics import Counter
+from ..exporters.base import DatasetExporter
+from .question_generator import QuestionProcessor
+from .answer_generator import AnswerProcessor
+
+logger = Logger.get_instance()
+
+# End of input for the next stage, and the result of a get interrupted by a failure
+_DONE = object()
+_STOPPED = object()
+
+def make_record(chunk: str, question: Any, answer: Dict[str, Any]) -> Dict[str, Any]:
+    """Dataset record for one answered question"""
+    return {
+        "text": chunk,
+        "question": question["text"] if isinstance(question, dict) else question,
+        "answer": answer["answer"],
+        "confidence": answer["metadata"]["confidence"]
+    }
+
+class StreamingPipeline:
+    """Generate and export a dataset as a staged stream with bounded memory.
+
+    Chunks from an iterable (typically a splitter generator) feed question
+    workers, whose questions feed answer workers, whose records are appended to
+    the output file by an incremental writer as they arrive. The stages are
+    connected by bounded queues: a full queue blocks the stage before it, so the
+    number of chunks, questions and records in flight stays constant however large
+    the corpus is, and records reach the disk while the run is still going.
+
+    Records are written in completion order. The first failure in any stage stops
+    the pipeline and is re-raised; records written until then stay in a valid file.
+    """
+
+    def __init__(
+        self,
+        config,
+        question_processor: Optional[QuestionProcessor] = None,
+        answer_processor: Optional[AnswerProcessor] = None,
+        exporter: Optional[DatasetExporter] = None,
+        question_workers: Optional[int] = None,
+        answer_workers: Optional[int] = None,
+        queue_size: Optional[int] = None
+    ):
+        self.config = config
+        self.question_processor = question_processor or QuestionProcessor(config)
+        self.answer_processor = answer_processor or AnswerProcessor(config)
+        self.exporter = exporter or DatasetExporter(config)
+        processing = getattr(config, "processing_config", None)
+        self.stream_questions = getattr(processing, "stream_questions", False)
+        self.question_workers = max(1, question_workers or get_worker_count(config))
+        self.answer_workers = max(1, answer_workers or self.answer_processor._worker_count())
+        queue_size = queue_size or getattr(processing, "pipeline_queue_size", None)
+        # Each queue holds about two items per consuming worker unless sized explicitly
+        self.queue_sizes = {
+            "chunks": queue_size or 2 * self.question_workers,
+            "questions": queue_size or 2 * self.answer_workers,
+            "records": queue_size or 2 * self.answer_workers
+        }
+        self.counters = {name: Counter() for name in ("chunks", "questions", "answers", "written", "blocked")}
+        self._peaks = {name: 0 for name in self.queue_sizes}
+        self._lock = threading.Lock()
+
+    def run(
+        self,
+        chunks: Iterable[str],
+        output_path: str,
+        output_format: Optional[str] = None,
+        show_progress: bool = False
+    ) -> str:
+        """Run every stage over chunks and write the records to output_path; returns the path"""
+        queues = {name: queue.Queue(maxsize) for name, maxsize in self.queue_sizes.items()}
+        stop = threading.Event()
+        errors: List[BaseException] = []
+        remaining = {"questions": self.question_workers, "answers": self.answer_workers}
+
+        def fail(error: BaseException) -> None:
+            with self._lock:
+                errors.append(error)
+            stop.set()
+
+        def finish(stage: str, downstream: str, count: int) -> None:
+            """The last worker of a stage to finish signals the end to every downstream worker"""
+            with self._lock:
+                remaining[stage] -= 1
+                last = remaining[stage] == 0
+            if last:
+                for _ in range(count):
+                    self._put(queues[downstream], downstream, _DONE, stop)
+
+        def feed() -> None:
+            for chunk in chunks:
+                self.counters["chunks"].inc()
+                if not self._put(queues["chunks"], "chunks", chunk, stop):
+                    return
+            for _ in range(self.question_workers):
+                self._put(queues["chunks"], "chunks", _DONE, stop)
+
+        def ask() -> None:
+            while True:
+                chunk = self._get(queues["chunks"], stop)
+                if chunk is _STOPPED:
+                    return
+                if chunk is _DONE:
+                    finish("questions", "questions", self.answer_workers)
+                    return
+                if self.stream_questions:
+                    # Hand each question on as soon as it is parsed
+                    questions = self.question_processor.process_chunk_stream(chunk)
+                else:
+                    questions = self.question_processor.process_chunk(chunk)
+                for question in questions:
+                    self.counters["questions"].inc()
+                    if not self._put(queues["questions"], "questions", (chunk, question), stop):
+                        return
+
+        def answer() -> None:
+            while True:
+                pair = self._get(queues["questions"], stop)
+                if pair is _STOPPED:
+                    return
+                if pair is _DONE:
+                    finish("answers", "records", 1)
+                    return
+                chunk, question = pair
+                result = self.answer_processor.generator.generate(chunk, question)
+                self.counters["answers"].inc()
+                if not self._put(queues["records"], "records", make_record(chunk, question, result), stop):
+                    return
+
+        def worker(target: Callable[[], None]) -> Callable[[], None]:
+            def body() -> None:
+                try:
+                    target()
+                except BaseException as e:
+                    fail(e)
+            return body
+
+        threads = [
+            threading.Thread(target=contextvars.copy_context().run, args=(worker(target),), name=f"pipeline-{name}", daemon=True)
+            for name, target, count in (
+                ("feed", feed, 1),
+                ("questions", ask, self.question_workers),
+                ("answers", answer, self.answer_workers)
+            )
+            for _ in range(count)
+        ]
+        writer = self.exporter.open_writer(output_path, output_format)
+        progress = tqdm(desc="Writing QA pairs", unit="pair") if show_progress else None
+        try:
+            for thread in threads:
+                thread.start()
+            while True:
+                record = self._get(queues["records"], stop)
+                if record is _DONE or record is _STOPPED:
+                    break
+                writer.write(record)
+                self.counters["written"].inc()
+                if progress is not None:
+                    progress.update()
+        except BaseException as e:
+            fail(e)
+        finally:
+            stop.set()
+            writer.close()
+            for thread in threads:
+                thread.join()
+            if progress is not None:
+                progress.close()
+
+        logger.debug("Streaming pipeline finished", **self.get_stats()["counters"])
+        if errors:
+            raise errors[0]
+        return writer.output_path
+
+    def _put(self, target: "queue.Queue", name: str, item: Any, stop: threading.Event) -> bool:
+        """Block until item fits in the queue (backpressure); False once the pipeline stops"""
+        if target.full():
+            self.counters["blocked"].inc()
+        while not stop.is_set():
+            try:
+                target.put(item, timeout=0.1)
+            except queue.Full:
+                continue
+            depth = target.qsize()
+            with self._lock:
+                self._peaks[name] = max(self._peaks[name], depth)
+            return True
+        return False
+
+    @staticmethod
+    def _get(source: "queue.Queue", stop: threading.Event) -> Any:
+        """Next item of the queue, or _STOPPED once the pipeline stops"""
+        while not stop.is_set():
+            try:
+                return source.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return _STOPPED
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Items through each stage, blocked puts, and queue capacities with their peak depths"""
+        with self._lock:
+            peaks = dict(self._peaks)
+        return {
+            "counters": {name: counter.value for name, counter in self.counters.items()},
+            "queue_sizes": dict(self.queue_sizes),
+            "peak_depths": peaks
+        }
@@ -1,14 +1,18 @@
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, Optional, Tuple, Iterator
 from ..core.base import BaseQuestionGenerator
-from ..core.exceptions import GenerationError
+from ..core.exceptions import GenerationError, RetryPolicy, RetryExhausted, DeadlineExceeded
+from ..core.concurrency import invoke_model, stream_model, get_worker_count, parallel_map
+from ..core.json_extractor import extract_json, IncrementalArrayParser
+from ..core.config import resolve_stage_config
+from ..core.logger import Logger
+from ..core.metrics import Counter
 from ..models.factory import ModelFactory
-import json
-from tqdm import tqdm
 import re
 from enum import Enum
 from dataclasses import dataclass
 from concurrent.futures import ThreadPoolExecutor
-import time
+
+logger = Logger.get_instance()
 
 class QuestionType(Enum):
     """Types of questions that can be generated"""
@@ -30,6 +34,8 @@ class QuestionGenerator(BaseQuestionGenerator):
     """Enhanced question generator using language models"""
     
     def __init__(self, config):
+        # Question stage model overrides (e.g. a faster model or smaller max_tokens)
+        config = resolve_stage_config(config, "question")
         super().__init__(config)
         self.model = ModelFactory.create_model(config)
         self.language = getattr(config.custom_config, 'language', 'en')
@@ -38,6 +44,15 @@ class QuestionGenerator(BaseQuestionGenerator):
         self.min_questions_per_chunk = getattr(config.custom_config, 'min_questions_per_chunk', 2)
         self.question_types = getattr(config.custom_config, 'question_types', [t.value for t in QuestionType])
         self.difficulty_range = getattr(config.custom_config, 'difficulty_range', (0.3, 0.8))
+        # The only retry layer: model calls made inside it do not retry on their own
+        self.retry_policy = RetryPolicy.from_config(config)
+        # "json_schema" or "json_object" uses the provider's structured output, None plain text
+        self.response_format = getattr(config.model_settings, 'response_format', None)
+        self.counters = {
+            name: Counter() for name in (
+                "calls", "attempts", "model_requests", "structured_requests", "parse_failures", "early_stops"
+            )
+        }
 
     def _get_question_prompt(self) -> str:
         """Get the enhanced question generation prompt based on language"""
@@ -104,24 +119,109 @@ class QuestionGenerator(BaseQuestionGenerator):
             }}
             """
 
-    def _format_prompt(self) -> str:
+    def _format_prompt(self, min_questions: Optional[int] = None, max_questions: Optional[int] = None) -> str:
         """Format the prompt with configuration values"""
         return self.question_prompt.format(
             min_difficulty=self.difficulty_range[0],
             max_difficulty=self.difficulty_range[1],
-            min_questions=self.min_questions_per_chunk,
-            max_questions=self.max_questions_per_chunk,
+            min_questions=min_questions if min_questions is not None else self.min_questions_per_chunk,
+            max_questions=max_questions if max_questions is not None else self.max_questions_per_chunk,
             question_types=", ".join(self.question_types)
         )
 
+    def _format_top_up_prompt(self, chunk: str, accepted: List[Dict[str, Any]]) -> str:
+        """Prompt asking only for the questions still missing, listing the accepted ones"""
+        missing = self.min_questions_per_chunk - len(accepted)
+        room = max(missing, self.max_questions_per_chunk - len(accepted))
+        existing = "\n".join(f"- {q['text']}" for q in accepted)
+        if self.language == "zh":
+            note = f"以下问题已经生成，请勿重复或生成相似问题，只需再生成{missing}到{room}个新问题：\n{existing}"
+        else:
+            note = (
+                f"The following questions were already accepted. Do not repeat them or ask similar ones; "
+                f"generate only {missing} to {room} new questions:\n{existing}"
+            )
+        return f"{self._format_prompt(missing, room)}\n\n{note}\n\nText:\n{chunk}"
+
+    @staticmethod
+    def _normalize_question(text: str) -> str:
+        """Normalize question text for duplicate detection"""
+        return re.sub(r"[\W_]+", "", text.lower())
+
+    def _response_schema(self) -> Dict[str, Any]:
+        """JSON schema of the question output format"""
+        return {
+            "type": "object",
+            "properties": {
+                "questions": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "text": {"type": "string"},
+                            "type": {"type": "string", "enum": list(self.question_types)},
+                            "difficulty": {"type": "number"},
+                            "keywords": {"type": "array", "items": {"type": "string"}},
+                            "context_required": {"type": "boolean"}
+                        },
+                        "required": ["text", "type", "difficulty", "keywords", "context_required"],
+                        "additionalProperties": False
+                    }
+                }
+            },
+            "required": ["questions"],
+            "additionalProperties": False
+        }
+
+    def _call_model(self, prompt: str) -> str:
+        """Call the model, using its structured output mode when response_format is configured"""
+        self.counters["model_requests"].inc()
+        if not self.response_format:
+            return invoke_model(self.model, prompt)
+        self.counters["structured_requests"].inc()
+        return invoke_model(
+            self.model,
+            prompt,
+            method="generate_json",
+            schema=self._response_schema(),
+            schema_name="questions",
+            mode=self.response_format
+        )
+
+    def _parse_response(self, response: str) -> dict:
+        """Extract JSON from a response, counting and logging failures"""
+        try:
+            return extract_json(response)
+        except Exception as e:
+            self.counters["parse_failures"].inc()
+            logger.warning(
+                "Failed to parse question response",
+                error=str(e),
+                structured=bool(self.response_format),
+                parse_failures=self.counters["parse_failures"].value
+            )
+            raise
+
+    def get_stats(self) -> Dict[str, int]:
+        """Counters of generation calls, attempts, retries, model requests and parse failures"""
+        stats = {name: counter.value for name, counter in self.counters.items()}
+        stats["retries"] = max(0, stats["attempts"] - stats["calls"])
+        return stats
+
     def _validate_questions(self, questions: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """Validate and filter generated questions"""
+        """Validate and filter generated questions; a field of the wrong type raises GenerationError"""
         valid_questions = []
         for q in questions:
             # Validate required fields
             if not all(k in q for k in ["text", "type", "difficulty", "keywords", "context_required"]):
                 continue
             
+            # Validate field types, so a malformed reply is retried instead of failing below
+            if not isinstance(q["text"], str) or not isinstance(q["type"], str):
+                raise GenerationError("Question 'text' and 'type' must be strings")
+            if isinstance(q["difficulty"], bool) or not isinstance(q["difficulty"], (int, float)):
+                raise GenerationError("Question 'difficulty' must be a number")
+            
             # Validate question type
             if q["type"] not in self.question_types:
                 continue
@@ -138,59 +238,133 @@ class QuestionGenerator(BaseQuestionGenerator):
         
         return valid_questions
 
-    def _extract_json_from_response(self, response: str) -> dict:
-        if not response or not response.strip():
-            raise GenerationError("Model returned empty response")
-        # 优先提取 markdown 代码块
-        json_match = re.search(r'```(?:json)?\s*(\{.*?\})\s*```', response, re.DOTALL)
-        if json_match:
-            return json.loads(json_match.group(1))
-        # 再尝试直接提取大括号
-        json_match = re.search(r'\{.*\}', response, re.DOTALL)
-        if json_match:
-            return json.loads(json_match.group(0))
-        # 最后直接尝试
-        return json.loads(response)
-
-    def generate(self, chunk: str, max_retries: int = 3, retry_delay: float = 2.0) -> List[Dict[str, Any]]:
-        """Generate questions with metadata from text chunk, with retry and robust JSON extraction"""
-        last_exception = None
-        for attempt in range(max_retries):
-            try:
-                prompt = f"{self._format_prompt()}\n\nText:\n{chunk}"
-                response = self.model.generate(prompt)
-                result = self._extract_json_from_response(response)
-                if not isinstance(result, dict) or "questions" not in result:
-                    raise GenerationError("Invalid response format: missing 'questions' key")
-                questions = result["questions"]
-                if not isinstance(questions, list):
-                    raise GenerationError("Questions must be a list")
-                valid_questions = self._validate_questions(questions)
-                if len(valid_questions) < self.min_questions_per_chunk:
-                    raise GenerationError(f"Generated only {len(valid_questions)} valid questions, minimum required is {self.min_questions_per_chunk}")
-                return valid_questions[:self.max_questions_per_chunk]
-            except Exception as e:
-                last_exception = e
-                print(f"[重试] 第{attempt+1}次生成失败: {e}")
-                time.sleep(retry_delay * (attempt + 1))
-        # 最终失败
-        raise GenerationError(f"Error generating questions after {max_retries} attempts: {last_exception}")
+    def generate(self, chunk: str, max_retries: Optional[int] = None, retry_delay: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Generate questions with metadata from text chunk, with retry and robust JSON extraction.
+        
+        Valid questions are kept across attempts; when a response is short,
+        only the missing count is requested again.
+        """
+        policy = self.retry_policy.with_overrides(max_attempts=max_retries, base_delay=retry_delay)
+        accepted: List[Dict[str, Any]] = []
+        self.counters["calls"].inc()
+        try:
+            return policy.execute(self._generate_once, chunk, accepted)
+        except RetryExhausted as e:
+            raise GenerationError(f"Error generating questions after {e.attempts} attempts: {e.last_error}")
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            raise GenerationError(f"Error generating questions: {e}")
+
+    def _generate_once(self, chunk: str, accepted: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Single generation attempt: call the model, parse, validate and top up a short result"""
+        self.counters["attempts"].inc()
+        added = self._request_questions(chunk, accepted)
+        if added and len(accepted) < self.min_questions_per_chunk:
+            # The response was partially usable: ask for the rest right away instead of regenerating
+            logger.info(
+                "Topping up questions for chunk",
+                accepted=len(accepted),
+                missing=self.min_questions_per_chunk - len(accepted)
+            )
+            self._request_questions(chunk, accepted)
+        if len(accepted) < self.min_questions_per_chunk:
+            raise GenerationError(f"Generated only {len(accepted)} valid questions, minimum required is {self.min_questions_per_chunk}")
+        return accepted[:self.max_questions_per_chunk]
+
+    def _request_questions(self, chunk: str, accepted: List[Dict[str, Any]]) -> int:
+        """Call the model once and add new valid questions to accepted, returning how many were added"""
+        if accepted:
+            prompt = self._format_top_up_prompt(chunk, accepted)
+        else:
+            prompt = self.build_prompt(chunk)
+        return self.add_from_response(self._call_model(prompt), accepted)
+
+    def build_prompt(self, chunk: str) -> str:
+        """Full question prompt for a chunk"""
+        return f"{self._format_prompt()}\n\nText:\n{chunk}"
+
+    def add_from_response(self, response: str, accepted: List[Dict[str, Any]]) -> int:
+        """Parse a model response and add its new valid questions to accepted, returning how many were added"""
+        result = self._parse_response(response)
+        if not isinstance(result, dict) or "questions" not in result:
+            raise GenerationError("Invalid response format: missing 'questions' key")
+        questions = result["questions"]
+        if not isinstance(questions, list):
+            raise GenerationError("Questions must be a list")
+        return self._add_questions(questions, accepted)
+
+    def _add_questions(self, questions: List[Any], accepted: List[Dict[str, Any]]) -> int:
+        """Append valid questions that do not duplicate accepted ones, returning how many were added"""
+        seen = {self._normalize_question(q["text"]) for q in accepted}
+        added = 0
+        for question in self._validate_questions([q for q in questions if isinstance(q, dict)]):
+            key = self._normalize_question(question["text"])
+            if key in seen:
+                continue
+            seen.add(key)
+            accepted.append(question)
+            added += 1
+        return added
+
+    def generate_stream(self, chunk: str) -> Iterator[Dict[str, Any]]:
+        """Yield questions for a chunk as soon as each one is complete.
+        
+        The streamed response is parsed incrementally and closed once
+        max_questions_per_chunk valid questions have arrived. If the stream ends
+        short of min_questions_per_chunk or fails, the missing questions are
+        requested through the regular retrying path.
+        """
+        self.counters["calls"].inc()
+        self.counters["attempts"].inc()
+        self.counters["model_requests"].inc()
+        accepted: List[Dict[str, Any]] = []
+        parser = IncrementalArrayParser("questions")
+        stream = stream_model(self.model, self.build_prompt(chunk))
+        try:
+            for delta in stream:
+                for item in parser.feed(delta):
+                    if not self._add_questions([item], accepted):
+                        continue
+                    yield accepted[-1]
+                    if len(accepted) >= self.max_questions_per_chunk:
+                        # Stop paying for output tokens we would discard anyway
+                        self.counters["early_stops"].inc()
+                        return
+                if parser.finished:
+                    break
+        except Exception as e:
+            logger.warning("Question stream failed, requesting the rest without streaming", error=str(e), accepted=len(accepted))
+        finally:
+            stream.close()
+
+        if len(accepted) >= self.min_questions_per_chunk:
+            return
+        emitted = len(accepted)
+        try:
+            self.retry_policy.execute(self._generate_once, chunk, accepted)
+        except RetryExhausted as e:
+            raise GenerationError(f"Error generating questions after {e.attempts} attempts: {e.last_error}")
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            raise GenerationError(f"Error generating questions: {e}")
+        yield from accepted[emitted:self.max_questions_per_chunk]
 
     def generate_batch(self, chunks: List[str], show_progress: bool = True) -> List[List[Dict[str, Any]]]:
         """Generate questions for multiple chunks in parallel"""
         try:
-            # Temporarily disable parallel processing to debug
-            results = []
-            if show_progress:
-                for chunk in tqdm(chunks, desc="Generating questions"):
-                    results.append(self.generate(chunk))
-            else:
-                for chunk in chunks:
-                    results.append(self.generate(chunk))
-            return results
-                
+            results = parallel_map(
+                self.generate,
+                chunks,
+                get_worker_count(self.config),
+                show_progress=show_progress,
+                desc="Generating questions"
+            )
         except Exception as e:
             raise GenerationError(f"Error generating questions in batch: {str(e)}")
+        logger.info("Question generation batch finished", chunks=len(chunks), **self.get_stats())
+        return results
 
     def generate_with_custom_prompt(self, chunk: str, custom_prompt: str) -> List[Dict[str, Any]]:
         """Generate questions using a custom prompt"""
@@ -225,6 +399,15 @@ class QuestionProcessor:
         except Exception as e:
             raise GenerationError(f"Error processing chunk: {str(e)}")
 
+    def process_chunk_stream(self, chunk: str) -> Iterator[Dict[str, Any]]:
+        """Yield questions for a chunk as they are generated"""
+        try:
+            yield from self.generator.generate_stream(chunk)
+        except GenerationError:
+            raise
+        except Exception as e:
+            raise GenerationError(f"Error processing chunk stream: {str(e)}")
+
     def process_chunks(self, chunks: List[str], show_progress: bool = True) -> List[List[Dict[str, Any]]]:
         """Process multiple chunks and generate questions with metadata"""
         try:
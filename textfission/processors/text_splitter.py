@@ -1,4 +1,4 @@
-from typing import List, Optional, Dict, Any, Protocol
+from typing import List, Optional, Dict, Any, Protocol, Iterable, Iterator
 from ..core.base import BaseSplitter
 from ..core.exceptions import ProcessingError
 import re
@@ -334,6 +334,16 @@ class TextProcessor:
         except Exception as e:
             raise ProcessingError(f"Error processing file {file_path}: {str(e)}")
 
+    def iter_chunks(self, texts: Iterable[str]) -> Iterator[str]:
+        """Yield the chunks of each text in turn; only one text is split at a time"""
+        for text in texts:
+            yield from self.process_text(text)
+
+    def iter_file_chunks(self, file_paths: Iterable[str]) -> Iterator[str]:
+        """Yield the chunks of each file in turn; a file is read once the previous one is used up"""
+        for file_path in file_paths:
+            yield from self.process_file(file_path)
+
     def process_batch(self, texts: List[str], show_progress: bool = True) -> List[List[str]]:
         """Process multiple texts and return chunks for each"""
         try: